@@ -0,0 +1,98 @@
+"""Import-time benchmark of `scientific_citing`.
+
+Measures `import scientific_citing` in fresh interpreters and fails (exit code 1) if
+- one of the heavy dependencies is imported eagerly or
+- the median import time exceeds `--max-ms`.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 20] [--max-ms 150]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+heavy_modules = (
+    "PyPDF2",
+    "requests",
+    "clipboard",
+    "colorful_terminal",
+    "easy_tasks",
+    "exception_details",
+    "aiohttp",
+    "asyncio",
+    "multiprocessing",
+    "sqlite3",
+)
+"Modules that must only be imported on first use"
+
+probe = """
+import sys, time
+start = time.perf_counter()
+import scientific_citing
+elapsed = time.perf_counter() - start
+import json
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (heavy_modules,)
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(runs: int = 20) -> dict:
+    """Import `scientific_citing` in `runs` fresh interpreters.
+
+    Returns:
+        dict: 'median_ms', 'min_ms', 'max_ms' and 'eagerly_loaded' (heavy modules loaded by the import).
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (repo_root, env.get("PYTHONPATH")) if p
+    )
+    times = []
+    loaded = set()
+    for i in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", probe],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        times.append(result["seconds"] * 1000)
+        loaded.update(result["loaded"])
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "eagerly_loaded": sorted(loaded),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--max-ms", type=float, default=150, help="Maximum median import time."
+    )
+    args = parser.parse_args(argv)
+
+    result = measure_import(args.runs)
+    print(json.dumps(result, indent=2))
+    ok = True
+    if result["eagerly_loaded"]:
+        print(f"FAIL: imported eagerly: {', '.join(result['eagerly_loaded'])}")
+        ok = False
+    if result["median_ms"] > args.max_ms:
+        print(
+            f"FAIL: median import time {result['median_ms']:.1f} ms > {args.max_ms} ms"
+        )
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
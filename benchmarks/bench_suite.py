@@ -0,0 +1,285 @@
+"""Offline benchmark suite of the hot paths of `scientific_citing`.
+
+Generates synthetic RIS files and PDFs (see `corpora.py`), serves canned Crossref responses from a local stand-in server and times
+- RIS.__init__ and RIS.handle_items,
+- angewandte_chemie_style and chain_references_to_string_list_qutotes_Angewandte_Chemie,
+- extract_dois_from_pdf, extract_first_doi_from_pdf (with and without raw_scan) and extract_paper_title,
+- doi_to_ris,
+- import scientific_citing.
+The results are written as JSON and can be compared with a baseline from an earlier run; the exit code is 1 if a benchmark got slower than the tolerance allows.
+
+Usage:
+    python benchmarks/bench_suite.py [--references 2000] [--pdfs 10] [--output results.json]
+    python benchmarks/bench_suite.py --baseline baseline.json [--tolerance 0.2]
+    python benchmarks/bench_suite.py --compare old.json new.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_import import measure_import, repo_root
+from corpora import CrossrefStandIn, make_doi, make_paper_pdf, make_ris
+
+sys.path.insert(0, repo_root)
+
+import scientific_citing as sc
+
+
+def timeit(function, repeat: int = 5, items: int = 1) -> dict:
+    """Run the function `repeat` times.
+
+    Returns:
+        dict: 'median_s' and 'min_s' per run, 'items' per run and 'per_item_us' (median).
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "median_s": median,
+        "min_s": min(times),
+        "repeat": repeat,
+        "items": items,
+        "per_item_us": median / items * 1e6,
+    }
+
+
+def run_suite(
+    references: int = 2000,
+    pdfs: int = 10,
+    pages: int = 12,
+    repeat: int = 5,
+    seed: int = 0,
+) -> dict:
+    """Generate the corpora in a temporary directory and time every benchmark.
+
+    Returns:
+        dict: 'meta' (parameters and environment) and 'results' (benchmark name to the timing of `timeit`).
+    """
+    sc.set_pdf_cache(None)
+    sc.set_crossref_cache(None)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ris_path = os.path.join(tmp, "library.ris")
+        content = make_ris(ris_path, references, seed=seed)
+        records = [
+            record.splitlines() for record in content.split("ER  - \n") if record
+        ]
+        ris = sc.RIS(ris_path)
+
+        results["RIS.__init__"] = timeit(lambda: sc.RIS(ris_path), repeat, references)
+
+        def handle_items():
+            ris.references = []
+            for lines in records:
+                ris.handle_items(lines)
+
+        results["RIS.handle_items"] = timeit(handle_items, repeat, references)
+
+        def uncached(function):
+            """Time the formatting itself: drop the memoized citations before each run."""
+
+            def run():
+                for entry in ris.references:
+                    entry.invalidate()
+                return function()
+
+            return run
+
+        # angewandte_chemie_style prints the details of the exception of books without editor
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["angewandte_chemie_style"] = timeit(
+                uncached(
+                    lambda: [ris.angewandte_chemie_style(e) for e in ris.references]
+                ),
+                repeat,
+                references,
+            )
+            results["chain_references_to_string_list_qutotes_Angewandte_Chemie"] = (
+                timeit(
+                    uncached(
+                        lambda: sc.chain_references_to_string_list_qutotes_Angewandte_Chemie(
+                            [ris]
+                        )
+                    ),
+                    repeat,
+                    references,
+                )
+            )
+
+        pdf_paths = []
+        for n in range(pdfs):
+            path = os.path.join(tmp, f"paper_{n}.pdf")
+            # Alternate between a DOI on the first page, on the last page and none
+            doi_page = (0, -1, None)[n % 3]
+            make_paper_pdf(
+                path,
+                make_doi(n) if doi_page is not None else None,
+                doi_page or 0,
+                pages,
+                references_with_dois=20,
+                seed=seed + n,
+            )
+            pdf_paths.append(path)
+        for extractor in (
+            sc.extract_dois_from_pdf,
+            sc.extract_first_doi_from_pdf,
+            sc.extract_paper_title,
+        ):
+            results[extractor.__name__] = timeit(
+                lambda: [extractor(path) for path in pdf_paths], repeat, pdfs
+            )
+        for extractor in (sc.extract_dois_from_pdf, sc.extract_first_doi_from_pdf):
+            results[extractor.__name__ + "(raw_scan)"] = timeit(
+                lambda: [extractor(path, raw_scan=True) for path in pdf_paths],
+                repeat,
+                pdfs,
+            )
+
+        with CrossrefStandIn(seed) as server:
+            client = sc.CrossrefClient(cache=None, url=server.url)
+            ris_dir = os.path.join(tmp, "ris")
+            os.makedirs(ris_dir)
+            dois = [make_doi(n) for n in range(50)]
+            results["doi_to_ris"] = timeit(
+                lambda: [
+                    sc.doi_to_ris(
+                        doi,
+                        os.path.join(ris_dir, f"{n}.ris"),
+                        cache=None,
+                        resolver=client,
+                    )
+                    for n, doi in enumerate(dois)
+                ],
+                repeat,
+                len(dois),
+            )
+            client.close()
+
+    imported = measure_import(max(repeat, 5))
+    results["import scientific_citing"] = {
+        "median_s": imported["median_ms"] / 1000,
+        "min_s": imported["min_ms"] / 1000,
+        "repeat": max(repeat, 5),
+        "items": 1,
+        "per_item_us": imported["median_ms"] * 1000,
+    }
+
+    return {
+        "meta": {
+            "references": references,
+            "pdfs": pdfs,
+            "pages": pages,
+            "repeat": repeat,
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "version": sc.__version__,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2) -> list:
+    """Compare the median times of two runs.
+
+    Args:
+        baseline (dict): Earlier result of `run_suite`.
+        current (dict): Later result of `run_suite`.
+        tolerance (float, optional): Allowed relative slowdown. Defaults to 0.2 (20 %).
+
+    Returns:
+        list[dict]: 'name', 'baseline_s', 'current_s', 'ratio' and 'regression' per benchmark in both runs.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        # Per item, so runs with different corpus sizes stay comparable
+        ratio = result["per_item_us"] / before["per_item_us"]
+        rows.append(
+            {
+                "name": name,
+                "baseline_s": before["median_s"],
+                "current_s": result["median_s"],
+                "ratio": ratio,
+                "regression": ratio > 1 + tolerance,
+            }
+        )
+    return rows
+
+
+def print_comparison(rows: list):
+    width = max(len(row["name"]) for row in rows)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<{width}}  {row['baseline_s'] * 1000:10.2f} ms -> {row['current_s'] * 1000:10.2f} ms  x{row['ratio']:.2f}{flag}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--references", type=int, default=2000)
+    parser.add_argument("--pdfs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file.")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="Only compare two JSON files of earlier runs.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown per item.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        current = run_suite(
+            args.references, args.pdfs, args.pages, args.repeat, args.seed
+        )
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+
+    if baseline is None:
+        for name, result in current["results"].items():
+            print(
+                f"{name:<60} {result['median_s'] * 1000:10.2f} ms  {result['per_item_us']:10.1f} us/item"
+            )
+        return 0
+    rows = compare(baseline, current, args.tolerance)
+    print_comparison(rows)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Synthetic inputs for the benchmarks: RIS files, PDFs with DOIs on chosen pages and a local stand-in for the Crossref REST API.
+Everything is generated from a seed, so runs with the same arguments benchmark the same data.
+"""
+
+import json
+import random
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_words = (
+    "catalytic asymmetric synthesis of chiral ligands for selective oxidation "
+    "photochemical reduction mechanism kinetic study novel polymer framework "
+    "electrochemical properties crystal structure density functional theory"
+).split()
+_first_names = ("Anna", "Hans Peter", "Maria", "John", "Li", "Sofia", "Ahmed", "Eva")
+_last_names = ("Wurst", "Schmidt", "Doe", "Müller", "Zhang", "Rossi", "Khan", "Novak")
+_journals = (
+    "Angewandte Chemie International Edition",
+    "Journal of the American Chemical Society",
+    "Chemistry - A European Journal",
+    "Nature",
+    "Organic Letters",
+)
+
+default_tag_mix = {"JOUR": 0.8, "BOOK": 0.1, "THES": 0.05, "GEN": 0.05}
+"Share of each type of reference in synthetic RIS files"
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_words) for i in range(rng.randint(5, 12))).capitalize()
+
+
+def _author(rng: random.Random) -> str:
+    return f"{rng.choice(_last_names)}, {rng.choice(_first_names)}"
+
+
+def make_doi(n: int) -> str:
+    return f"10.5555/bench.{n:06d}"
+
+
+def make_reference_lines(rng: random.Random, n: int, reference_type: str) -> list:
+    """Lines of one synthetic reference of the type."""
+    lines = [f"TY  - {reference_type}"]
+    lines += [f"AU  - {_author(rng)}" for i in range(rng.randint(1, 12))]
+    lines.append(f"T1  - {_title(rng)}")
+    lines.append(f"PY  - {rng.randint(1980, 2024)}")
+    if reference_type == "BOOK":
+        lines.append(f"BT  - {_title(rng)}")
+        lines.append("PB  - Wiley-VCH")
+        lines.append("CY  - Weinheim")
+        if rng.random() < 0.5:
+            lines.append(f"ED  - {_author(rng)}")
+    elif reference_type == "THES":
+        lines.append("JO  - University of Heidelberg")
+    else:
+        lines.append(f"JO  - {rng.choice(_journals)}")
+        lines.append(f"VL  - {rng.randint(1, 140)}")
+        lines.append(f"IS  - {rng.randint(1, 24)}")
+        start = rng.randint(1, 20000)
+        lines.append(f"SP  - {start}")
+        lines.append(f"EP  - {start + rng.randint(1, 20)}")
+    lines += [f"KW  - {rng.choice(_words)}" for i in range(rng.randint(0, 5))]
+    lines.append(f"DO  - {make_doi(n)}")
+    lines.append("ER  - ")
+    return lines
+
+
+def make_ris(
+    path: str = None, references: int = 1000, tag_mix: dict = None, seed: int = 0
+) -> str:
+    """Synthetic RIS file content.
+
+    Args:
+        path (str, optional): File to write the content to. Defaults to None.
+        references (int, optional): Number of references. Defaults to 1000.
+        tag_mix (dict, optional): Type of reference to its share. Defaults to `default_tag_mix`.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+
+    Returns:
+        str: RIS file content
+    """
+    rng = random.Random(seed)
+    tag_mix = tag_mix or default_tag_mix
+    types = rng.choices(list(tag_mix), weights=list(tag_mix.values()), k=references)
+    lines = []
+    for n, reference_type in enumerate(types):
+        lines += make_reference_lines(rng, n, reference_type)
+    content = "\n".join(lines) + "\n"
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return content
+
+
+def make_pdf(path: str, pages: list, info: dict = None, compress: bool = False):
+    """Write a minimal PDF with one page per text in `pages` (Helvetica, one text line per line).
+
+    Args:
+        path (str): File to write.
+        pages (list[str]): Text of each page; must not contain parentheses or backslashes.
+        info (dict, optional): Entries of the document Info dictionary, e.g. {"Title": ...}. Defaults to None.
+        compress (bool, optional): Flate compress the content streams. Defaults to False.
+    """
+    n = len(pages)
+    font_id = 3 + 2 * n
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode(),
+    ]
+    for i, text in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        body = " ".join(f"({line}) Tj 0 -14 Td" for line in text.split("\n"))
+        data = f"BT /F1 12 Tf 72 720 Td {body} ET".encode("latin-1", "replace")
+        if compress:
+            data = zlib.compress(data)
+            head = b"<< /Length %d /Filter /FlateDecode >>" % len(data)
+        else:
+            head = b"<< /Length %d >>" % len(data)
+        objects.append(head + b"\nstream\n" + data + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    info_id = None
+    if info:
+        info_id = len(objects) + 1
+        entries = " ".join(f"/{k} ({v})" for k, v in info.items())
+        objects.append(f"<< {entries} >>".encode("latin-1", "replace"))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    trailer = f"<< /Size {len(objects) + 1} /Root 1 0 R"
+    if info_id:
+        trailer += f" /Info {info_id} 0 R"
+    out += f"trailer\n{trailer} >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_paper_pdf(
+    path: str,
+    doi: str = None,
+    doi_page: int = 0,
+    number_of_pages: int = 10,
+    lines_per_page: int = 40,
+    references_with_dois: int = 0,
+    compress: bool = True,
+    seed: int = 0,
+):
+    """Write a synthetic paper: a title on the first page, filler text, the DOI on page `doi_page` and optionally cited DOIs on the last page.
+
+    Args:
+        path (str): File to write.
+        doi (str, optional): DOI of the paper, None for a PDF without DOI. Defaults to None.
+        doi_page (int, optional): Page index of the DOI, negative counts from the end. Defaults to 0.
+        number_of_pages (int, optional): Number of pages. Defaults to 10.
+        lines_per_page (int, optional): Filler lines per page. Defaults to 40.
+        references_with_dois (int, optional): Number of cited DOIs on the last page. Defaults to 0.
+        compress (bool, optional): Flate compress the content streams. Defaults to True.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for i in range(number_of_pages):
+        lines = [_title(rng) for j in range(lines_per_page)]
+        pages.append(lines)
+    pages[0].insert(0, _title(rng).upper())
+    if doi is not None:
+        pages[doi_page].insert(1, f"DOI: {doi}")
+    for j in range(references_with_dois):
+        pages[-1].append(f"[{j + 1}] {_author(rng)} doi: {make_doi(100000 + j)}")
+    make_pdf(path, ["\n".join(lines) for lines in pages], compress=compress)
+
+
+def make_work(doi: str, seed: int = 0) -> dict:
+    """Canned Crossref work ('message' of the response) for the DOI."""
+    rng = random.Random(f"{seed}:{doi}")
+    return {
+        "DOI": doi,
+        "title": [_title(rng)],
+        "author": [
+            {"given": rng.choice(_first_names), "family": rng.choice(_last_names)}
+            for i in range(rng.randint(1, 8))
+        ],
+        "created": {"date-parts": [[rng.randint(1980, 2024), 1, 1]]},
+        "container-title": [rng.choice(_journals)],
+        "volume": str(rng.randint(1, 140)),
+        "issue": str(rng.randint(1, 24)),
+        "page": f"{rng.randint(1, 9000)}-{rng.randint(9001, 9999)}",
+    }
+
+
+class _CrossrefHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests += 1
+        doi = self.path.split("/works/", 1)[-1]
+        if "missing" in doi:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(
+            {"status": "ok", "message": make_work(doi, self.server.seed)}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CrossrefStandIn:
+    """Local HTTP server answering '/works/{doi}' like the Crossref REST API with `make_work`; DOIs containing 'missing' get a 404.
+    Pass `url` as the `url` of a `CrossrefClient`. Use as a context manager.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _CrossrefHandler)
+        self._server.seed = seed
+        self._server.requests = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/works/{{doi}}"
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
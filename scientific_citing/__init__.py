@@ -1,3 +1,5 @@
+import importlib
+
 from .ris import (
     abbreviation_to_type_of_reference,
     secondary_abbreviations,
@@ -6,10 +8,90 @@ from .ris import (
     extract_first_doi_from_pdf,
     extract_paper_title,
     RIS,
+    Reference,
+    iter_ris,
+    parse_reference,
     doi_to_ris,
+    dois_to_ris,
+    DoiResult,
+    work_to_ris,
+    work_to_reference,
+    write_ris,
     pdf_to_ris,
     chain_references_to_string_list_qutotes_Angewandte_Chemie,
+    iter_bibliography,
+    write_bibliography,
+)
+from .pdf import (
+    EXTRACTION_VERSION,
+    DoiMatch,
+    PdfAnalysis,
+    PdfMemoryLimitError,
+    analyze_pdf,
+    get_pdf_cache,
+    set_pdf_cache,
+)
+from .pdf_cache import PdfCache
+from .runs import Citation, Run, emitters, render, rtf_document
+from .instrumentation import (
+    LoggingSink,
+    SpanAggregator,
+    SpanRecord,
+    add_sink,
+    remove_sink,
+    span,
+    subscribed,
+)
+from .crossref import (
+    CrossrefCache,
+    CrossrefClient,
+    RateLimiter,
+    fetch_work,
+    get_crossref_cache,
+    get_crossref_client,
+    normalize_doi,
+    set_crossref_cache,
 )
-
 
 __version__ = "0.0.0"
+
+
+_lazy_attributes = {
+    "AsyncCrossrefClient": ".aio",
+    "adoi_to_ris": ".aio",
+    "adois_to_ris": ".aio",
+    "apdf_to_ris": ".aio",
+    "IngestResult": ".ingest",
+    "ingest_directory": ".ingest",
+    "JournalIndex": ".journals",
+    "AbbreviationReport": ".journals",
+    "abbreviate_journal": ".journals",
+    "abbreviate_journals": ".journals",
+    "get_journal_index": ".journals",
+    "normalize_journal_name": ".journals",
+    "CompiledStyle": ".styles",
+    "compile_style": ".styles",
+    "CrossrefSnapshot": ".offline",
+    "open_snapshot": ".offline",
+    "ReferenceStore": ".store",
+    "SyncManifest": ".sync",
+    "SyncReport": ".sync",
+    "sync_directory": ".sync",
+    "DedupIndex": ".dedup",
+    "DuplicateCluster": ".dedup",
+    "deduplicate": ".dedup",
+    "find_duplicates": ".dedup",
+}
+"Public names of modules that are imported on first access only, to keep `import scientific_citing` fast"
+
+
+def __getattr__(name: str):
+    try:
+        module = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_attributes))
@@ -0,0 +1,333 @@
+import asyncio
+
+from . import crossref
+from .crossref import CrossrefCache, clean_doi, get_crossref_cache
+from .ris import (
+    RIS,
+    DoiResult,
+    _get_resolver,
+    _move_pdf,
+    _pdf_first_doi,
+    _report_missing_doi,
+    _save_ris,
+    work_to_ris,
+)
+
+
+def _aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            "The asyncio API of scientific_citing needs 'aiohttp', please make sure you installed it: pip install aiohttp"
+        )
+    return aiohttp
+
+
+async def _cache_call(cache, method: str, *args):
+    """Call a method of the cache, in a worker thread if it has an SQLite store, so its disk I/O does not block the event loop."""
+    if getattr(cache, "path", True) is None:
+        return getattr(cache, method)(*args)
+    return await asyncio.to_thread(getattr(cache, method), *args)
+
+
+def _errors() -> tuple:
+    """Exceptions that are reported instead of raised, as `doi_to_ris` does for `requests` errors."""
+    return (_aiohttp().ClientError, asyncio.TimeoutError, LookupError)
+
+
+class AsyncCrossrefClient:
+    """Asyncio client for the Crossref REST API sharing one `aiohttp.ClientSession` (connection pool).
+    At most `max_in_flight` requests run at the same time, 429 and 5xx responses are retried with exponential backoff.
+    Create it inside the running event loop and close it with `await client.close()` or `async with`.
+    """
+
+    retry_status_codes = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        cache: CrossrefCache = True,
+        timeout: float = 30,
+        max_in_flight: int = 16,
+        retries: int = 3,
+        backoff: float = 0.5,
+        mailto: str = None,
+        url: str = None,
+    ) -> None:
+        """
+        Args:
+            cache (CrossrefCache, optional): Response cache, True for the one set by `set_crossref_cache`, None for no cache. Defaults to True.
+            timeout (float, optional): Total timeout of one request in seconds. Defaults to 30.
+            max_in_flight (int, optional): Maximum number of concurrent requests. Defaults to 16.
+            retries (int, optional): Number of retries after a 429, 5xx or connection error. Defaults to 3.
+            backoff (float, optional): Seconds to wait before the first retry, doubled for every further retry. A 'Retry-After' header takes precedence. Defaults to 0.5.
+            mailto (str, optional): Contact address sent in the User-Agent to use Crossref's polite pool. Defaults to None.
+            url (str, optional): Endpoint with a '{doi}' placeholder. Defaults to `crossref.api_url`.
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff = backoff
+        self.mailto = mailto
+        self.url = url
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            aiohttp = _aiohttp()
+            headers = {}
+            if self.mailto:
+                headers["User-Agent"] = f"scientific_citing (mailto:{self.mailto})"
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=headers,
+            )
+        return self._session
+
+    async def _get_json(self, url: str):
+        """JSON of the response or None on a 404."""
+        aiohttp = _aiohttp()
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            wait = self.backoff * 2**attempt
+            try:
+                async with self._semaphore:
+                    async with session.get(url) as response:
+                        if response.status == 404:
+                            return None
+                        if (
+                            response.status not in self.retry_status_codes
+                            or attempt == self.retries
+                        ):
+                            response.raise_for_status()
+                            return await response.json(content_type=None)
+                        try:
+                            wait = float(response.headers["Retry-After"])
+                        except (KeyError, ValueError):
+                            pass
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(wait)
+
+    async def fetch_work(self, doi: str, cache: CrossrefCache = True):
+        """Get the work of the DOI, see `CrossrefClient.fetch_work`."""
+        if cache is True:
+            cache = self.cache
+        if cache is True:
+            cache = get_crossref_cache()
+        if cache is not None:
+            hit, work = await _cache_call(cache, "lookup", doi)
+            if hit:
+                return work
+
+        data = await self._get_json(
+            (self.url or crossref.api_url).format(doi=clean_doi(doi))
+        )
+        if data is None:
+            work = None
+        elif data["status"] != "ok":
+            return None
+        else:
+            work = data["message"]
+
+        if cache is not None:
+            await _cache_call(cache, "put", doi, work)
+        return work
+
+
+_async_clients = {}
+"Shared client and its shutdown hook by event loop"
+
+
+async def _close_at_shutdown(loop, client: AsyncCrossrefClient):
+    """Async generator closing the shared client of the loop when the loop shuts down its async generators (as `asyncio.run` does before closing the loop)."""
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await client.close()
+
+
+def get_async_crossref_client() -> AsyncCrossrefClient:
+    """The client shared by the coroutines of this module within the running event loop.
+    It is closed and forgotten when the loop shuts down its async generators, e.g. at the end of `asyncio.run`.
+    """
+    loop = asyncio.get_running_loop()
+    item = _async_clients.get(loop)
+    if item is None:
+        client = AsyncCrossrefClient()
+        hook = _close_at_shutdown(loop, client)
+        # Advance the generator to its yield: this registers it with the loop, which closes it in `shutdown_asyncgens`
+        try:
+            hook.asend(None).send(None)
+        except StopIteration:
+            pass
+        item = _async_clients[loop] = (client, hook)
+    return item[0]
+
+
+async def _fetch_work(doi: str, cache, client, resolver):
+    if resolver is not None:
+        resolver = _get_resolver(resolver)
+        if asyncio.iscoroutinefunction(resolver.fetch_work):
+            return await resolver.fetch_work(doi, cache)
+        return await asyncio.to_thread(resolver.fetch_work, doi, cache)
+    if client is None:
+        client = get_async_crossref_client()
+    return await client.fetch_work(doi, cache)
+
+
+async def _aresolve_doi(
+    doi: str, cache=True, client=None, resolver=None, **kwargs
+) -> RIS:
+    doi = clean_doi(doi)
+    work = await _fetch_work(doi, cache, client, resolver)
+    if work is None:
+        raise LookupError(f"DOI not found: {doi}")
+    return await asyncio.to_thread(_save_ris, work_to_ris(work, doi), **kwargs)
+
+
+async def adoi_to_ris(
+    doi: str,
+    filepath: str = None,
+    rename_file_to_angewandte_citing_style: bool = False,
+    rename_ris_to_title: bool = False,
+    move_ris_in_title_dir: bool = False,
+    copy_citation: bool = False,
+    max_title_length: int = 75,
+    cache: CrossrefCache = True,
+    client: AsyncCrossrefClient = None,
+    timeout: float = None,
+    resolver=None,
+):
+    """Asyncio counterpart of `doi_to_ris`.
+
+    Args:
+        client (AsyncCrossrefClient, optional): Client to use. Defaults to the one shared within the running event loop.
+        resolver (CrossrefClient | CrossrefSnapshot | str, optional): Other source of the metadata instead of the client, see `doi_to_ris`; a blocking `fetch_work` runs in a worker thread. Defaults to None.
+        timeout (float, optional): Seconds after which resolving the DOI is given up. Defaults to None.
+        For the other arguments see `doi_to_ris`.
+
+    Returns:
+        RIS | None: RIS object if proceses was successful otherwise None
+    """
+    try:
+        return await asyncio.wait_for(
+            _aresolve_doi(
+                doi,
+                cache,
+                client,
+                resolver,
+                filepath=filepath,
+                rename_file_to_angewandte_citing_style=rename_file_to_angewandte_citing_style,
+                rename_ris_to_title=rename_ris_to_title,
+                move_ris_in_title_dir=move_ris_in_title_dir,
+                copy_citation=copy_citation,
+                max_title_length=max_title_length,
+            ),
+            timeout,
+        )
+    except _errors() as e:
+        print(f"Error: {str(e) or type(e).__name__}")
+
+    return None
+
+
+async def adois_to_ris(
+    dois: list,
+    cache: CrossrefCache = True,
+    client: AsyncCrossrefClient = None,
+    timeout: float = None,
+    resolver=None,
+    **kwargs,
+) -> list:
+    """Asyncio counterpart of `dois_to_ris`; concurrency is bounded by `max_in_flight` of the client.
+    For `resolver` see `adoi_to_ris`.
+
+    Returns:
+        list[DoiResult]: One result per DOI in input order.
+    """
+
+    async def resolve(doi):
+        try:
+            ris = await asyncio.wait_for(
+                _aresolve_doi(doi, cache, client, resolver, **kwargs), timeout
+            )
+            return DoiResult(doi, ris)
+        except Exception as e:
+            return DoiResult(doi, error=e)
+
+    return list(await asyncio.gather(*(resolve(doi) for doi in dois)))
+
+
+async def apdf_to_ris(
+    pdf_path: str,
+    ris_dir: str = None,
+    rename_ris_to_angewandte_citing_style: bool = False,
+    rename_ris_to_title: bool = False,
+    rename_pdf_to_angewandte_citing_style: bool = False,
+    rename_pdf_to_title: bool = False,
+    move_pdf_and_ris_in_title_dir: bool = False,
+    copy_citation: bool = False,
+    max_title_length: int = 75,
+    cache: CrossrefCache = True,
+    client: AsyncCrossrefClient = None,
+    timeout: float = None,
+    executor=None,
+    resolver=None,
+):
+    """Asyncio counterpart of `pdf_to_ris`. The PDF is parsed in `executor` so the event loop stays free; the first DOI is found exactly as `pdf_to_ris` does.
+
+    Args:
+        executor (concurrent.futures.Executor, optional): Worker pool for parsing the PDF; a `ProcessPoolExecutor` avoids contention for the GIL. Defaults to None (the default executor of the loop).
+        For the other arguments see `pdf_to_ris` and `adoi_to_ris`.
+
+    Returns:
+        RIS | None: RIS object if proceses was successful otherwise None
+    """
+    loop = asyncio.get_running_loop()
+    doi = await loop.run_in_executor(executor, _pdf_first_doi, pdf_path)
+    if doi is None:
+        _report_missing_doi(pdf_path)
+        return None
+    ris = await adoi_to_ris(
+        doi,
+        ris_dir,
+        rename_file_to_angewandte_citing_style=rename_ris_to_angewandte_citing_style,
+        rename_ris_to_title=rename_ris_to_title,
+        move_ris_in_title_dir=move_pdf_and_ris_in_title_dir,
+        copy_citation=copy_citation,
+        max_title_length=max_title_length,
+        cache=cache,
+        client=client,
+        timeout=timeout,
+        resolver=resolver,
+    )
+
+    if ris is not None:
+        await asyncio.to_thread(
+            _move_pdf,
+            pdf_path,
+            ris,
+            rename_pdf_to_angewandte_citing_style,
+            rename_pdf_to_title,
+            move_pdf_and_ris_in_title_dir,
+            max_title_length,
+        )
+
+    return ris
@@ -0,0 +1,405 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .pdf_cache import default_cache_dir
+
+
+def _requests():
+    """requests, imported on first use."""
+    import requests
+
+    return requests
+
+
+api_url = "https://api.crossref.org/works/{doi}"
+"Crossref REST API endpoint for a single work"
+
+
+def clean_doi(doi: str) -> str:
+    """Strip whitespace and the usual 'https://doi.org/' or 'doi: ' prefixes from the DOI."""
+    doi = doi.strip()
+    doi = doi.replace("https://doi.org/", "")
+    doi = doi.replace("DOI: ", "")
+    doi = doi.replace("doi: ", "")
+    return doi
+
+
+def normalize_doi(doi: str) -> str:
+    """Cleaned and lower case DOI; DOIs are case insensitive so this is used as the key of a DOI."""
+    return clean_doi(doi).lower()
+
+
+class CrossrefCache:
+    """Cache of Crossref works keyed by the normalized DOI.
+    An in-memory LRU sits in front of an optional SQLite store. Works expire after `ttl` seconds.
+    DOIs unknown to Crossref (404) are cached as well, for `negative_ttl` seconds.
+    Once the SQLite store holds more than `max_entries` works, the least recently used tenth is evicted in one batch.
+    Hits served from memory update the last access in the SQLite store in batches of `touch_batch`, before any eviction and on `close`.
+    Hits and misses are counted in `stats`.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl: float = 30 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        max_entries: int = 100_000,
+        memory_entries: int = 4096,
+        touch_batch: int = 256,
+    ) -> None:
+        """
+        Args:
+            path (str, optional): SQLite database file, True for 'crossref_cache.sqlite' in `default_cache_dir()` or None to only cache in memory. Defaults to None.
+            ttl (float, optional): Seconds a work is valid. Defaults to 30 days.
+            negative_ttl (float, optional): Seconds a 404 is valid. Defaults to 1 day.
+            max_entries (int, optional): Maximum number of works in the SQLite store. Defaults to 100_000.
+            memory_entries (int, optional): Maximum number of works in memory. Defaults to 4096.
+            touch_batch (int, optional): Number of memory hits after which their last access is written to the SQLite store. Defaults to 256.
+        """
+        if path is True:
+            path = os.path.join(default_cache_dir(), "crossref_cache.sqlite")
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = touch_batch
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._stored = 0
+        "Number of works in the SQLite store, recounted before evicting as other processes may share it"
+        self._touched = {}
+        "Last access of the works hit in memory since the last write to the SQLite store"
+        if path is not None:
+            dirpath = os.path.dirname(path)
+            if dirpath and not os.path.isdir(dirpath):
+                os.makedirs(dirpath)
+            import sqlite3
+
+            self._connection = sqlite3.connect(
+                path, timeout=30, check_same_thread=False
+            )
+            # A lost put only costs a request, so commits need not wait for the disk
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS works (doi TEXT PRIMARY KEY, work TEXT, expires REAL, last_access REAL)"
+                )
+                self._connection.execute(
+                    "CREATE INDEX IF NOT EXISTS works_last_access ON works (last_access)"
+                )
+            self._stored = self._connection.execute(
+                "SELECT COUNT(*) FROM works"
+            ).fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            with self._lock:
+                with self._connection:
+                    self._write_touched()
+            self._connection.close()
+
+    def _write_touched(self):
+        """Write the last access of the works hit in memory to the SQLite store."""
+        if self._touched:
+            self._connection.executemany(
+                "UPDATE works SET last_access = ? WHERE doi = ?",
+                [(now, key) for key, now in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _remember(self, key: str, work: dict, expires: float):
+        self._memory[key] = (work, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, doi: str):
+        """Look up the work of the DOI.
+
+        Args:
+            doi (str): DOI, normalized internally.
+
+        Returns:
+            tuple[bool, dict | None]: (True, work) on a hit where work is None for a cached 404, (False, None) on a miss.
+        """
+        key = normalize_doi(doi)
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                self._memory.move_to_end(key)
+                if self._connection is not None and item[1] >= now:
+                    self._touched[key] = now
+                    if len(self._touched) >= self.touch_batch:
+                        with self._connection:
+                            self._write_touched()
+            elif self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT work, expires FROM works WHERE doi = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    item = (json.loads(row[0]), row[1])
+                    with self._connection:
+                        self._connection.execute(
+                            "UPDATE works SET last_access = ? WHERE doi = ?",
+                            (now, key),
+                        )
+                    self._remember(key, *item)
+            if item is not None and item[1] < now:
+                self.stats["expired"] += 1
+                self._memory.pop(key, None)
+                item = None
+            if item is None:
+                self.stats["misses"] += 1
+                return False, None
+            if item[0] is None:
+                self.stats["negative_hits"] += 1
+            else:
+                self.stats["hits"] += 1
+            return True, item[0]
+
+    def put(self, doi: str, work: dict):
+        """Cache the work of the DOI, None caches a 404."""
+        key = normalize_doi(doi)
+        now = time.time()
+        expires = now + (self.ttl if work is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(key, work, expires)
+            if self._connection is not None:
+                with self._connection:
+                    known = self._connection.execute(
+                        "SELECT 1 FROM works WHERE doi = ?", (key,)
+                    ).fetchone()
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(work), expires, now),
+                    )
+                    if known is None:
+                        self._stored += 1
+                    if self._stored > self.max_entries:
+                        self._evict()
+
+    def _evict(self):
+        """Recount the stored works and, if there are more than `max_entries`, delete the least recently used ones down to 90 % of `max_entries`."""
+        self._write_touched()
+        self._stored = self._connection.execute(
+            "SELECT COUNT(*) FROM works"
+        ).fetchone()[0]
+        if self._stored > self.max_entries:
+            excess = self._stored - self.max_entries + self.max_entries // 10
+            self._connection.execute(
+                "DELETE FROM works WHERE doi IN (SELECT doi FROM works ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self._stored -= excess
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM works")
+                self._stored = 0
+
+    def purge_expired(self):
+        """Remove expired works from memory and the SQLite store."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (w, e) in self._memory.items() if e < now]:
+                del self._memory[key]
+            if self._connection is not None:
+                with self._connection:
+                    self._stored -= self._connection.execute(
+                        "DELETE FROM works WHERE expires < ?", (now,)
+                    ).rowcount
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.stats["hits"] + self.stats["negative_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+_crossref_cache = None
+
+
+def set_crossref_cache(cache=True):
+    """Set the cache consulted by `fetch_work` and `doi_to_ris` by default.
+
+    Args:
+        cache (CrossrefCache | str | bool, optional): Cache, path of the cache database, True for an in-memory cache in front of the default location or None/False to disable caching. Defaults to True.
+
+    Returns:
+        CrossrefCache | None: The cache now in use.
+    """
+    global _crossref_cache
+    if cache is True or isinstance(cache, str):
+        cache = CrossrefCache(cache)
+    elif cache is False:
+        cache = None
+    _crossref_cache = cache
+    return cache
+
+
+def get_crossref_cache():
+    """The cache consulted by default or None if caching is disabled."""
+    return _crossref_cache
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` acquisitions per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CrossrefClient:
+    """Client for the Crossref REST API sharing one keep-alive `requests.Session`.
+    Requests time out, are optionally rate limited and 429 and 5xx responses are retried with exponential backoff.
+    """
+
+    retry_status_codes = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        cache: CrossrefCache = True,
+        timeout=(5, 30),
+        retries: int = 3,
+        backoff: float = 0.5,
+        rate_limit: float = None,
+        pool_size: int = 16,
+        mailto: str = None,
+        url: str = None,
+    ) -> None:
+        """
+        Args:
+            cache (CrossrefCache, optional): Response cache, True for the one set by `set_crossref_cache`, None for no cache. Defaults to True.
+            timeout (float | tuple, optional): Connect and read timeout in seconds as accepted by `requests`. Defaults to (5, 30).
+            retries (int, optional): Number of retries after a 429, 5xx or connection error. Defaults to 3.
+            backoff (float, optional): Seconds to wait before the first retry, doubled for every further retry. A 'Retry-After' header takes precedence. Defaults to 0.5.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None (unlimited).
+            pool_size (int, optional): Number of pooled connections. Defaults to 16.
+            mailto (str, optional): Contact address sent in the User-Agent to use Crossref's polite pool. Defaults to None.
+            url (str, optional): Endpoint with a '{doi}' placeholder. Defaults to `api_url`.
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.url = url
+        requests = _requests()
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if mailto:
+            self.session.headers["User-Agent"] = f"scientific_citing (mailto:{mailto})"
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, url: str) -> "requests.Response":
+        requests = _requests()
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+                continue
+            if response.status_code not in self.retry_status_codes or (
+                attempt == self.retries
+            ):
+                return response
+            try:
+                wait = float(response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                wait = self.backoff * 2**attempt
+            time.sleep(wait)
+
+    def fetch_work(self, doi: str, cache: CrossrefCache = True):
+        """Get the work of the DOI from 'https://api.crossref.org/works/{doi}'.
+
+        Args:
+            doi (str): DOI
+            cache (CrossrefCache, optional): Response cache, True for the cache of the client, None for no cache. Defaults to True.
+
+        Raises:
+            requests.exceptions.RequestException: The request failed for other reasons than an unknown DOI.
+
+        Returns:
+            dict | None: The 'message' of the Crossref response or None if the DOI is unknown.
+        """
+        if cache is True:
+            cache = self.cache
+        if cache is True:
+            cache = get_crossref_cache()
+        if cache is not None:
+            hit, work = cache.lookup(doi)
+            if hit:
+                return work
+
+        response = self._get((self.url or api_url).format(doi=clean_doi(doi)))
+        if response.status_code == 404:
+            work = None
+        else:
+            response.raise_for_status()
+            data = response.json()
+            if data["status"] != "ok":
+                return None
+            work = data["message"]
+
+        if cache is not None:
+            cache.put(doi, work)
+        return work
+
+
+_crossref_client = None
+_crossref_client_lock = threading.Lock()
+
+
+def get_crossref_client() -> CrossrefClient:
+    """The shared client used by `fetch_work` and `doi_to_ris` by default."""
+    global _crossref_client
+    with _crossref_client_lock:
+        if _crossref_client is None:
+            _crossref_client = CrossrefClient()
+        return _crossref_client
+
+
+def fetch_work(doi: str, cache: CrossrefCache = True):
+    """Get the work of the DOI with the shared client, see `CrossrefClient.fetch_work`."""
+    return get_crossref_client().fetch_work(doi, cache)
@@ -0,0 +1,353 @@
+import re
+import unicodedata
+from hashlib import blake2b
+from typing import NamedTuple
+
+from .ris import Reference
+
+_non_word_pattern = re.compile(r"[^a-z0-9]+")
+_doi_prefix_pattern = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.I)
+_year_pattern = re.compile(r"\d{4}")
+
+_title_tags = ("TI", "T1")
+_author_tags = ("A1", "AU", "A2", "A3", "A4")
+_year_tags = ("PY", "Y1", "DA")
+
+
+def _first(value):
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value
+
+
+def normalize_text(text: str) -> str:
+    """Lower case text without accents and punctuation, words separated by single spaces."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return _non_word_pattern.sub(" ", text.lower()).strip()
+
+
+def normalize_reference_doi(doi: str) -> str:
+    """DOI without resolver prefix and in lower case, as DOIs are case insensitive."""
+    return _doi_prefix_pattern.sub("", doi.strip()).strip().lower()
+
+
+def _title(entry) -> str:
+    for tag in _title_tags:
+        title = _first(entry.get(tag))
+        if title:
+            return normalize_text(title)
+    return ""
+
+
+def _year(entry) -> str:
+    for tag in _year_tags:
+        value = _first(entry.get(tag))
+        if value:
+            match = _year_pattern.search(value)
+            if match:
+                return match.group()
+    return ""
+
+
+def _author_key(entry) -> str:
+    """Alphabetically first normalized last name of the authors, so the key does not depend on the order of the authors."""
+    last_names = []
+    for tag in _author_tags:
+        value = entry.get(tag)
+        for author in value if isinstance(value, (list, tuple)) else (value,):
+            if author:
+                last_name = normalize_text(author.split(",")[0])
+                if last_name:
+                    last_names.append(last_name)
+    return min(last_names) if last_names else ""
+
+
+def reference_keys(entry) -> list:
+    """Exact identity keys of the reference: its normalized DOI and, if it has a title, an author and a year, normalized title, first author and year.
+    Without author or year the title alone is not specific enough, e.g. for items titled 'Editorial'.
+
+    Returns:
+        list[str]: 'doi:<doi>' and/or 'tay:<title>|<author>|<year>'.
+    """
+    keys = []
+    doi = _first(entry.get("DO"))
+    if doi:
+        doi = normalize_reference_doi(doi)
+        if doi:
+            keys.append("doi:" + doi)
+    title = _title(entry)
+    if title:
+        author = _author_key(entry)
+        year = _year(entry)
+        if author and year:
+            keys.append(f"tay:{title}|{author}|{year}")
+    return keys
+
+
+def _shingles(title: str, size: int = 4) -> set:
+    if len(title) <= size:
+        return {title}
+    return {title[i : i + size] for i in range(len(title) - size + 1)}
+
+
+class DuplicateCluster(NamedTuple):
+    """References found to be the same work."""
+
+    canonical: Reference
+    "Record chosen (and completed) by the merge policy"
+    members: list
+    "All references of the cluster in order of addition"
+    indices: list
+    "Positions of the members in the order of addition"
+
+
+def most_complete(members: list) -> Reference:
+    """Merge policy: the record with the most tags (the first one on a tie), completed by the tags only other members have."""
+    best = max(members, key=lambda entry: len(_tags(entry)))
+    canonical = Reference(_tags(best)).copy()
+    for entry in members:
+        for tag, value in _tags(entry).items():
+            if tag not in canonical.tags or not canonical.tags[tag]:
+                canonical[tag] = value
+    return canonical
+
+
+def first_added(members: list) -> Reference:
+    """Merge policy: the first record as it is."""
+    return Reference(_tags(members[0])).copy()
+
+
+merge_policies = {"most_complete": most_complete, "first": first_added}
+"Merge policies by name, see `DedupIndex`"
+
+
+def _tags(entry) -> dict:
+    if isinstance(entry, Reference):
+        return entry.tags
+    return Reference(entry).tags
+
+
+class DedupIndex:
+    """Index finding duplicate references across libraries.
+    1. References sharing the normalized DOI or normalized title, first author and year are merged right away (hash lookups).
+    2. The remaining clusters are compared by MinHash signatures of their title shingles with locality sensitive hashing,
+       so only titles with similar signatures are compared and the cost stays far below comparing all pairs.
+       Near duplicates must share the first author, so generic titles such as 'Editorial' do not merge unrelated items.
+    References with different DOIs are never merged.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 8,
+        max_bucket_size: int = 50,
+        merge_policy="most_complete",
+        seed: int = 1,
+    ) -> None:
+        """
+        Args:
+            threshold (float, optional): Minimum Jaccard similarity of the title shingles of near duplicates; None disables the near duplicate stage. Defaults to 0.8.
+            num_perm (int, optional): Length of the MinHash signatures. Defaults to 64.
+            bands (int, optional): Number of LSH bands, must divide `num_perm`; more bands find more candidates. Defaults to 8.
+            max_bucket_size (int, optional): LSH buckets with more titles are skipped, e.g. 'Editorial'. Defaults to 50.
+            merge_policy (str | Callable, optional): 'most_complete', 'first' or a callable choosing the canonical `Reference` from the members of a cluster. Defaults to "most_complete".
+            seed (int, optional): Seed of the shingle hashes. Defaults to 1.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.max_bucket_size = max_bucket_size
+        if isinstance(merge_policy, str):
+            merge_policy = merge_policies[merge_policy]
+        self.merge_policy = merge_policy
+        self._salt = seed.to_bytes(8, "little")
+        self.references = []
+        self._parent = []
+        self._dois = {}
+        "DOIs of the references of each cluster root"
+        self._titles = []
+        self._years = []
+        self._authors = []
+        self._by_key = {}
+
+    def __len__(self) -> int:
+        return len(self.references)
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def _union(self, i: int, j: int) -> bool:
+        """Merge the clusters of i and j unless they have different DOIs."""
+        i, j = self._find(i), self._find(j)
+        if i == j:
+            return True
+        if i > j:
+            i, j = j, i
+        dois_i, dois_j = self._dois.get(i), self._dois.get(j)
+        if dois_i and dois_j and dois_i.isdisjoint(dois_j):
+            return False
+        self._parent[j] = i
+        if dois_j:
+            self._dois[i] = (dois_i or set()) | self._dois.pop(j)
+        return True
+
+    def add(self, entry) -> int:
+        """Add a reference and merge it with known references sharing an exact key.
+
+        Args:
+            entry (Reference | dict): Entries of the reference.
+
+        Returns:
+            int: Position of the reference.
+        """
+        i = len(self.references)
+        self.references.append(entry)
+        self._parent.append(i)
+        self._titles.append(_title(entry))
+        self._years.append(_year(entry))
+        self._authors.append(_author_key(entry))
+        keys = reference_keys(entry)
+        for key in keys:
+            if key.startswith("doi:"):
+                self._dois[i] = {key}
+        for key in keys:
+            j = self._by_key.setdefault(key, i)
+            if j != i:
+                self._union(j, i)
+        return i
+
+    def add_all(self, references):
+        """Add many references; RIS objects contribute all their references."""
+        for reference in references:
+            for entry in getattr(reference, "references", (reference,)):
+                self.add(entry)
+
+    def _signature_bands(self, title: str) -> list:
+        """LSH band hashes of the MinHash signature of the title.
+        One permutation hashing: each shingle is hashed once and only lowers the minimum of the bin it falls into,
+        empty bins borrow the value of the next non-empty bin (densification). This costs one hash per shingle instead of one per shingle and permutation.
+        """
+        k = self.num_perm
+        salt = self._salt
+        signature = [None] * k
+        for shingle in _shingles(title):
+            h = int.from_bytes(
+                blake2b(shingle.encode(), digest_size=8, salt=salt).digest(), "little"
+            )
+            b, value = h % k, h // k
+            current = signature[b]
+            if current is None or value < current:
+                signature[b] = value
+        if None in signature:
+            filled = [(0, v) for v in signature]
+            for b in range(k):
+                if signature[b] is None:
+                    distance = 1
+                    while signature[(b + distance) % k] is None:
+                        distance += 1
+                    filled[b] = (distance, signature[(b + distance) % k])
+            signature = filled
+        rows = k // self.bands
+        return [
+            hash(tuple(signature[band * rows : (band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+
+    def _near_duplicates(self):
+        """Merge clusters whose titles are near duplicates (LSH candidates verified by the Jaccard similarity)."""
+        buckets = {}
+        seen_titles = {}
+        for i, title in enumerate(self._titles):
+            if not title or self._find(i) != i:
+                continue
+            # Identical titles have identical signatures, compute each once
+            first = seen_titles.setdefault(title, i)
+            if first != i:
+                buckets.setdefault(("title", title), [first]).append(i)
+                continue
+            for band, value in enumerate(self._signature_bands(title)):
+                buckets.setdefault((band, value), []).append(i)
+
+        shingles = {}
+        compared = set()
+        for members in buckets.values():
+            if len(members) < 2 or len(members) > self.max_bucket_size:
+                continue
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    i, j = members[a], members[b]
+                    if (i, j) in compared:
+                        continue
+                    compared.add((i, j))
+                    if self._find(i) == self._find(j) or not self._compatible(i, j):
+                        continue
+                    si = shingles.get(i) or shingles.setdefault(
+                        i, _shingles(self._titles[i])
+                    )
+                    sj = shingles.get(j) or shingles.setdefault(
+                        j, _shingles(self._titles[j])
+                    )
+                    if len(si & sj) / len(si | sj) >= self.threshold:
+                        self._union(i, j)
+
+    def _compatible(self, i: int, j: int) -> bool:
+        """Whether both references name the same first author (see `reference_keys`) and their years do not contradict each other."""
+        author = self._authors[i]
+        if not author or author != self._authors[j]:
+            return False
+        year_i = self._years[i]
+        year_j = self._years[j]
+        return not year_i or not year_j or year_i == year_j
+
+    def clusters(self, min_size: int = 2) -> list:
+        """Clusters of duplicates.
+
+        Args:
+            min_size (int, optional): Minimum number of members, 1 includes references without duplicates. Defaults to 2.
+
+        Returns:
+            list[DuplicateCluster]: Clusters in order of their first member.
+        """
+        if self.threshold is not None:
+            self._near_duplicates()
+        groups = {}
+        for i in range(len(self.references)):
+            groups.setdefault(self._find(i), []).append(i)
+        clusters = []
+        for indices in groups.values():
+            if len(indices) < min_size:
+                continue
+            members = [self.references[i] for i in indices]
+            clusters.append(
+                DuplicateCluster(self.merge_policy(members), members, indices)
+            )
+        return clusters
+
+    def deduplicate(self) -> list:
+        """One canonical `Reference` per work, in order of the first occurrence."""
+        return [cluster.canonical for cluster in self.clusters(min_size=1)]
+
+
+def find_duplicates(references, **kwargs) -> list:
+    """Clusters of duplicates among the references, see `DedupIndex` for the options."""
+    index = DedupIndex(**kwargs)
+    index.add_all(references)
+    return index.clusters()
+
+
+def deduplicate(references, **kwargs) -> list:
+    """The references with every work once, see `DedupIndex` for the options."""
+    index = DedupIndex(**kwargs)
+    index.add_all(references)
+    return index.deduplicate()
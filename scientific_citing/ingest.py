@@ -0,0 +1,273 @@
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
+
+from .crossref import CrossrefCache, CrossrefClient, clean_doi
+from .pdf import PdfAnalysis, get_pdf_cache
+from .pdf_cache import PdfCache
+from .ris import RIS, _get_resolver, _move_pdf, _save_ris, work_to_ris
+
+
+class IngestResult(NamedTuple):
+    """Result of ingesting one PDF with `ingest_directory`.
+    `stage` names the stage that failed ('extract', 'resolve' or 'write') if `error` is set.
+    """
+
+    pdf_path: str
+    doi: str = None
+    ris: RIS = None
+    ris_path: str = None
+    new_pdf_path: str = None
+    error: Exception = None
+    stage: str = None
+
+
+_DONE = object()
+"Marks the end of the stream of a stage"
+
+_worker_cache = None
+
+
+def _extract_first_doi(pdf_path: str, cache_path: str = None, memory_limit: int = None):
+    """Stage 1, runs in a worker process: the first DOI of the PDF or the exception."""
+    global _worker_cache
+    try:
+        cache = None
+        if cache_path is not None:
+            if _worker_cache is None or _worker_cache.path != cache_path:
+                _worker_cache = PdfCache(cache_path)
+            cache = _worker_cache
+        with PdfAnalysis(pdf_path, cache, memory_limit=memory_limit) as analysis:
+            return analysis.first_doi, None
+    except Exception as e:
+        return None, e
+
+
+def iter_pdfs(root: str, recursive: bool = True):
+    """Yield the paths of the PDFs in the directory."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".pdf"):
+                yield os.path.join(dirpath, filename)
+        if not recursive:
+            break
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put the item in the bounded queue, blocking for space unless the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def ingest_directory(
+    root: str,
+    ris_dir: str = None,
+    rename_ris_to_angewandte_citing_style: bool = False,
+    rename_ris_to_title: bool = False,
+    rename_pdf_to_angewandte_citing_style: bool = False,
+    rename_pdf_to_title: bool = False,
+    move_pdf_and_ris_in_title_dir: bool = False,
+    max_title_length: int = 75,
+    recursive: bool = True,
+    processes: int = None,
+    max_requests: int = 8,
+    rate_limit: float = None,
+    queue_size: int = 64,
+    cache: CrossrefCache = True,
+    resolver: CrossrefClient = None,
+    pdfs=None,
+    memory_limit: int = None,
+):
+    """Run `pdf_to_ris` for all PDFs in a directory as a staged pipeline:
+    1. extract the first DOI of each PDF in a process pool,
+    2. resolve the DOIs with concurrent requests,
+    3. write the ris files and rename or move the PDFs.
+    The stages are connected by bounded queues, so a slow stage holds back the faster ones.
+
+    Args:
+        root (str): Directory containing the PDFs.
+        ris_dir (str, optional): Directory for the ris files. Defaults to None (next to each PDF, named like the PDF).
+        recursive (bool, optional): Include subdirectories. Defaults to True.
+        processes (int, optional): Number of processes extracting DOIs. Defaults to None (number of CPUs).
+        max_requests (int, optional): Number of concurrent Crossref requests. Defaults to 8.
+        rate_limit (float, optional): Maximum Crossref requests per second. Ignored if a resolver is given. Defaults to None (unlimited).
+        queue_size (int, optional): Capacity of the queues between the stages. Defaults to 64.
+        cache (CrossrefCache, optional): See `doi_to_ris`. Defaults to True.
+        resolver (CrossrefClient | CrossrefSnapshot | str, optional): See `doi_to_ris`. Defaults to a client with the given rate limit.
+        pdfs (Iterable[str], optional): PDFs to ingest instead of all PDFs found in `root`. Defaults to None.
+        memory_limit (int, optional): Maximum memory growth in bytes of a worker while it extracts one PDF; a PDF exceeding it fails in the 'extract' stage with `PdfMemoryLimitError`. Defaults to None (no limit).
+        For the other arguments see `pdf_to_ris`.
+
+    Yields:
+        IngestResult: One result per PDF in order of completion. If a worker process dies (e.g. killed for lack of memory), the PDFs it was extracting
+        fail in the 'extract' stage with `BrokenProcessPool` and the remaining PDFs are extracted by a new pool.
+    """
+    stop = threading.Event()
+    extracted = queue.Queue(queue_size)
+    resolved = queue.Queue(queue_size)
+    own_resolver = resolver is None
+    if own_resolver:
+        resolver = CrossrefClient(rate_limit=rate_limit, pool_size=max_requests)
+    else:
+        resolver = _get_resolver(resolver)
+    pdf_cache = get_pdf_cache()
+    cache_path = pdf_cache.path if pdf_cache is not None else None
+    if pdfs is None:
+        pdfs = iter_pdfs(root, recursive)
+
+    failures = []
+    "Exception that ended the extract stage, raised to the caller"
+
+    def extract_with_pool(remaining):
+        """Extract the PDFs with one process pool. If a worker died (e.g. killed for lack of memory) the PDFs in progress fail with `BrokenProcessPool`
+        and the PDFs not yet submitted are returned for a new pool, otherwise None is returned.
+        """
+        broken = False
+        reported = 0
+
+        def report(future):
+            nonlocal broken, reported
+            try:
+                doi, error = future.result()
+            except BrokenProcessPool as e:
+                broken = True
+                doi, error = None, e
+            except Exception as e:
+                doi, error = None, e
+            reported += 1
+            _put(extracted, (future.pdf_path, doi, error), stop)
+
+        with ProcessPoolExecutor(processes) as executor:
+            pending = set()
+            for pdf_path in remaining:
+                if stop.is_set():
+                    break
+                if not broken:
+                    try:
+                        future = executor.submit(
+                            _extract_first_doi, pdf_path, cache_path, memory_limit
+                        )
+                    except BrokenProcessPool:
+                        broken = True
+                if broken:
+                    remaining = itertools.chain([pdf_path], remaining)
+                    break
+                future.pdf_path = pdf_path
+                pending.add(future)
+                if len(pending) >= queue_size:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report(future)
+            for future in pending:
+                if stop.is_set():
+                    future.cancel()
+                    continue
+                report(future)
+        if not broken:
+            return None
+        if not reported:
+            raise BrokenProcessPool(
+                "The process pool extracting DOIs broke before extracting any PDF"
+            )
+        return remaining
+
+    def extract_stage():
+        try:
+            remaining = iter(pdfs)
+            while remaining is not None and not stop.is_set():
+                remaining = extract_with_pool(remaining)
+        except BaseException as e:
+            failures.append(e)
+        finally:
+            for i in range(max_requests):
+                _put(extracted, _DONE, stop)
+
+    def resolve_stage():
+        try:
+            while not stop.is_set():
+                try:
+                    item = extracted.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                pdf_path, doi, error = item
+                if error is not None:
+                    result = IngestResult(pdf_path, error=error, stage="extract")
+                elif doi is None:
+                    result = IngestResult(
+                        pdf_path,
+                        error=LookupError(f"No DOI found in {pdf_path}"),
+                        stage="extract",
+                    )
+                else:
+                    doi = clean_doi(doi)
+                    try:
+                        work = resolver.fetch_work(doi, cache)
+                        if work is None:
+                            raise LookupError(f"DOI not found: {doi}")
+                        result = (pdf_path, doi, work)
+                    except Exception as e:
+                        result = IngestResult(pdf_path, doi, error=e, stage="resolve")
+                _put(resolved, result, stop)
+        finally:
+            _put(resolved, _DONE, stop)
+
+    def write(pdf_path: str, doi: str, work: dict) -> IngestResult:
+        try:
+            name = os.path.splitext(os.path.basename(pdf_path))[0] + ".ris"
+            ris_path = os.path.join(ris_dir or os.path.dirname(pdf_path), name)
+            ris = _save_ris(
+                work_to_ris(work, doi),
+                ris_path,
+                rename_file_to_angewandte_citing_style=rename_ris_to_angewandte_citing_style,
+                rename_ris_to_title=rename_ris_to_title,
+                move_ris_in_title_dir=move_pdf_and_ris_in_title_dir,
+                max_title_length=max_title_length,
+            )
+            new_pdf_path = _move_pdf(
+                pdf_path,
+                ris,
+                rename_pdf_to_angewandte_citing_style,
+                rename_pdf_to_title,
+                move_pdf_and_ris_in_title_dir,
+                max_title_length,
+            )
+            return IngestResult(pdf_path, doi, ris, ris.filepath, new_pdf_path)
+        except Exception as e:
+            return IngestResult(pdf_path, doi, error=e, stage="write")
+
+    threads = [threading.Thread(target=extract_stage, daemon=True)]
+    threads += [
+        threading.Thread(target=resolve_stage, daemon=True) for i in range(max_requests)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        running = max_requests
+        while running:
+            item = resolved.get()
+            if item is _DONE:
+                running -= 1
+            elif isinstance(item, IngestResult):
+                yield item
+            else:
+                yield write(*item)
+        if failures:
+            raise failures[0]
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        if own_resolver:
+            resolver.close()
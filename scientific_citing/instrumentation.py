@@ -0,0 +1,231 @@
+import random
+import threading
+import time
+from typing import NamedTuple
+
+
+class SpanRecord(NamedTuple):
+    """Timing of one finished span, passed to every sink."""
+
+    name: str
+    "Stage, e.g. 'pdf.extract_text' or 'crossref.fetch_work'"
+    seconds: float
+    "Duration"
+    start: float
+    "Start as `time.time()`"
+    error: str = None
+    "Name of the exception type if the stage raised"
+    attributes: dict = None
+    "Further details given to `span`, e.g. the path of the PDF"
+
+
+_sinks = ()
+"Subscribed sinks; replaced, never mutated, so spans can iterate it without a lock"
+_sinks_lock = threading.Lock()
+
+
+class _NullSpan:
+    """Span used while no sink is subscribed, does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attributes", "_start", "_wall")
+
+    def __init__(self, name: str, attributes: dict) -> None:
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        record = SpanRecord(
+            self.name,
+            seconds,
+            self._wall,
+            exc_type.__name__ if exc_type is not None else None,
+            self.attributes or None,
+        )
+        for sink in _sinks:
+            try:
+                sink(record)
+            except Exception:
+                # A failing sink must not break the instrumented code
+                pass
+        return False
+
+
+def span(name: str, **attributes):
+    """Context manager timing the stage `name` and reporting it to the subscribed sinks.
+    While no sink is subscribed a shared no-op span is returned, so instrumented code pays for one function call only.
+
+    Usage:
+        with span("pdf.extract_text", page=3):
+            ...
+
+    Args:
+        name (str): Name of the stage.
+        **attributes: Details passed on in `SpanRecord.attributes`.
+    """
+    if not _sinks:
+        return _null_span
+    return _Span(name, attributes)
+
+
+def add_sink(sink):
+    """Subscribe a sink: any callable taking a `SpanRecord`, e.g. a function, `LoggingSink` or `SpanAggregator`. Returns the sink."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = _sinks + (sink,)
+    return sink
+
+
+def remove_sink(sink):
+    """Unsubscribe the sink; unknown sinks are ignored."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = tuple(s for s in _sinks if s is not sink)
+
+
+def get_sinks() -> tuple:
+    """The subscribed sinks."""
+    return _sinks
+
+
+class subscribed:
+    """Context manager subscribing the sink for the duration of the block.
+
+    Usage:
+        with subscribed(SpanAggregator()) as aggregator:
+            pdf_to_ris(pdf_path)
+        print(aggregator.stats())
+    """
+
+    def __init__(self, sink) -> None:
+        self.sink = sink
+
+    def __enter__(self):
+        return add_sink(self.sink)
+
+    def __exit__(self, *exc):
+        remove_sink(self.sink)
+        return False
+
+
+class LoggingSink:
+    """Sink writing one log message per span to a `logging` logger."""
+
+    def __init__(self, logger=None, level: int = 10) -> None:
+        """
+        Args:
+            logger (logging.Logger | str, optional): Logger or its name. Defaults to "scientific_citing.spans".
+            level (int, optional): Level of the messages. Defaults to 10 (DEBUG).
+        """
+        import logging
+
+        if logger is None or isinstance(logger, str):
+            logger = logging.getLogger(logger or "scientific_citing.spans")
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, record: SpanRecord):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        details = "".join(
+            f" {key}={value!r}" for key, value in (record.attributes or {}).items()
+        )
+        error = f" error={record.error}" if record.error else ""
+        self.logger.log(
+            self.level,
+            "%s %.3f ms%s%s",
+            record.name,
+            record.seconds * 1000,
+            error,
+            details,
+        )
+
+
+class SpanAggregator:
+    """Thread-safe sink collecting counts, totals and percentiles per span name.
+    Durations are kept in a uniform reservoir sample of at most `max_samples` per name, so memory stays bounded for long running services.
+    """
+
+    def __init__(self, max_samples: int = 10_000) -> None:
+        """
+        Args:
+            max_samples (int, optional): Maximum number of durations kept per name for the percentiles. Defaults to 10_000.
+        """
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._data = {}
+        self._random = random.Random(0)
+
+    def __call__(self, record: SpanRecord):
+        with self._lock:
+            data = self._data.get(record.name)
+            if data is None:
+                data = self._data[record.name] = {
+                    "count": 0,
+                    "errors": 0,
+                    "total": 0.0,
+                    "min": record.seconds,
+                    "max": record.seconds,
+                    "samples": [],
+                }
+            data["count"] += 1
+            data["total"] += record.seconds
+            if record.error is not None:
+                data["errors"] += 1
+            if record.seconds < data["min"]:
+                data["min"] = record.seconds
+            if record.seconds > data["max"]:
+                data["max"] = record.seconds
+            samples = data["samples"]
+            if len(samples) < self.max_samples:
+                samples.append(record.seconds)
+            else:
+                i = self._random.randrange(data["count"])
+                if i < self.max_samples:
+                    samples[i] = record.seconds
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self, percentiles=(50, 90, 99)) -> dict:
+        """Statistics per span name in seconds.
+
+        Args:
+            percentiles (tuple, optional): Percentiles to compute. Defaults to (50, 90, 99).
+
+        Returns:
+            dict: Name to 'count', 'errors', 'total', 'mean', 'min', 'max' and 'p<percentile>'.
+        """
+        with self._lock:
+            data = {
+                name: dict(d, samples=sorted(d["samples"]))
+                for name, d in self._data.items()
+            }
+        stats = {}
+        for name, d in data.items():
+            samples = d.pop("samples")
+            d["mean"] = d["total"] / d["count"]
+            for p in percentiles:
+                i = min(len(samples) - 1, round(p / 100 * (len(samples) - 1)))
+                d[f"p{p}"] = samples[i]
+            stats[name] = d
+        return stats
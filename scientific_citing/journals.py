@@ -0,0 +1,294 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import NamedTuple
+
+from .ris import journal_abbreviations_by_CASSI
+
+_non_word_pattern = re.compile(r"[^a-z0-9]+")
+_qualifier_pattern = re.compile(r"\s*\([^)]*\)\s*$")
+
+
+def normalize_journal_name(name: str) -> str:
+    """Key for comparing journal names: lower case, no accents, '&' as 'and', punctuation removed and a leading 'The' dropped.
+    Example: 'The Journal of Physical Chemistry. A' -> 'journal of physical chemistry a'
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    name = name.replace("&", " and ")
+    name = _non_word_pattern.sub(" ", name).strip()
+    if name.startswith("the "):
+        name = name[4:]
+    return name
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+_stop_words = frozenset(("of", "the", "and", "for", "in", "on"))
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Whether a single insertion, deletion or substitution turns a into b."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1 :] == b[i + 1 :]
+    return a[i:] == b[i + 1 :]
+
+
+def _same_words(key: str, candidate: str) -> bool:
+    """Whether two normalized names have the same words apart from stop words and single typos in words of at least 5 characters.
+    Trigram similarity alone matches different journals such as 'journal of inorganic chemistry' and 'journal of organic chemistry'
+    or the sections 'a' and 'd' of a journal, this rejects them."""
+    words = [word for word in key.split() if word not in _stop_words]
+    candidate_words = [word for word in candidate.split() if word not in _stop_words]
+    if len(words) != len(candidate_words):
+        return False
+    for word, candidate_word in zip(words, candidate_words):
+        if word != candidate_word and (
+            min(len(word), len(candidate_word)) < 5
+            or not _within_one_edit(word, candidate_word)
+        ):
+            return False
+    return True
+
+
+class JournalIndex:
+    """Index over journal abbreviations such as `journal_abbreviations_by_CASSI`.
+    Names are looked up by their normalized key in O(1); names without an exact match can fall back to a trigram index and match if the similarity reaches `threshold`
+    and the names have the same words apart from stop words and single typos, so different journals with similar names do not match.
+    Already abbreviated names map to themselves and names qualified in parentheses also match without the qualifier. Results are memoized.
+    """
+
+    def __init__(
+        self,
+        abbreviations: dict = None,
+        threshold: float = 0.85,
+        memo_size: int = 65536,
+    ) -> None:
+        """
+        Args:
+            abbreviations (dict, optional): Full journal name to abbreviation. Defaults to `journal_abbreviations_by_CASSI`.
+            threshold (float, optional): Minimum Dice similarity of the trigrams for a fuzzy match. Defaults to 0.85.
+            memo_size (int, optional): Maximum number of memoized lookups. Defaults to 65536.
+        """
+        if abbreviations is None:
+            abbreviations = journal_abbreviations_by_CASSI
+        self.threshold = threshold
+        self.memo_size = memo_size
+        self._memo = {}
+        self._exact = {}
+        for name, abbreviation in abbreviations.items():
+            self._exact.setdefault(normalize_journal_name(abbreviation), abbreviation)
+            # Names qualified by the place of publication, e.g. 'Nature (London, United Kingdom)', also match without it
+            unqualified = _qualifier_pattern.sub("", name)
+            if unqualified != name:
+                self._exact.setdefault(
+                    normalize_journal_name(unqualified), abbreviation
+                )
+        for name, abbreviation in abbreviations.items():
+            self._exact[normalize_journal_name(name)] = abbreviation
+        self._keys = list(self._exact)
+        self._key_trigrams = [len(_trigrams(key)) for key in self._keys]
+        self._postings = {}
+        for i, key in enumerate(self._keys):
+            for trigram in _trigrams(key):
+                self._postings.setdefault(trigram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def exact(self, name: str):
+        """Abbreviation of the journal by its normalized name or None."""
+        return self._exact.get(normalize_journal_name(name))
+
+    def fuzzy(self, name: str):
+        """Best fuzzy match as (abbreviation, score) or (None, score) if no candidate reaches the threshold."""
+        return self._fuzzy_key(normalize_journal_name(name))
+
+    def _fuzzy_key(self, key: str):
+        trigrams = _trigrams(key)
+        counts = Counter()
+        for trigram in trigrams:
+            counts.update(self._postings.get(trigram, ()))
+        return self._best_match(key, len(trigrams), counts)
+
+    def _best_match(self, key: str, number_of_trigrams: int, counts: Counter):
+        """(abbreviation, score) of the key sharing the most trigrams relative to its size among the keys with the same words, see `fuzzy`."""
+        best_score = 0.0
+        candidates = []
+        for i, shared in counts.items():
+            score = 2 * shared / (number_of_trigrams + self._key_trigrams[i])
+            best_score = max(best_score, score)
+            if score >= self.threshold:
+                candidates.append((score, i))
+        for score, i in sorted(candidates, reverse=True):
+            if _same_words(key, self._keys[i]):
+                return self._exact[self._keys[i]], score
+        return None, best_score
+
+    def fuzzy_many(self, names) -> list:
+        """Fuzzy matches for many names in one pass over the trigram index; each posting list is read once for the whole batch.
+
+        Args:
+            names (Iterable[str]): Journal names.
+
+        Returns:
+            list[tuple[str | None, float]]: (abbreviation, score) per name, see `fuzzy`.
+        """
+        keys = [normalize_journal_name(name) for name in names]
+        key_trigrams = [_trigrams(key) for key in keys]
+        by_trigram = {}
+        for n, trigrams in enumerate(key_trigrams):
+            for trigram in trigrams:
+                by_trigram.setdefault(trigram, []).append(n)
+        counts = [Counter() for key in keys]
+        for trigram, queries in by_trigram.items():
+            postings = self._postings.get(trigram)
+            if postings is None:
+                continue
+            for n in queries:
+                counts[n].update(postings)
+        return [
+            self._best_match(keys[n], len(trigrams), counts[n])
+            for n, trigrams in enumerate(key_trigrams)
+        ]
+
+    def abbreviate(self, name: str, fuzzy: bool = False):
+        """Abbreviation of the journal or None.
+
+        Args:
+            name (str): Journal name, full or abbreviated.
+            fuzzy (bool, optional): Fall back to the trigram index if there is no exact match. Defaults to False.
+
+        Returns:
+            str | None: Abbreviation
+        """
+        memo_key = (name, fuzzy)
+        try:
+            return self._memo[memo_key]
+        except KeyError:
+            pass
+        key = normalize_journal_name(name)
+        abbreviation = self._exact.get(key)
+        if abbreviation is None and fuzzy and key:
+            abbreviation = self._fuzzy_key(key)[0]
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[memo_key] = abbreviation
+        return abbreviation
+
+
+_journal_index = None
+
+
+def get_journal_index() -> JournalIndex:
+    """The index over `journal_abbreviations_by_CASSI`, built on first use."""
+    global _journal_index
+    if _journal_index is None:
+        _journal_index = JournalIndex()
+    return _journal_index
+
+
+def abbreviate_journal(name: str, fuzzy: bool = False) -> str:
+    """Abbreviation of the journal by CASSI, or the name itself if it is unknown; `fuzzy` also accepts close matches, see `JournalIndex`."""
+    return get_journal_index().abbreviate(name, fuzzy) or name
+
+
+class AbbreviationReport(NamedTuple):
+    """Outcome of `abbreviate_journals`."""
+
+    references: int
+    "Number of references with a journal name"
+    distinct: int
+    "Number of distinct journal names"
+    resolved: dict
+    "Journal name to abbreviation for every resolved name"
+    fuzzy: dict
+    "Journal name to (abbreviation, score) for names resolved by fuzzy matching"
+    unresolved: dict
+    "Journal name to number of references for every unresolved name"
+
+
+_journal_types = ("JOUR", "JFULL", "EJOUR", "MGZN", "INPR")
+"Types of reference whose secondary title (T2) is a journal name"
+
+
+def _journal_name(reference):
+    name = reference.get("JF") or reference.get("JO")
+    if not name and reference.get("TY") in _journal_types:
+        name = reference.get("T2")
+    if isinstance(name, list):
+        name = name[0]
+    return name or None
+
+
+def abbreviate_journals(
+    references,
+    index: JournalIndex = None,
+    fuzzy: bool = False,
+    tag: str = "JA",
+    overwrite: bool = False,
+) -> AbbreviationReport:
+    """Abbreviate the journal names of a whole library in place.
+    Every distinct name is resolved once, exact matches first and then all misses in a single fuzzy pass, so the cost grows with the number of distinct journals rather than references.
+
+    Args:
+        references (Iterable[Reference | dict | RIS]): References, RIS objects contribute all their references.
+        index (JournalIndex, optional): Index to resolve the names with. Defaults to the one of `get_journal_index`.
+        fuzzy (bool, optional): Resolve names without exact match by fuzzy matching. Defaults to False.
+        tag (str, optional): Tag the abbreviation is written to. Defaults to "JA" (periodical name: standard abbreviation), which the styles use when they abbreviate journal names.
+        overwrite (bool, optional): Overwrite existing values of `tag`. Defaults to False.
+
+    Returns:
+        AbbreviationReport: Counts, resolved and unresolved names.
+    """
+    if index is None:
+        index = get_journal_index()
+
+    by_name = {}
+    for reference in references:
+        for entry in getattr(reference, "references", (reference,)):
+            name = _journal_name(entry)
+            if name is not None:
+                by_name.setdefault(name, []).append(entry)
+
+    resolved = {}
+    misses = []
+    for name in by_name:
+        abbreviation = index.exact(name)
+        if abbreviation is None:
+            misses.append(name)
+        else:
+            resolved[name] = abbreviation
+    fuzzy_resolved = {}
+    if fuzzy and misses:
+        for name, (abbreviation, score) in zip(misses, index.fuzzy_many(misses)):
+            if abbreviation is not None:
+                resolved[name] = abbreviation
+                fuzzy_resolved[name] = (abbreviation, score)
+
+    for name, abbreviation in resolved.items():
+        for entry in by_name[name]:
+            if overwrite or not entry.get(tag):
+                entry[tag] = abbreviation
+
+    return AbbreviationReport(
+        references=sum(len(entries) for entries in by_name.values()),
+        distinct=len(by_name),
+        resolved=resolved,
+        fuzzy=fuzzy_resolved,
+        unresolved={
+            name: len(entries)
+            for name, entries in by_name.items()
+            if name not in resolved
+        },
+    )
@@ -0,0 +1,204 @@
+import gzip
+import json
+import os
+import threading
+
+from .crossref import normalize_doi
+
+
+def _open_lines(path: str):
+    """Binary line iterator of a JSON-lines file, gzipped if the name ends with '.gz'."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _work_of(record: dict):
+    """The work of a line of the dump: either the work itself or an API response with the work as 'message'."""
+    if "message" in record and isinstance(record["message"], dict):
+        return record["message"]
+    return record
+
+
+class CrossrefSnapshot:
+    """Offline source of Crossref works from a local JSON-lines dump (one work or API response per line, optionally gzipped).
+    On first use an index of the byte offset of every DOI is built in an SQLite file next to the dump.
+    Gzipped dumps are decompressed once into a data file beside the index, so every lookup is a single positioned read.
+    Use it as `resolver` of `doi_to_ris`, `dois_to_ris`, `pdf_to_ris` or `ingest_directory` to work without network access.
+    """
+
+    def __init__(
+        self, dump_path: str, index_path: str = None, rebuild: bool = False
+    ) -> None:
+        """
+        Args:
+            dump_path (str): JSON-lines dump, '.gz' for a gzipped one.
+            index_path (str, optional): SQLite file of the index. Defaults to None (dump path + '.index.sqlite').
+            rebuild (bool, optional): Rebuild the index even if it is up to date. Defaults to False.
+        """
+        import sqlite3
+
+        self.dump_path = dump_path
+        self.index_path = index_path or dump_path + ".index.sqlite"
+        if dump_path.endswith(".gz"):
+            self.data_path = self.index_path + ".data"
+        else:
+            self.data_path = dump_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.index_path, timeout=30, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._fd = None
+        if rebuild or not self._up_to_date():
+            self.build()
+        else:
+            self._open_data()
+
+    def _open_data(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.data_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+
+    def _source_signature(self) -> str:
+        stat = os.stat(self.dump_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _up_to_date(self) -> bool:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'source'"
+        ).fetchone()
+        return (
+            row is not None
+            and row[0] == self._source_signature()
+            and os.path.exists(self.data_path)
+        )
+
+    def build(self, batch_size: int = 50_000) -> int:
+        """Index (and for gzipped dumps decompress) the dump.
+
+        Args:
+            batch_size (int, optional): Number of DOIs inserted per statement batch. Defaults to 50_000.
+
+        Returns:
+            int: Number of indexed works
+        """
+        connection = self._connection
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        with connection:
+            connection.execute("DROP TABLE IF EXISTS works")
+            connection.execute(
+                "CREATE TABLE works (doi TEXT PRIMARY KEY, offset INTEGER, length INTEGER) WITHOUT ROWID"
+            )
+            connection.execute("DELETE FROM meta")
+
+        copy = self.data_path != self.dump_path
+        data = open(self.data_path + ".tmp", "wb") if copy else None
+        count = 0
+        batch = []
+        offset = 0
+        try:
+            with _open_lines(self.dump_path) as lines:
+                for line in lines:
+                    length = len(line)
+                    stripped = line.strip()
+                    if stripped:
+                        try:
+                            work = _work_of(json.loads(stripped))
+                            doi = work.get("DOI")
+                        except (ValueError, AttributeError):
+                            doi = None
+                        if doi:
+                            batch.append((normalize_doi(doi), offset, length))
+                            if len(batch) >= batch_size:
+                                count += self._insert(batch)
+                                batch = []
+                    if data is not None:
+                        data.write(line)
+                    offset += length
+            count += self._insert(batch)
+        finally:
+            if data is not None:
+                data.close()
+        if copy:
+            os.replace(self.data_path + ".tmp", self.data_path)
+        with connection:
+            connection.execute(
+                "INSERT INTO meta VALUES ('source', ?)", (self._source_signature(),)
+            )
+        connection.execute("PRAGMA journal_mode = DELETE")
+        connection.execute("PRAGMA synchronous = FULL")
+        self._open_data()
+        return count
+
+    def _insert(self, batch: list) -> int:
+        with self._connection:
+            # Later lines of the same DOI replace earlier ones, as in an updated dump
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO works VALUES (?, ?, ?)", batch
+            )
+        return len(batch)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+    def __contains__(self, doi: str) -> bool:
+        return self._locate(doi) is not None
+
+    def _locate(self, doi: str):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT offset, length FROM works WHERE doi = ?", (normalize_doi(doi),)
+            ).fetchone()
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(self._fd, length, offset)
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, length)
+
+    def fetch_work(self, doi: str, cache=True):
+        """Get the work of the DOI from the dump, see `CrossrefClient.fetch_work`.
+
+        Args:
+            doi (str): DOI
+            cache (optional): Ignored, lookups are local already.
+
+        Returns:
+            dict | None: The work or None if the DOI is not in the dump.
+        """
+        location = self._locate(doi)
+        if location is None:
+            return None
+        return _work_of(json.loads(self._read(*location)))
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def open_snapshot(dump_path: str, index_path: str = None) -> CrossrefSnapshot:
+    """The `CrossrefSnapshot` of the dump, opened (and indexed if needed) once per process."""
+    key = (os.path.abspath(dump_path), index_path)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None:
+            snapshot = _snapshots[key] = CrossrefSnapshot(dump_path, index_path)
+        return snapshot
@@ -0,0 +1,610 @@
+import mmap
+import re
+import sys
+import time
+from typing import NamedTuple
+from urllib.parse import unquote_to_bytes
+
+from .instrumentation import span
+from .pdf_cache import PdfCache
+
+
+def _PyPDF2():
+    """PyPDF2, imported on first use."""
+    import logging
+
+    import PyPDF2
+
+    # Set the logging level to ERROR
+    logging.getLogger("PyPDF2").setLevel(logging.ERROR)
+    return PyPDF2
+
+
+# Regular expression to find DOIs (may not capture all DOI formats)
+doi_pattern = re.compile(r"\b(10\.\d{4,9}/[-._;()/:a-zA-Z0-9]*)\b")
+# The same for the raw text of content streams and link annotations
+doi_bytes_pattern = re.compile(doi_pattern.pattern.encode())
+# Heading of a reference list on a line of its own; DOIs after it are cited works, not the DOI of the document
+references_heading_pattern = re.compile(
+    r"^[ \t]*(?:\d+\.?[ \t]*)?(?:References(?: and Notes)?|Notes and References|Bibliography|Literature Cited|Works Cited)[ \t:]*$",
+    re.I | re.M,
+)
+# The same for the raw text of content streams
+references_heading_bytes_pattern = re.compile(
+    references_heading_pattern.pattern.encode(), re.I | re.M
+)
+
+# Tokens of a content stream relevant for its text: literal strings (with one level of nested parentheses), hex strings,
+# numbers (kerning inside TJ arrays), array brackets, the next line text-show operators and the text positioning operators
+_content_token_pattern = re.compile(
+    rb"\(((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*)\)"
+    rb"|<([0-9A-Fa-f\s]*)>"
+    rb"|(-?(?:\d+\.?\d*|\.\d+))"
+    rb"|([\[\]'\"])"
+    rb"|(T[dDm*]|ET)(?![A-Za-z])",
+    re.S,
+)
+_escape_pattern = re.compile(rb"\\([0-7]{1,3}|\r\n|.)", re.S)
+_escapes = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+# Line breaks inside a DOI: after a slash, after a '-' or '_' or before a '.', '-' or '_' followed by more DOI characters,
+# and after a '.' only if the next line starts with a word containing a digit that does not end a sentence itself,
+# so a DOI at the end of a sentence is not joined with the next line ('10.1021/jacs.5b01234.' + 'The ...' or '2. Results')
+_doi_line_break_pattern = re.compile(
+    rb"(?<=/)\n(?=[0-9A-Za-z])"
+    rb"|(?<=[0-9A-Za-z][-_])\n(?=[0-9A-Za-z])"
+    rb"|(?<=[0-9a-z]\.)\n(?=[0-9a-z]*[0-9][0-9a-z]*(?![0-9A-Za-z])(?!\.(?:\s|\Z)))"
+    rb"|(?<=[0-9a-z])\n(?=[-._][0-9a-z])"
+)
+
+# Regular expression for common title patterns
+title_pattern = re.compile(
+    r"(?:\bTitle\b\s*:\s*(.*?)(?:\n|$))|" r"(?:^Title\s*\n(.*?)(?:\n|$))",
+    re.I | re.DOTALL,
+)
+
+DEFAULT_FIRST_PAGES = 2
+"Number of leading pages scanned for the first DOI"
+DEFAULT_LAST_PAGES = 1
+"Number of trailing pages scanned for the first DOI after the leading pages"
+
+EXTRACTION_VERSION = 3
+"Version of the extraction logic; increase it whenever extraction results change so cached results are not reused"
+
+_pdf_cache = None
+"Cache consulted by default; caching is off until `set_pdf_cache` is called"
+
+
+class PdfMemoryLimitError(MemoryError):
+    """Raised when the analysis of a PDF needs more memory than its `memory_limit`."""
+
+
+def _resident_memory():
+    """Private resident memory of the process in bytes (resident minus file-backed and shared pages, so the pages of a memory-mapped PDF do not count),
+    the peak resident memory where only that is available, or None if it cannot be measured.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            fields = f.read().split()
+        return (int(fields[1]) - int(fields[2])) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def set_pdf_cache(cache=True):
+    """Set the cache consulted by `PdfAnalysis` and the extractors by default.
+
+    Args:
+        cache (PdfCache | str | bool, optional): Cache, path of the cache database, True for the default location or None/False to disable caching. Defaults to True.
+
+    Returns:
+        PdfCache | None: The cache now in use.
+    """
+    global _pdf_cache
+    if cache is True:
+        cache = PdfCache()
+    elif isinstance(cache, str):
+        cache = PdfCache(cache)
+    elif cache is False:
+        cache = None
+    _pdf_cache = cache
+    return cache
+
+
+def get_pdf_cache():
+    """The cache consulted by default or None if caching is disabled."""
+    return _pdf_cache
+
+
+class DoiMatch(NamedTuple):
+    """DOI found in a PDF together with its source: 'info' (document Info dictionary), 'xmp' (XMP metadata) or 'page' (text or content streams of page `page`)."""
+
+    doi: str
+    source: str
+    page: int = None
+
+
+def _page_budget(number_of_pages: int, first_pages: int, last_pages: int) -> list:
+    """Page numbers to scan: the first `first_pages` pages followed by the last `last_pages` pages. `first_pages=None` means all pages."""
+    if first_pages is None:
+        return list(range(number_of_pages))
+    pages = list(range(min(first_pages, number_of_pages)))
+    for page_num in range(max(number_of_pages - (last_pages or 0), 0), number_of_pages):
+        if page_num not in pages:
+            pages.append(page_num)
+    return pages
+
+
+def _unescape(match) -> bytes:
+    escaped = match.group(1)
+    if escaped[:1].isdigit():
+        return bytes((int(escaped, 8) & 0xFF,))
+    if escaped in (b"\n", b"\r", b"\r\n"):
+        return b""
+    return _escapes.get(escaped, escaped)
+
+
+def _content_text(data: bytes) -> bytes:
+    """Shown text of a decoded content stream without interpreting the fonts, one line per text positioning operator.
+    The strings of a TJ array and of consecutive text-show operators are joined, large kerning steps become spaces.
+    """
+    lines = []
+    line = []
+    in_array = False
+    for (
+        string,
+        hex_string,
+        number,
+        delimiter,
+        operator,
+    ) in _content_token_pattern.findall(data):
+        if string:
+            line.append(
+                _escape_pattern.sub(_unescape, string) if b"\\" in string else string
+            )
+        elif hex_string:
+            hex_string = b"".join(hex_string.split())
+            try:
+                line.append(
+                    bytes.fromhex((hex_string + b"0" * (len(hex_string) % 2)).decode())
+                )
+            except ValueError:
+                pass
+        elif number:
+            if in_array and float(number) <= -200:
+                line.append(b" ")
+        elif delimiter == b"[":
+            in_array = True
+        elif delimiter == b"]":
+            in_array = False
+        elif delimiter:
+            # ' and " move to the next line before they show their string
+            string = line.pop() if line else None
+            if line:
+                lines.append(b"".join(line))
+            line = [string] if string else []
+        elif operator and line:
+            lines.append(b"".join(line))
+            line = []
+    if line:
+        lines.append(b"".join(line))
+    return b"\n".join(lines)
+
+
+def _annotation_uris(page) -> list:
+    """Percent-decoded URIs of the link annotations of the page."""
+    uris = []
+    annotations = page.get("/Annots")
+    if annotations is None:
+        return uris
+    for annotation in annotations.getObject():
+        action = annotation.getObject().get("/A")
+        if action is None:
+            continue
+        uri = action.getObject().get("/URI")
+        if uri:
+            if not isinstance(uri, bytes):
+                uri = str(uri).encode("latin-1", "replace")
+            uris.append(unquote_to_bytes(uri))
+    return uris
+
+
+def _doi_of(found) -> str:
+    doi = found.group()
+    return doi if isinstance(doi, str) else doi.decode("ascii")
+
+
+class PdfAnalysis:
+    """Parse a PDF once and serve the first DOI, all DOIs and the title from the shared state.
+    The file is opened on first use and the text of each page is extracted at most once, on demand.
+    With `raw_scan` DOIs are searched in the inflated content streams and link annotations of the pages first,
+    which is much cheaper than extracting the text; the text is only extracted if nothing is found there.
+    The file is memory-mapped, so its bytes live in the page cache of the OS instead of the heap. For very large documents
+    `low_memory` drops the parsed objects and the text of each page once it has been scanned and `memory_limit` aborts the analysis with
+    `PdfMemoryLimitError` when the private memory of the process (the heap, not the mapped file) grows by more than the limit.
+
+    Usage:
+        with PdfAnalysis(pdf_path) as analysis:
+            doi = analysis.first_doi
+            title = analysis.title
+    """
+
+    def __init__(
+        self,
+        pdf_path: str,
+        cache: PdfCache = True,
+        raw_scan: bool = False,
+        use_mmap: bool = True,
+        memory_limit: int = None,
+        low_memory: bool = None,
+    ) -> None:
+        """
+        Args:
+            pdf_path (str): Path to the PDF.
+            cache (PdfCache, optional): Cache of extraction results, True for the one set by `set_pdf_cache`, None for no cache. Defaults to True.
+            raw_scan (bool, optional): Search DOIs in the raw content streams and link annotations before extracting the text. Defaults to False.
+            use_mmap (bool, optional): Read the PDF through a read-only memory map of the file. Defaults to True.
+            memory_limit (int, optional): Maximum growth of the private resident memory of the process in bytes while the PDF is open; pages of the mapped file do not count. Defaults to None (no limit).
+            low_memory (bool, optional): Keep neither parsed page objects nor page texts after a page was scanned; results that need a page again extract it again. Defaults to None (True if there is a memory limit).
+        """
+        self.pdf_path = pdf_path
+        self.cache = get_pdf_cache() if cache is True else cache
+        self.raw_scan = raw_scan
+        self.use_mmap = use_mmap
+        self.memory_limit = memory_limit
+        self.low_memory = memory_limit is not None if low_memory is None else low_memory
+        self._memory_baseline = None
+        self._file = None
+        self._mmap = None
+        self._reader = None
+        self._number_of_pages = None
+        self._page_texts = {}
+        "Extracted text by page number"
+        self._page_raw_texts = {}
+        "Raw text of the content streams and link annotations by page number"
+        self._results = {}
+        "Computed results by name ('dois', 'doi_offsets', 'title', 'first_doi:<first_pages>:<last_pages>', 'raw_' + name and name + ':raw' with `raw_scan`)"
+        self._cache_loaded = False
+        self._new_results = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the underlying file and store new results in the cache. Already extracted text and results stay available."""
+        if self.cache is not None and self._new_results:
+            self.cache.put(
+                self.pdf_path,
+                {name: self._results[name] for name in self._new_results},
+                EXTRACTION_VERSION,
+            )
+            self._new_results.clear()
+        self._reader = None
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._mmap = None
+
+    @property
+    def reader(self) -> "PyPDF2.PdfFileReader":
+        if self._reader is None:
+            with span("pdf.open", path=self.pdf_path):
+                if self.memory_limit is not None:
+                    self._memory_baseline = _resident_memory()
+                self._file = stream = open(self.pdf_path, "rb")
+                if self.use_mmap:
+                    try:
+                        self._mmap = stream = mmap.mmap(
+                            self._file.fileno(), 0, access=mmap.ACCESS_READ
+                        )
+                    except (OSError, ValueError):
+                        # Empty files and files that are not regular cannot be mapped
+                        pass
+                self._reader = _PyPDF2().PdfFileReader(stream)
+            self._check_memory()
+        return self._reader
+
+    def _check_memory(self):
+        """Raise `PdfMemoryLimitError` if the private resident memory grew by more than `memory_limit` since the PDF was opened."""
+        if self._memory_baseline is None:
+            return
+        used = _resident_memory() - self._memory_baseline
+        if used > self.memory_limit:
+            self._release_objects()
+            self._page_texts.clear()
+            self._page_raw_texts.clear()
+            raise PdfMemoryLimitError(
+                f"{self.pdf_path}: memory grew by {used} bytes, more than the limit of {self.memory_limit} bytes"
+            )
+
+    def _release_objects(self):
+        """Drop the objects PyPDF2 resolved so far (page contents, fonts, decoded streams) so memory does not grow with the number of scanned pages."""
+        for name in ("resolved_objects", "resolvedObjects"):
+            objects = getattr(self._reader, name, None)
+            if objects is not None:
+                objects.clear()
+                return
+
+    @property
+    def number_of_pages(self) -> int:
+        if self._number_of_pages is None:
+            self._number_of_pages = self.reader.numPages
+        return self._number_of_pages
+
+    def page_text(self, page_num: int) -> str:
+        """Text of the page, extracted on first request only (on every request with `low_memory`)."""
+        try:
+            return self._page_texts[page_num]
+        except KeyError:
+            reader = self.reader
+            with span("pdf.extract_text", path=self.pdf_path, page=page_num):
+                text = reader.getPage(page_num).extractText()
+            self._check_memory()
+            if self.low_memory:
+                self._release_objects()
+            else:
+                self._page_texts[page_num] = text
+            return text
+
+    def page_raw_text(self, page_num: int) -> bytes:
+        """Text shown by the inflated content streams of the page and the URIs of its link annotations, without interpreting the fonts.
+        One line per text line with line breaks inside DOIs removed. Read on first request only (on every request with `low_memory`), empty if the streams cannot be decoded.
+        """
+        try:
+            return self._page_raw_texts[page_num]
+        except KeyError:
+            reader = self.reader
+            with span("pdf.raw_text", path=self.pdf_path, page=page_num):
+                try:
+                    page = reader.getPage(page_num)
+                    chunks = []
+                    contents = page.get("/Contents")
+                    if contents is not None:
+                        contents = contents.getObject()
+                        streams = contents if isinstance(contents, list) else [contents]
+                        chunks.append(
+                            _content_text(
+                                b"\n".join(
+                                    stream.getObject().getData() for stream in streams
+                                )
+                            )
+                        )
+                    chunks.extend(_annotation_uris(page))
+                    text = _doi_line_break_pattern.sub(b"", b"\n".join(chunks))
+                except Exception:
+                    text = b""
+            self._check_memory()
+            if self.low_memory:
+                self._release_objects()
+            else:
+                self._page_raw_texts[page_num] = text
+            return text
+
+    def _cached(self, name: str) -> bool:
+        """Whether the result is known, consulting the cache on first use."""
+        if not self._cache_loaded:
+            self._cache_loaded = True
+            if self.cache is not None:
+                self._results.update(
+                    self.cache.get(self.pdf_path, EXTRACTION_VERSION) or {}
+                )
+        return name in self._results
+
+    def _store(self, name: str, value):
+        self._results[name] = value
+        self._new_results.add(name)
+
+    def iter_page_texts(self):
+        """Yield `(page_num, text)` for every page in order."""
+        for page_num in range(self.number_of_pages):
+            yield page_num, self.page_text(page_num)
+
+    def info_doi(self):
+        """DOI from the document Info dictionary or None."""
+        try:
+            info = self.reader.getDocumentInfo() or {}
+            values = [str(v) for v in info.values()]
+        except Exception:
+            return None
+        for value in values:
+            match = doi_pattern.search(value)
+            if match:
+                return match.group()
+        return None
+
+    def xmp_doi(self):
+        """DOI from the XMP metadata stream or None."""
+        try:
+            metadata = self.reader.trailer["/Root"].getObject().get("/Metadata")
+            if metadata is None:
+                return None
+            xmp = metadata.getObject().getData().decode("utf-8", "replace")
+        except Exception:
+            return None
+        match = doi_pattern.search(xmp)
+        return match.group() if match else None
+
+    def find_first_doi(
+        self,
+        first_pages: int = DEFAULT_FIRST_PAGES,
+        last_pages: int = DEFAULT_LAST_PAGES,
+        time_budget: float = None,
+    ):
+        """Find the first DOI, checking the cheapest sources first: the document Info dictionary, the XMP metadata and then the text of a limited number of pages.
+
+        With `raw_scan` the pages are scanned in their raw form first and their text is only extracted if no DOI is found.
+        DOIs after a reference list heading (and on the pages following it) are cited works. If the page budget only finds a reference list,
+        the pages before it are scanned in order as well; the first cited DOI is only returned if no other DOI is found.
+
+        Args:
+            first_pages (int, optional): Number of leading pages to scan. None scans all pages in order, e.g. for documents with the DOI on a middle page. Defaults to DEFAULT_FIRST_PAGES.
+            last_pages (int, optional): Number of trailing pages to scan after the leading ones. Defaults to DEFAULT_LAST_PAGES.
+            time_budget (float, optional): Seconds after which no further page is extracted. Defaults to None.
+
+        Returns:
+            DoiMatch | None: DOI and where it was found or None
+        """
+        key = f"first_doi:{first_pages}:{last_pages}" + (
+            ":raw" if self.raw_scan else ""
+        )
+        if self._cached(key):
+            match = self._results[key]
+            return DoiMatch(*match) if match else None
+
+        start = time.monotonic()
+        exhausted = False
+        match = None
+        doi = self.info_doi()
+        if doi:
+            match = DoiMatch(doi, "info")
+        else:
+            doi = self.xmp_doi()
+            if doi:
+                match = DoiMatch(doi, "xmp")
+        if match is None:
+            pages = _page_budget(self.number_of_pages, first_pages, last_pages)
+            cited = None
+            for get_text, texts, pattern, heading_pattern in self._scans():
+                references_page = None
+                scan = list(pages)
+                for page_num in scan:
+                    if (
+                        time_budget is not None
+                        and page_num not in texts
+                        and time.monotonic() - start > time_budget
+                    ):
+                        exhausted = True
+                        break
+                    text = get_text(page_num)
+                    with span("pdf.search", path=self.pdf_path, page=page_num):
+                        end = len(text)
+                        if references_page is not None and page_num > references_page:
+                            end = 0
+                        else:
+                            heading = heading_pattern.search(text)
+                            if heading:
+                                references_page = page_num
+                                end = heading.start()
+                        found = pattern.search(text, 0, end)
+                        if found is None and cited is None:
+                            cited = pattern.search(text, end)
+                            if cited:
+                                cited = DoiMatch(_doi_of(cited), "page", page_num)
+                    if found:
+                        match = DoiMatch(_doi_of(found), "page", page_num)
+                        break
+                    if page_num == scan[-1] and references_page is not None:
+                        # Only the reference list so far: read on in page order up to it instead of taking a cited DOI
+                        scan.extend(p for p in range(references_page) if p not in scan)
+                if match is not None or exhausted:
+                    break
+            if match is None:
+                match = cited
+
+        if not exhausted:
+            self._store(key, match)
+        return match
+
+    @property
+    def first_doi(self):
+        """First DOI found by `find_first_doi` with the default page budget or None."""
+        match = self.find_first_doi()
+        return match.doi if match else None
+
+    def _scans(self) -> list:
+        """`(get_text, texts, pattern, heading_pattern)` of the page representations to search in turn: the raw text with `raw_scan`, then the extracted text."""
+        scans = [
+            (
+                self.page_text,
+                self._page_texts,
+                doi_pattern,
+                references_heading_pattern,
+            )
+        ]
+        if self.raw_scan:
+            scans.insert(
+                0,
+                (
+                    self.page_raw_text,
+                    self._page_raw_texts,
+                    doi_bytes_pattern,
+                    references_heading_bytes_pattern,
+                ),
+            )
+        return scans
+
+    @property
+    def dois(self) -> list:
+        """Unique DOIs of the whole document in order of appearance."""
+        prefix = "raw_" if self.raw_scan else ""
+        if not self._cached(prefix + "dois"):
+            offsets = []
+            for get_text, texts, pattern, _ in self._scans():
+                for page_num in range(self.number_of_pages):
+                    text = get_text(page_num)
+                    with span("pdf.search", path=self.pdf_path, page=page_num):
+                        for match in pattern.finditer(text):
+                            offsets.append((_doi_of(match), page_num, match.start()))
+                if offsets:
+                    break
+            self._store(prefix + "dois", list(dict.fromkeys(o[0] for o in offsets)))
+            self._store(prefix + "doi_offsets", offsets)
+        return self._results[prefix + "dois"]
+
+    @property
+    def doi_offsets(self) -> list:
+        """Every DOI occurrence as `(doi, page_num, offset in the page text)`; with `raw_scan` the offset is in the raw text if the DOIs were found there."""
+        prefix = "raw_" if self.raw_scan else ""
+        if not self._cached(prefix + "doi_offsets"):
+            self._results.pop(prefix + "dois", None)
+            self.dois
+        return [tuple(o) for o in self._results[prefix + "doi_offsets"]]
+
+    @property
+    def title(self):
+        """Title found by the common title patterns or None."""
+        if not self._cached("title"):
+            title = None
+            for page_num, text in self.iter_page_texts():
+                with span("pdf.search", path=self.pdf_path, page=page_num):
+                    match = title_pattern.search(text)
+                if match:
+                    title = (match.group(1) or match.group(2)).strip()
+                    break
+            self._store("title", title)
+        return self._results["title"]
+
+
+def analyze_pdf(
+    pdf_path: str,
+    want=("first_doi", "dois", "title"),
+    cache: PdfCache = True,
+    raw_scan: bool = False,
+    memory_limit: int = None,
+) -> PdfAnalysis:
+    """Parse the PDF once and compute the requested results.
+
+    Args:
+        pdf_path (str): Path to the PDF.
+        want (tuple, optional): Results to compute, any of 'first_doi', 'dois', 'doi_offsets', 'title'. Defaults to 'first_doi', 'dois' and 'title'.
+        cache (PdfCache, optional): See `PdfAnalysis`. Defaults to True.
+        raw_scan (bool, optional): See `PdfAnalysis`. Defaults to False.
+        memory_limit (int, optional): See `PdfAnalysis`. Defaults to None.
+
+    Returns:
+        PdfAnalysis: Analysis with the requested results available and the file closed.
+    """
+    with PdfAnalysis(pdf_path, cache, raw_scan, memory_limit=memory_limit) as analysis:
+        for name in want:
+            getattr(analysis, name)
+    return analysis
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def default_cache_dir() -> str:
+    """Directory for the caches of scientific_citing: `$SCIENTIFIC_CITING_CACHE` or `~/.cache/scientific_citing`."""
+    return os.environ.get("SCIENTIFIC_CITING_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "scientific_citing"
+    )
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of the content of the file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PdfCache:
+    """On-disk cache of PDF extraction results keyed by the content hash of the file.
+    A (size, mtime, inode) pre-check per path avoids re-hashing unchanged files, so looking up a known file only costs a `stat`.
+    Once `max_entries` is exceeded the least recently used tenth of the entries is evicted in one batch, together with the paths of evicted entries and of files that no longer exist.
+    Every entry records the extraction version it was produced with, entries of other versions are ignored and can be dropped with `invalidate`.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 100_000) -> None:
+        """
+        Args:
+            path (str, optional): SQLite database file. Defaults to 'pdf_cache.sqlite' in `default_cache_dir()`.
+            max_entries (int, optional): Maximum number of cached documents. Defaults to 100_000.
+        """
+        if path is None:
+            path = os.path.join(default_cache_dir(), "pdf_cache.sqlite")
+        dirpath = os.path.dirname(path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        import sqlite3
+
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # A lost put only costs extracting the PDF again, so commits need not wait for the disk
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (digest TEXT PRIMARY KEY, version INTEGER, data TEXT, last_access REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)"
+            )
+        self._stored = self._connection.execute(
+            "SELECT COUNT(*) FROM results"
+        ).fetchone()[0]
+        "Number of entries, recounted before evicting as other processes may share the cache"
+
+    def close(self):
+        self._connection.close()
+
+    def digest(self, pdf_path: str) -> str:
+        """Content hash of the file, re-hashed only if size, mtime or inode changed since the last call."""
+        path = os.path.abspath(pdf_path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, inode, digest FROM files WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if row is not None and row[:3] == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return row[3]
+        digest = file_digest(path)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, digest),
+            )
+        return digest
+
+    def get(self, pdf_path: str, version: int) -> dict:
+        """Cached results for the file or None.
+
+        Args:
+            pdf_path (str): Path to the PDF.
+            version (int): Extraction version the results must have been produced with.
+
+        Returns:
+            dict | None: Cached results
+        """
+        digest = self.digest(pdf_path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM results WHERE digest = ? AND version = ?",
+                (digest, version),
+            ).fetchone()
+            if row is None:
+                return None
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE results SET last_access = ? WHERE digest = ?",
+                    (time.time(), digest),
+                )
+        return json.loads(row[0])
+
+    def put(self, pdf_path: str, results: dict, version: int):
+        """Merge the results into the entry of the file and evict the least recently used entries if the cache is full.
+
+        Args:
+            pdf_path (str): Path to the PDF.
+            results (dict): JSON serializable results.
+            version (int): Extraction version the results were produced with.
+        """
+        digest = self.digest(pdf_path)
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT data, version FROM results WHERE digest = ?", (digest,)
+            ).fetchone()
+            data = json.loads(row[0]) if row is not None and row[1] == version else {}
+            data.update(results)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (digest, version, json.dumps(data), time.time()),
+            )
+            if row is None:
+                self._stored += 1
+            if self._stored > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Recount the entries and, if there are more than `max_entries`, delete the least recently used ones down to 90 % of `max_entries`."""
+        self._stored = self._connection.execute(
+            "SELECT COUNT(*) FROM results"
+        ).fetchone()[0]
+        if self._stored > self.max_entries:
+            excess = self._stored - self.max_entries + self.max_entries // 10
+            self._connection.execute(
+                "DELETE FROM results WHERE digest IN (SELECT digest FROM results ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self._stored -= excess
+        self._prune_files()
+
+    def _prune_files(self):
+        """Delete the paths whose entry was evicted or whose file no longer exists."""
+        self._connection.execute(
+            "DELETE FROM files WHERE digest NOT IN (SELECT digest FROM results)"
+        )
+        missing = [
+            (path,)
+            for (path,) in self._connection.execute("SELECT path FROM files")
+            if not os.path.exists(path)
+        ]
+        self._connection.executemany("DELETE FROM files WHERE path = ?", missing)
+
+    def prune(self):
+        """Delete the paths whose entry was evicted or invalidated or whose file no longer exists; done on every eviction as well."""
+        with self._lock, self._connection:
+            self._prune_files()
+
+    def invalidate(self, version: int = None):
+        """Drop all entries not produced with `version`, or all entries if `version` is None."""
+        with self._lock, self._connection:
+            if version is None:
+                self._connection.execute("DELETE FROM results")
+                self._stored = 0
+            else:
+                self._stored -= self._connection.execute(
+                    "DELETE FROM results WHERE version != ?", (version,)
+                ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM results"
+            ).fetchone()
+        return count
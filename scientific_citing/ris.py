@@ -1,18 +1,20 @@
-import logging
+import io
 import os
 import re
-
-import PyPDF2
-import requests
-from clipboard import copy
-from colorful_terminal import *
-from easy_tasks import pickle_unpack, remove_dublicates
-from exception_details import print_exception_details
-
-
-# Set the logging level to ERROR
-logging.getLogger("PyPDF2").setLevel(logging.ERROR)
-
+import sys
+from collections.abc import MutableMapping
+from typing import NamedTuple
+
+from .crossref import (
+    CrossrefCache,
+    CrossrefClient,
+    _requests,
+    clean_doi,
+    get_crossref_client,
+)
+from .instrumentation import span
+from .pdf import DEFAULT_FIRST_PAGES, DEFAULT_LAST_PAGES, PdfAnalysis
+from .runs import Citation, render, rtf_document
 
 abbreviations = {
     "TY": "Type of reference (must be the first tag; see `abbreviation_to_type_of_reference`)",
@@ -242,13 +244,63 @@ secondary_abbreviations = {
 }
 "ris syntax - Short descriptions of abbreviations used in ris-files"
 
-journal_abbreviations_by_CASSI: dict = pickle_unpack(
+
+class _LazyPickledDict(MutableMapping):
+    """Dictionary unpickled from `path` on first access."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            from easy_tasks import pickle_unpack
+
+            self._data = pickle_unpack(self.path)
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def __repr__(self) -> str:
+        return repr(self.data)
+
+
+journal_abbreviations_by_CASSI: dict = _LazyPickledDict(
     os.path.join(
         os.path.dirname(__file__),
         "journal_to_abbreviation_corejournals_by_CASSI.pickle",
     )
 )
-"Dictionary containing the journal abbreviations by CASSI"
+"Dictionary containing the journal abbreviations by CASSI, loaded on first access"
+
+
+class _LazyStyle:
+    """`colorful_terminal.Style`, imported on first use."""
+
+    def __getattr__(self, name: str):
+        from colorful_terminal import Style
+
+        return getattr(Style, name)
+
+
+Style = _LazyStyle()
 
 
 # usage
@@ -289,69 +341,279 @@ def transform_to_valid_filename(string):
     return transformed_string
 
 
-# Function to find and extract DOIs from a PDF
-def extract_dois_from_pdf(pdf_path):
-    dois = set()  # Use a set to store unique DOIs
+def extract_dois_from_pdf(pdf_path, raw_scan: bool = False, memory_limit: int = None):
+    """Find all unique DOIs in the PDF in order of appearance.
+    With `raw_scan` the inflated content streams and link annotations are searched and the text is only extracted if they contain no DOI.
+    With `memory_limit` (bytes) pages are dropped once scanned and `PdfMemoryLimitError` is raised if the limit is exceeded, see `PdfAnalysis`.
+    """
+    with span("extract_dois_from_pdf", path=pdf_path):
+        with PdfAnalysis(
+            pdf_path, raw_scan=raw_scan, memory_limit=memory_limit
+        ) as analysis:
+            return analysis.dois
+
+
+def extract_first_doi_from_pdf(
+    pdf_path,
+    first_pages: int = DEFAULT_FIRST_PAGES,
+    last_pages: int = DEFAULT_LAST_PAGES,
+    time_budget: float = None,
+    with_source: bool = False,
+    raw_scan: bool = False,
+    memory_limit: int = None,
+):
+    """Find the first DOI in the PDF with `PdfAnalysis.find_first_doi`; with the default arguments this is `PdfAnalysis.first_doi` as used by `pdf_to_ris`.
+    The document Info dictionary and the XMP metadata are checked before any page text is extracted, then only the page budget is scanned.
 
-    with open(pdf_path, "rb") as pdf_file:
-        pdf_reader = PyPDF2.PdfFileReader(pdf_file)
+    Args:
+        pdf_path (str): Path to the PDF.
+        first_pages (int, optional): Number of leading pages to scan. None scans all pages in order. Defaults to DEFAULT_FIRST_PAGES.
+        last_pages (int, optional): Number of trailing pages to scan after the leading ones. Defaults to DEFAULT_LAST_PAGES.
+        time_budget (float, optional): Seconds after which no further page is extracted. Defaults to None.
+        with_source (bool, optional): Return the `DoiMatch` including the source instead of the DOI only. Defaults to False.
+        raw_scan (bool, optional): Scan the inflated content streams and link annotations of the pages before extracting their text, see `PdfAnalysis`. Defaults to False.
+        memory_limit (int, optional): Maximum memory growth in bytes, see `PdfAnalysis`; exceeding it raises `PdfMemoryLimitError`. Defaults to None.
 
-        for page_num in range(pdf_reader.numPages):
-            page = pdf_reader.getPage(page_num)
-            text = page.extractText()
+    Returns:
+        str | DoiMatch | None: DOI (or match) if found otherwise None
+    """
+    with span("extract_first_doi_from_pdf", path=pdf_path):
+        with PdfAnalysis(
+            pdf_path, raw_scan=raw_scan, memory_limit=memory_limit
+        ) as analysis:
+            match = analysis.find_first_doi(first_pages, last_pages, time_budget)
+    if with_source or match is None:
+        return match
+    return match.doi
 
-            # Regular expression to find DOIs (may not capture all DOI formats)
-            doi_pattern = r"\b(10\.\d{4,9}/[-._;()/:a-zA-Z0-9]*)\b"
 
-            # Find all matches on the page and add them to the set
-            matches = re.findall(doi_pattern, text)
-            dois.update(matches)
+def extract_paper_title(pdf_path):
+    """Extract the title of a research paper from a PDF or None."""
+    with span("extract_paper_title", path=pdf_path):
+        with PdfAnalysis(pdf_path) as analysis:
+            return analysis.title
+
+
+def work_to_reference(work: dict, doi: str) -> "Reference":
+    """Build the entries of the reference from the Crossref work of the DOI."""
+    title = work.get("title", [])[0]
+    authors = work.get("author", [])
+    year = work.get("created", {}).get("date-parts", [])[0][0]
+    journal = work.get("container-title", [])[0]
+
+    return Reference(
+        TY="JOUR",
+        T1=title,
+        AU=[
+            f"{author.get('family', '')}, {author.get('given', '')}"
+            for author in authors
+        ],
+        PY=str(year),
+        JO=journal,
+        VL=work.get("volume", ""),
+        IS=work.get("issue", ""),
+        SP=work.get("page", ""),
+        DO=doi,
+    )
 
-    return list(dois)
 
+def work_to_ris(work: dict, doi: str) -> str:
+    """Build the content of the ris file from the Crossref work of the DOI."""
+    return "".join(_reference_lines(work_to_reference(work, doi)))
+
+
+_tag_pattern = re.compile(r"^[A-Z][A-Z0-9]$")
+
+
+def _reference_lines(reference):
+    """Lines of one reference in RIS syntax: 'TY' first, every value of a multi-valued tag on its own line and 'ER' last."""
+    if isinstance(reference, Reference):
+        entries = reference.tags
+    else:
+        entries = {}
+        for key, value in reference.items():
+            tag = _name_to_tag.get(key, key)
+            if _tag_pattern.match(tag) and (tag == key or tag not in reference):
+                entries[tag] = value
+    reference_type = entries.get("TY") or "GEN"
+    if isinstance(reference_type, (list, tuple)):
+        reference_type = reference_type[0]
+    yield f"TY  - {reference_type}\n"
+    for tag, value in entries.items():
+        if tag == "TY" or tag == "ER":
+            continue
+        if not isinstance(value, (list, tuple)):
+            value = (value,)
+        for v in value:
+            v = str(v).replace("\r", " ").replace("\n", " ")
+            yield f"{tag}  - {v}\n"
+    yield "ER  - \n"
+
+
+def _iter_references(references):
+    """References of the iterable, RIS objects contribute all their references."""
+    for reference in references:
+        if isinstance(reference, RIS):
+            yield from reference.references
+        else:
+            yield reference
 
-# Function to find and extract the first DOI from a PDF
-def extract_first_doi_from_pdf(pdf_path):
-    with open(pdf_path, "rb") as pdf_file:
-        pdf_reader = PyPDF2.PdfFileReader(pdf_file)
 
-        for page_num in range(pdf_reader.numPages):
-            page = pdf_reader.getPage(page_num)
-            text = page.extractText()
+_process_umask = None
 
-            # Regular expression to find DOIs (may not capture all DOI formats)
-            doi_pattern = r"\b(10\.\d{4,9}/[-._;()/:a-zA-Z0-9]*)\b"
 
-            # Find the first match on the page and return it
-            match = re.search(doi_pattern, text)
-            if match:
-                return match.group()
+def _umask() -> int:
+    """File mode creation mask of the process, read once."""
+    global _process_umask
+    if _process_umask is None:
+        _process_umask = os.umask(0o022)
+        os.umask(_process_umask)
+    return _process_umask
 
-    return None
 
+def _write_atomically(filepath: str, chunks, encoding: str = "utf-8"):
+    """Write the text chunks to a temporary file next to `filepath` and replace `filepath` by it, so readers never see a partially written file."""
+    import tempfile
 
-# Function to extract the title of a research paper from a PDF
-def extract_paper_title(pdf_path):
-    with open(pdf_path, "rb") as pdf_file:
-        pdf_reader = PyPDF2.PdfFileReader(pdf_file)
+    dirpath = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(filepath) + ".", suffix=".tmp", dir=dirpath
+    )
+    try:
+        with open(fd, "w", encoding=encoding, newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        try:
+            mode = os.stat(filepath).st_mode
+        except FileNotFoundError:
+            mode = 0o666 & ~_umask()
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
-        # Iterate through the pages and extract text
-        for page_num in range(pdf_reader.numPages):
-            page = pdf_reader.getPage(page_num)
-            text = page.extractText()
 
-            # Define a regular expression pattern for common title patterns
-            title_pattern = (
-                r"(?:\bTitle\b\s*:\s*(.*?)(?:\n|$))|" r"(?:^Title\s*\n(.*?)(?:\n|$))"
-            )
+def _buffered(lines, buffer_size: int):
+    """Join the lines into chunks of about `buffer_size` characters."""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
 
-            match = re.search(title_pattern, text, re.I | re.DOTALL)
-            if match:
-                title = match.group(1) or match.group(2)
-                title = title.strip()
-                return title
 
-    return None
+def write_ris(
+    references, fp, encoding: str = "utf-8", buffer_size: int = 1 << 20
+) -> int:
+    """Write many references to one RIS file in a single sequential pass.
+
+    Args:
+        references (Iterable[Reference | dict | RIS]): References to write; RIS objects contribute all their references.
+        fp (str | TextIO): Path, written atomically via a temporary file, or text file object.
+        encoding (str, optional): Encoding if `fp` is a path. Defaults to "utf-8".
+        buffer_size (int, optional): Number of characters collected before each write. Defaults to 1 MiB.
+
+    Returns:
+        int: Number of references written
+    """
+    count = 0
+
+    def lines():
+        nonlocal count
+        for reference in _iter_references(references):
+            yield from _reference_lines(reference)
+            count += 1
+
+    chunks = _buffered(lines(), buffer_size)
+    if isinstance(fp, (str, os.PathLike)):
+        _write_atomically(fp, chunks, encoding)
+    else:
+        for chunk in chunks:
+            fp.write(chunk)
+    return count
+
+
+def _save_ris(
+    ris: str,
+    filepath: str = None,
+    rename_file_to_angewandte_citing_style: bool = False,
+    rename_ris_to_title: bool = False,
+    move_ris_in_title_dir: bool = False,
+    copy_citation: bool = False,
+    max_title_length: int = 75,
+) -> "RIS":
+    """Parse the ris file content and write it to `filepath` according to the options of `doi_to_ris`."""
+    ref = RIS(ris)
+    with span("ris.cite"):
+        name = ref.angewandte_chemie_style(formated=False)
+    if copy_citation:
+        from clipboard import copy
+
+        copy(name.rstrip("."))
+    if rename_file_to_angewandte_citing_style:
+        if os.path.isdir(filepath):
+            dirpath = filepath
+        else:
+            dirpath = os.path.dirname(filepath)
+        filepath = os.path.join(dirpath, name + "ris")
+    if rename_ris_to_title:
+        if os.path.isdir(filepath):
+            dirpath = filepath
+        else:
+            dirpath = os.path.dirname(filepath)
+        filepath = os.path.join(
+            dirpath,
+            transform_to_valid_filename(ref.entry["T1"][:max_title_length]) + ".ris",
+        )
+    if move_ris_in_title_dir:
+        dp = os.path.dirname(filepath)
+        filepath = os.path.join(
+            dp,
+            transform_to_valid_filename(ref.entry["T1"][:max_title_length]),
+            os.path.basename(filepath),
+        )
+        ndp = os.path.dirname(filepath)
+        if not os.path.isdir(ndp):
+            os.makedirs(ndp)
+    if filepath != None:
+        with span("ris.write", path=filepath):
+            _write_atomically(filepath, (ris,))
+        ref.filepath = filepath
+    return ref
+
+
+def _get_resolver(resolver=None):
+    """The source of metadata for a `resolver` argument: the shared Crossref client for None, the `CrossrefSnapshot` of a dump for a path or the resolver itself."""
+    if resolver is None:
+        return get_crossref_client()
+    if isinstance(resolver, (str, os.PathLike)):
+        from .offline import open_snapshot
+
+        return open_snapshot(os.fspath(resolver))
+    return resolver
+
+
+def _resolve_doi(doi: str, cache=True, resolver=None, **kwargs) -> "RIS":
+    """Resolve the DOI and save the ris file, raising instead of printing errors."""
+    doi = clean_doi(doi)
+    resolver = _get_resolver(resolver)
+    with span("crossref.fetch_work", doi=doi):
+        work = resolver.fetch_work(doi, cache)
+    if work is None:
+        raise LookupError(f"DOI not found: {doi}")
+    with span("ris.build", doi=doi):
+        ris = work_to_ris(work, doi)
+    return _save_ris(ris, **kwargs)
 
 
 def doi_to_ris(
@@ -362,6 +624,8 @@ def doi_to_ris(
     move_ris_in_title_dir: bool = False,
     copy_citation: bool = False,
     max_title_length: int = 75,
+    cache: CrossrefCache = True,
+    resolver: CrossrefClient = None,
 ):
     """Use 'https://api.crossref.org/works/{doi}' to get the regerence information and write the ris file accordingly.
 
@@ -370,121 +634,91 @@ def doi_to_ris(
         filepath (str, optional): Give a filepath to save the ris file, filepath can be the target directory. Defaults to None.
         rename_file_to_angewandte_citing_style (bool, optional): Renames the ris file to the citation as wished by Angewandte Chemie. Defaults to False.
         rename_ris_to_title (bool, optional): Renames the ris file to the title as found for the field T1. Defaults to False.
+        cache (CrossrefCache, optional): Response cache, True for the one set by `set_crossref_cache`, None for no cache. Defaults to True.
+        resolver (CrossrefClient | CrossrefSnapshot | str, optional): Source of the metadata providing `fetch_work(doi, cache)` or the path of a local Crossref JSON-lines dump (see `CrossrefSnapshot`) to work offline. Defaults to the shared client of `get_crossref_client`.
 
     Returns:
         str | None: ris file content if proceses was successful otherwise None
     """
-    doi = doi.strip()
-    doi = doi.replace("https://doi.org/", "")
-    doi = doi.replace("DOI: ", "")
-    doi = doi.replace("doi: ", "")
-    api_url = f"https://api.crossref.org/works/{doi}"
-
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        data = response.json()
-
-        if data["status"] == "ok":
-            work = data["message"]
-            title = work.get("title", [])[0]
-            authors = work.get("author", [])
-            year = work.get("created", {}).get("date-parts", [])[0][0]
-            journal = work.get("container-title", [])[0]
-            volume = work.get("volume", "")
-            issue = work.get("issue", "")
-            pages = work.get("page", "")
-
-            ris_data = []
-
-            # Adding required RIS tags
-            ris_data.append("TY  - JOUR")
-            ris_data.append(f"T1  - {title}")
-
-            # Adding authors
-            for author in authors:
-                given_name = author.get("given", "")
-                surname = author.get("family", "")
-                ris_data.append(f"AU  - {surname}, {given_name}")
-
-            # Adding year
-            ris_data.append(f"PY  - {year}")
-
-            # Adding journal information
-            ris_data.append(f"JO  - {journal}")
-            ris_data.append(f"VL  - {volume}")
-            ris_data.append(f"IS  - {issue}")
-            ris_data.append(f"SP  - {pages}")
-            ris_data.append(f"DO  - {doi}")
-
-            ris_data.append("ER  -")
-
-            ris = "\n".join(ris_data)
-
-            ref = RIS(ris)
-            name = ref.angewandte_chemie_style(formated=False)
-            if copy_citation:
-                copy(name.rstrip("."))
-            if rename_file_to_angewandte_citing_style:
-                if os.path.isdir(filepath):
-                    dirpath = filepath
-                else:
-                    dirpath = os.path.dirname(filepath)
-                filepath = os.path.join(dirpath, name + "ris")
-            if rename_ris_to_title:
-                if os.path.isdir(filepath):
-                    dirpath = filepath
-                else:
-                    dirpath = os.path.dirname(filepath)
-                filepath = os.path.join(
-                    dirpath,
-                    transform_to_valid_filename(ref.entry["T1"][:max_title_length])
-                    + ".ris",
-                )
-            if move_ris_in_title_dir:
-                dp = os.path.dirname(filepath)
-                filepath = os.path.join(
-                    dp,
-                    transform_to_valid_filename(ref.entry["T1"][:max_title_length]),
-                    os.path.basename(filepath),
-                )
-                ndp = os.path.dirname(filepath)
-                if not os.path.isdir(ndp):
-                    os.makedirs(ndp)
-            if filepath != None:
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(ris)
-
-            return ref
-
-    except requests.exceptions.RequestException as e:
+        with span("doi_to_ris", doi=doi):
+            return _resolve_doi(
+                doi,
+                cache,
+                resolver,
+                filepath=filepath,
+                rename_file_to_angewandte_citing_style=rename_file_to_angewandte_citing_style,
+                rename_ris_to_title=rename_ris_to_title,
+                move_ris_in_title_dir=move_ris_in_title_dir,
+                copy_citation=copy_citation,
+                max_title_length=max_title_length,
+            )
+    except (_requests().exceptions.RequestException, LookupError) as e:
         print(f"Error: {e}")
 
     return None
 
 
-def pdf_to_ris(
+class DoiResult(NamedTuple):
+    """Result of resolving one DOI with `dois_to_ris`: the RIS object or the error."""
+
+    doi: str
+    ris: "RIS" = None
+    error: Exception = None
+
+
+def dois_to_ris(
+    dois: list,
+    max_workers: int = 8,
+    rate_limit: float = None,
+    cache: CrossrefCache = True,
+    resolver: CrossrefClient = None,
+    **kwargs,
+) -> list:
+    """Resolve many DOIs concurrently over pooled keep-alive connections.
+
+    Args:
+        dois (list): DOIs to resolve.
+        max_workers (int, optional): Number of concurrent requests. Defaults to 8.
+        rate_limit (float, optional): Maximum requests per second. Ignored if a resolver is given. Defaults to None (unlimited).
+        cache (CrossrefCache, optional): See `doi_to_ris`. Defaults to True.
+        resolver (CrossrefClient | CrossrefSnapshot | str, optional): See `doi_to_ris`. Defaults to a client with the given rate limit.
+        **kwargs: Further options of `doi_to_ris` such as `filepath` or `rename_ris_to_title`.
+
+    Returns:
+        list[DoiResult]: One result per DOI in input order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    own_resolver = resolver is None
+    if own_resolver:
+        resolver = CrossrefClient(rate_limit=rate_limit, pool_size=max_workers)
+    else:
+        resolver = _get_resolver(resolver)
+
+    def resolve(doi):
+        try:
+            return DoiResult(doi, _resolve_doi(doi, cache, resolver, **kwargs))
+        except Exception as e:
+            return DoiResult(doi, error=e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(resolve, dois))
+    finally:
+        if own_resolver:
+            resolver.close()
+
+
+def _move_pdf(
     pdf_path: str,
-    ris_dir: str = None,
-    rename_ris_to_angewandte_citing_style: bool = False,
-    rename_ris_to_title: bool = False,
+    ris: "RIS",
     rename_pdf_to_angewandte_citing_style: bool = False,
     rename_pdf_to_title: bool = False,
     move_pdf_and_ris_in_title_dir: bool = False,
-    copy_citation: bool = False,
     max_title_length: int = 75,
-):
-    doi = extract_first_doi_from_pdf(pdf_path)
-    ris = doi_to_ris(
-        doi,
-        ris_dir,
-        rename_file_to_angewandte_citing_style=rename_ris_to_angewandte_citing_style,
-        rename_ris_to_title=rename_ris_to_title,
-        move_ris_in_title_dir=move_pdf_and_ris_in_title_dir,
-        copy_citation=copy_citation,
-        max_title_length=max_title_length,
-    )
-
+) -> str:
+    """Rename and move the PDF according to the options of `pdf_to_ris` and return its new path."""
     if rename_pdf_to_angewandte_citing_style:
         cit = ris.angewandte_chemie_style(formated=False) + ".pdf"
         dp = os.path.dirname(pdf_path)
@@ -496,19 +730,313 @@ def pdf_to_ris(
         title = ris.entry["T1"][:max_title_length]
         title = transform_to_valid_filename(title)
         dp = os.path.dirname(pdf_path)
-        nfp = os.path.join(dp, title)
+        nfp = os.path.join(dp, title + ".pdf")
         os.rename(pdf_path, nfp)
         pdf_path = nfp
 
     if move_pdf_and_ris_in_title_dir:
         title = ris.entry["T1"][:max_title_length]
+        title = transform_to_valid_filename(title)
         dp = os.path.dirname(pdf_path)
         filename = os.path.basename(pdf_path)
+        os.makedirs(os.path.join(dp, title), exist_ok=True)
         nfp = os.path.join(dp, title, filename)
         os.rename(pdf_path, nfp)
         pdf_path = nfp
 
-    return ris
+    return pdf_path
+
+
+def _pdf_first_doi(pdf_path: str, analysis: PdfAnalysis = None):
+    """First DOI of the PDF as `PdfAnalysis.first_doi` finds it, the step of `pdf_to_ris` and `apdf_to_ris` (run in their executor) before the lookup."""
+    if analysis is None:
+        analysis = PdfAnalysis(pdf_path)
+    with span("pdf.first_doi", path=pdf_path):
+        with analysis:
+            return analysis.first_doi
+
+
+def _report_missing_doi(pdf_path: str):
+    print(f"Error: No DOI found in {pdf_path}")
+
+
+def pdf_to_ris(
+    pdf_path: str,
+    ris_dir: str = None,
+    rename_ris_to_angewandte_citing_style: bool = False,
+    rename_ris_to_title: bool = False,
+    rename_pdf_to_angewandte_citing_style: bool = False,
+    rename_pdf_to_title: bool = False,
+    move_pdf_and_ris_in_title_dir: bool = False,
+    copy_citation: bool = False,
+    max_title_length: int = 75,
+    analysis: PdfAnalysis = None,
+    cache: CrossrefCache = True,
+    resolver: CrossrefClient = None,
+):
+    """Get the ris file for the PDF by its first DOI.
+
+    Args:
+        pdf_path (str): Path to the PDF.
+        analysis (PdfAnalysis, optional): Analysis of the PDF from earlier steps, so the PDF is not parsed again. Defaults to None.
+        cache (CrossrefCache, optional): See `doi_to_ris`. Defaults to True.
+        resolver (CrossrefClient | CrossrefSnapshot | str, optional): See `doi_to_ris`. Defaults to None.
+        For the other arguments see `doi_to_ris`.
+
+    Returns:
+        RIS | None: RIS object if proceses was successful otherwise None
+    """
+    with span("pdf_to_ris", path=pdf_path):
+        doi = _pdf_first_doi(pdf_path, analysis)
+        if doi is None:
+            _report_missing_doi(pdf_path)
+            return None
+        ris = doi_to_ris(
+            doi,
+            ris_dir,
+            rename_file_to_angewandte_citing_style=rename_ris_to_angewandte_citing_style,
+            rename_ris_to_title=rename_ris_to_title,
+            move_ris_in_title_dir=move_pdf_and_ris_in_title_dir,
+            copy_citation=copy_citation,
+            max_title_length=max_title_length,
+            cache=cache,
+            resolver=resolver,
+        )
+
+        if ris is not None:
+            with span("pdf.move", path=pdf_path):
+                _move_pdf(
+                    pdf_path,
+                    ris,
+                    rename_pdf_to_angewandte_citing_style,
+                    rename_pdf_to_title,
+                    move_pdf_and_ris_in_title_dir,
+                    max_title_length,
+                )
+
+        return ris
+
+
+_name_to_tag = {name: tag for tag, name in secondary_abbreviations.items()}
+"Tag of each name in `secondary_abbreviations`"
+
+_long_type = "Type of reference (long)"
+
+
+class Reference(MutableMapping):
+    """Compact record of the entries of one reference.
+    Values are stored once under their interned two character tag. Names from `secondary_abbreviations` (e.g. 'Publication year' for 'PY') and 'Type of reference (long)' resolve through shared mappings,
+    so a `Reference` behaves like the dictionary holding every entry under its tag and its name, without storing it twice.
+    Values derived from the entries, such as citations, are memoized with `cached` and dropped whenever an entry is set or deleted.
+    """
+
+    __slots__ = ("_data", "_cache")
+
+    def __init__(self, entries=None, **kwargs) -> None:
+        self._data = {}
+        self._cache = None
+        if entries is not None:
+            self.update(entries)
+        if kwargs:
+            self.update(kwargs)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return sys.intern(_name_to_tag.get(key, key))
+
+    def __getitem__(self, key: str):
+        data = self._data
+        try:
+            return data[key]
+        except KeyError:
+            pass
+        tag = _name_to_tag.get(key)
+        if tag is not None:
+            return data[tag]
+        if key == _long_type:
+            try:
+                return abbreviation_to_type_of_reference[data["TY"]]
+            except TypeError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __setitem__(self, key: str, value):
+        self._data[self._key(key)] = value
+        self._cache = None
+
+    def __delitem__(self, key: str):
+        del self._data[self._key(key)]
+        self._cache = None
+
+    def __iter__(self):
+        data = self._data
+        yield from data
+        for tag in data:
+            name = secondary_abbreviations.get(tag)
+            if name is not None:
+                yield name
+        if _long_type not in data and _long_type in self:
+            yield _long_type
+
+    def __len__(self) -> int:
+        return sum(1 for key in self)
+
+    def __bool__(self) -> bool:
+        return bool(self._data)
+
+    def __repr__(self) -> str:
+        return f"Reference({self._data!r})"
+
+    def __getstate__(self):
+        return self._data
+
+    def __setstate__(self, state):
+        self._data = state
+        self._cache = None
+
+    def cached(self, key, compute):
+        """Memoized `compute(self)`, e.g. the citation in a style with given options (`key`).
+        The memo is dropped when an entry is set or deleted; call `invalidate` after changing a value in place (e.g. appending to a list of authors or editing `tags`).
+        """
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        try:
+            return cache[key]
+        except KeyError:
+            value = cache[key] = compute(self)
+            return value
+
+    def invalidate(self):
+        """Drop the memoized values of `cached`."""
+        self._cache = None
+
+    @property
+    def tags(self) -> dict:
+        """Entries by tag only, without the duplicates by name."""
+        return self._data
+
+    def copy(self) -> "Reference":
+        new = Reference()
+        new._data = {
+            k: (list(v) if isinstance(v, list) else v) for k, v in self._data.items()
+        }
+        return new
+
+    def to_dict(self) -> dict:
+        """Plain dictionary with every entry under its tag and its name."""
+        return dict(self.items())
+
+
+_tag_line_pattern = re.compile(r"^\s*([A-Z][A-Z0-9])\s*-(.*)$")
+"Line of a RIS file: two character tag, any spacing, '-' and the value"
+
+_end_of_record_pattern = re.compile(r"^\s*ER\s*-\s*(.*)$")
+"'ER  -' line ending a reference, possibly followed by the next reference on the same line"
+
+
+def parse_reference(lines) -> Reference:
+    """Parse the lines of one reference into a `Reference`.
+    Tags occuring multiple times get a list of values, authors are capitalized and every tag is also available by its name in `secondary_abbreviations`.
+
+    Args:
+        lines (Iterable[str]): Lines of the reference.
+
+    Returns:
+        Reference: Entries of the reference; empty if no tag was found.
+    """
+    entry = {}
+    for line in lines:
+        if line.startswith("#"):
+            continue
+        match = _tag_line_pattern.match(line)
+        if match is None:
+            continue
+        tag, value = sys.intern(match.group(1)), match.group(2).strip()
+        if tag == "ER":
+            continue
+        try:
+            e = entry[tag]
+            if isinstance(e, list):
+                e.append(value)
+            else:
+                entry[tag] = [e, value]
+        except KeyError:
+            entry[tag] = value
+
+    atags = ["A1", "A2", "A3", "A4", "AU"]
+    for a in atags:
+        if a in entry:
+            if isinstance(entry[a], (list, tuple)):
+                entry[a] = [first_letter_upper_case(e) for e in entry[a]]
+            else:
+                entry[a] = first_letter_upper_case(entry[a])
+
+    reference = Reference()
+    reference._data = entry
+    return reference
+
+
+def _split_records(lines):
+    """Group lines into references, ending each one at an 'ER  -' line of any spacing. Yields lists of lines."""
+    record = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        match = _end_of_record_pattern.match(line)
+        if match is None:
+            record.append(line)
+            continue
+        yield record
+        record = []
+        rest = match.group(1)
+        if rest:
+            record.append(rest)
+    if any(_tag_line_pattern.match(line) for line in record):
+        yield record
+
+
+def iter_ris(path_or_fileobj, encoding="utf-8"):
+    """Read a RIS file reference by reference without loading the whole file.
+    Memory is bounded by the size of the largest reference.
+
+    Args:
+        path_or_fileobj (str | PathLike | IO): Path of the RIS file, an open text or binary file or the content of a RIS file.
+        encoding (str, optional): Encoding of the file and of binary file objects. Defaults to "utf-8".
+
+    Yields:
+        Reference: Entries of each reference as parsed by `parse_reference`.
+    """
+    if hasattr(path_or_fileobj, "read"):
+        yield from _iter_ris_lines(path_or_fileobj, encoding)
+    elif isinstance(path_or_fileobj, str) and not os.path.exists(path_or_fileobj):
+        yield from _iter_ris_lines(io.StringIO(path_or_fileobj), encoding)
+    else:
+        with open(path_or_fileobj, "r", encoding=encoding) as f:
+            yield from _iter_ris_lines(f, encoding)
+
+
+def _iter_ris_lines(fileobj, encoding):
+    def lines():
+        first = True
+        for line in fileobj:
+            if isinstance(line, bytes):
+                line = line.decode(encoding)
+            if first:
+                line = line.lstrip("\ufeff")
+                first = False
+            yield line
+
+    for record in _split_records(lines()):
+        entry = parse_reference(record)
+        if entry:
+            yield entry
 
 
 class RIS:
@@ -519,62 +1047,53 @@ class RIS:
     def __init__(self, filepath: str, encoding="utf-8") -> None:
         self.filecontent = ""
         self.references = []
-        "RIS files can contain multiple references which are seperated by 'ER - '. These references will each be an item of the list `references` if form of a dictionary."
+        "RIS files can contain multiple references which are seperated by 'ER - '. These references will each be an item of the list `references` in form of a `Reference`."
         self.entry = {}
-        "Dictionary of entries; In case of multiple references it's the last reference only."
+        "Entries (`Reference`); In case of multiple references it's the last reference only."
         if not os.path.exists(filepath):
             content = filepath
             self.filepath = None
         else:
             self.filepath = filepath
-            with open(filepath, "r", encoding=encoding) as f:
-                content = f.read()
+            with span("ris.read", path=filepath):
+                with open(filepath, "r", encoding=encoding) as f:
+                    content = f.read()
+        content = content.lstrip("\ufeff")
         self.filecontent = content
-        self.type_of_reference = self._classify_reference(content)
-        "Fore now classified to be one of: 'Journal Quote', 'Book Quote with Editor', 'Book Quote without Editor', 'Thesis/Dissertation Quote', 'Webpage Quote', 'Other Quote'"
-        items = content.split("ER - \n")
-        for item in items:
-            self.handle_items(item)
-        self.cite_as = self.angewandte_chemie_style()
-
-    def handle_items(self, filecontent):
-        self.entry = {}
-        for line in filecontent.splitlines():
-            if line.startswith("#") or "-" not in line:
-                continue
-            tag = line.split("-")[0].strip()
-            entry = line.split("-")[1].strip()
-            try:
-                e = self.entry[tag.strip()]
-                if isinstance(e, list):
-                    e.append(entry)
-                else:
-                    e = [e, entry]
-                self.entry[tag] = e
-            except:
-                self.entry[tag] = entry
+        with span("ris.parse", path=self.filepath):
+            self.type_of_reference = self._classify_reference(content)
+            "Fore now classified to be one of: 'Journal Quote', 'Book Quote with Editor', 'Book Quote without Editor', 'Thesis/Dissertation Quote', 'Webpage Quote', 'Other Quote'"
+            for lines in _split_records(content.splitlines()):
+                self.handle_items(lines)
+            if not self.references:
+                self.handle_items([])
+
+    @property
+    def citation(self) -> Citation:
+        """Runs of the citation of `entry` in the style of the Angewandte Chemie, render them for other output formats.
+        Computed on first access and memoized until the entry changes."""
+        return self.angewandte_chemie_runs()
+
+    @property
+    def cite_as(self) -> str:
+        """Citation of `entry` in the style of the Angewandte Chemie with terminal styles, computed on first access and memoized until the entry changes."""
+        return self.angewandte_chemie_style()
+
+    def dumps(self) -> str:
+        """The references in RIS syntax, see `write_ris`."""
+        return "".join(
+            line for entry in self.references for line in _reference_lines(entry)
+        )
 
-        atags = ["A1", "A2", "A3", "A4", "AU"]
-        for a in atags:
-            try:
-                if isinstance(self.entry[a], list) or isinstance(self.entry[a], tuple):
-                    self.entry[a] = [first_letter_upper_case(e) for e in self.entry[a]]
-                else:
-                    self.entry[a] = first_letter_upper_case(self.entry[a])
-            except:
-                pass
+    def dump(self, fp, encoding: str = "utf-8") -> int:
+        """Write the references to a path (atomically) or text file object, see `write_ris`."""
+        return write_ris(self.references, fp, encoding)
 
-        for abbrev, title in secondary_abbreviations.items():
-            try:
-                self.entry[title] = self.entry[abbrev]
-            except:
-                pass
-        try:
-            self.entry["Type of reference (long)"] = abbreviation_to_type_of_reference[
-                self.entry["Type of reference"]
-            ]
-        except:
-            pass
+    def handle_items(self, filecontent):
+        """Parse one reference (string content or list of lines) and append it to `references`."""
+        if isinstance(filecontent, str):
+            filecontent = filecontent.splitlines()
+        self.entry = parse_reference(filecontent)
         if self.entry != {}:
             self.references.append(self.entry)
         else:
@@ -667,6 +1186,8 @@ class RIS:
                 else:
                     authors.append(entry[a].strip())
 
+        from easy_tasks import remove_dublicates
+
         authors = remove_dublicates([a.strip() for a in authors if a.strip()])
 
         if len(authors) < max_else_etal:
@@ -723,6 +1244,8 @@ class RIS:
                 else:
                     authors.append(entry[a].strip())
 
+        from easy_tasks import remove_dublicates
+
         authors = remove_dublicates([a.strip() for a in authors if a.strip()])
 
         if len(authors) < max_else_etal:
@@ -939,42 +1462,39 @@ class RIS:
 
         return out
 
-    def angewandte_chemie_style(
-        self, entry=None, formated: bool = True, **kwargs
-    ) -> str:
-        """Generate the citation in the style of the Angewandte Chemie.
+    def angewandte_chemie_runs(self, entry=None, **kwargs) -> Citation:
+        """Build the citation in the style of the Angewandte Chemie as format-neutral runs, see `Citation`.
+        The runs are memoized per `Reference` and options, see `Reference.cached`.
 
         Args:
-            entry (_type_, optional): _description_. Defaults to None.
-            formated (bool, optional): _description_. Defaults to True.
-            **kwargs:
-                - Use dissertation = True to indicate that it is a dissertation if the reference type is 'Thesis/Dissertation'.
-                - Use master = True to indicate that it is a master thesis if the reference type is 'Thesis/Dissertation'.
-
-        Raises:
-            Exception: _description_
+            entry (Reference, optional): Entries to cite. Defaults to None (`entry`).
+            **kwargs: See `angewandte_chemie_style`.
 
         Returns:
-            str: _description_
+            Citation: Runs of the citation
         """
         if entry is None:
             entry = self.entry
+        if isinstance(entry, Reference):
+            return Citation(self._memoized_angewandte_chemie_runs(entry, kwargs))
+        return self._angewandte_chemie_runs(entry, **kwargs)
+
+    def _memoized_angewandte_chemie_runs(self, entry: "Reference", kwargs: dict):
+        """Memoized runs of the entry, shared and not to be modified."""
+        return entry.cached(
+            ("angewandte_chemie", tuple(sorted(kwargs.items()))),
+            lambda e: self._angewandte_chemie_runs(e, **kwargs),
+        )
 
+    def _angewandte_chemie_runs(self, entry, **kwargs) -> Citation:
         kwargs.setdefault("dissertation", False)
         kwargs.setdefault("master", False)
+        kwargs.setdefault("abbreviate_journal", False)
+        kwargs.setdefault("fuzzy_journal", False)
 
-        if formated:
-            bold = Style.BOLD
-            not_bold = Style.NOT_BOLD
-            italic = Style.ITALIC
-            not_italic = Style.NOT_ITALIC
-        else:
-            bold = not_bold = italic = not_italic = ""
-
-        out = ""
-
-        out = self._add_authors_as_abbreviated_first_names_full_last_name(
-            entry, out, 10
+        out = Citation()
+        out.add(
+            self._add_authors_as_abbreviated_first_names_full_last_name(entry, "", 10)
         )
 
         jrnl = (
@@ -990,12 +1510,13 @@ class RIS:
 
         if type_of_reference == "Thesis/Dissertation":
             if kwargs["dissertation"]:
-                out += f"Dissertation, {jrnl}, "
+                out.add(f"Dissertation, {jrnl}, ")
             elif kwargs["master"]:
-                out += f"Master, {jrnl}, "
+                out.add(f"Master, {jrnl}, ")
             else:
-                out += f"Thesis/Dissertation, {jrnl}, "
-            out += bold + entry.get("Publication year", "") + not_bold + ", "
+                out.add(f"Thesis/Dissertation, {jrnl}, ")
+            out.add(entry.get("Publication year", ""), bold=True)
+            out.add(", ")
 
         elif type_of_reference in (
             "Whole book",
@@ -1006,38 +1527,52 @@ class RIS:
         ):
             try:
                 entry["ED"]
-                out = italic + out.rstrip(", ") + f" in {jrnl}" + not_italic + ", "
+                out.rstrip_text(", ")
+                out.add(f" in {jrnl}")
+                out.format_all(italic=True)
+                out.add(", ")
                 if entry.get("Volume number", "") != "":
-                    out += (
-                        italic
-                        + "Vol. "
-                        + entry.get("Volume number", "")
-                        + not_italic
-                        + ", "
-                    )
-                out += (
+                    out.add("Vol. " + entry.get("Volume number", ""), italic=True)
+                    out.add(", ")
+                out.add(
                     "(Editor: "
                     + self._get_editors_as_abbreviated_first_names_full_last_name(entry)
                     + "), "
                 )
-                out += entry.get("Publisher", "") + ", "
-                out += entry.get("Publishing Place", "") + ", "
-                out += bold + entry.get("Publication year", "") + not_bold + ", "
+                out.add(entry.get("Publisher", "") + ", ")
+                out.add(entry.get("Publishing Place", "") + ", ")
+                out.add(entry.get("Publication year", ""), bold=True)
+                out.add(", ")
             except Exception as e:
+                from exception_details import print_exception_details
+
                 print_exception_details(e)
-                out += italic + jrnl.replace(",", "") + not_italic + ", "
+                out.add(jrnl.replace(",", ""), italic=True)
+                out.add(", ")
                 if entry.get("Volume number", "") != "":
-                    out += "Vol. " + entry.get("Volume number", "") + ", "
-                out += entry.get("Publisher", "") + ", "
-                out += entry.get("Publishing Place", "") + ", "
-                out += bold + entry.get("Publication year", "") + not_bold + ", "
+                    out.add("Vol. " + entry.get("Volume number", "") + ", ")
+                out.add(entry.get("Publisher", "") + ", ")
+                out.add(entry.get("Publishing Place", "") + ", ")
+                out.add(entry.get("Publication year", ""), bold=True)
+                out.add(", ")
 
         else:
-            out += italic + jrnl.replace(",", "") + not_italic + ", "
-            out += bold + entry.get("Publication year", "") + not_bold + ", "
-            out += italic + entry.get("Volume number", "") + not_italic + ", "
-
-        out = out.replace(", ,", ",")
+            if kwargs["abbreviate_journal"]:
+                from .journals import abbreviate_journal
+
+                # An abbreviation stored in JA, e.g. by `abbreviate_journals`, takes precedence
+                abbreviation = entry.get("Standard abbreviation")
+                if isinstance(abbreviation, list):
+                    abbreviation = abbreviation[0] if abbreviation else None
+                jrnl = abbreviation or abbreviate_journal(jrnl, kwargs["fuzzy_journal"])
+            out.add(jrnl.replace(",", ""), italic=True)
+            out.add(", ")
+            out.add(entry.get("Publication year", ""), bold=True)
+            out.add(", ")
+            out.add(entry.get("Volume number", ""), italic=True)
+            out.add(", ")
+
+        out.replace_text(", ,", ",")
 
         start_page = entry.get("Start Page", "")
         end_page = entry.get("End Page", "")
@@ -1046,16 +1581,69 @@ class RIS:
             or type_of_reference == "Journal (full)"
             or type_of_reference == "Electronic Article"
         ):
-            out += start_page
+            out.add(start_page)
         elif start_page:
-            out += "S. " + start_page + "–" + end_page
+            out.add("S. " + start_page + "–" + end_page)
 
-        out = out.rstrip(", ") + "."
+        out.rstrip_text(", ")
+        out.add(".")
 
         return out
 
-    def cite_by_rules(self, rules: dict[str, dict[str, dict[str, str]]]):
-        pass
+    def angewandte_chemie_style(
+        self, entry=None, formated: bool = True, **kwargs
+    ) -> str:
+        """Generate the citation in the style of the Angewandte Chemie.
+        To get several output formats of one reference build the runs once with `angewandte_chemie_runs` and render them instead.
+
+        Args:
+            entry (Reference, optional): Entries to cite. Defaults to None (`entry`).
+            formated (bool | str, optional): Apply bold and italic as terminal styles, False for plain text or the name of another output format, e.g. 'html' (see `render`). Defaults to True.
+            **kwargs:
+                - Use dissertation = True to indicate that it is a dissertation if the reference type is 'Thesis/Dissertation'.
+                - Use master = True to indicate that it is a master thesis if the reference type is 'Thesis/Dissertation'.
+                - Use abbreviate_journal = True to abbreviate journal names: the abbreviation in JA if there is one (see `abbreviate_journals`), otherwise by CASSI (see `JournalIndex`).
+                - Use fuzzy_journal = True to also accept close matches of the journal name when abbreviating.
+
+        Raises:
+            AssertionError: The reference has neither a journal nor a book name.
+
+        Returns:
+            str: Citation
+        """
+        if entry is None:
+            entry = self.entry
+        if isinstance(entry, Reference):
+            return entry.cached(
+                ("angewandte_chemie", tuple(sorted(kwargs.items())), formated),
+                lambda e: render(
+                    self._memoized_angewandte_chemie_runs(e, kwargs), formated
+                ),
+            )
+        return render(self.angewandte_chemie_runs(entry, **kwargs), formated)
+
+    def cite_by_rules(
+        self,
+        rules: dict[str, dict[str, dict[str, str]]],
+        entry=None,
+        formated: bool = True,
+    ) -> str:
+        """Generate the citation by declarative rules, see `compile_style` for their structure.
+        The rules are compiled once and cached, so citing many references by the same rules is cheap.
+
+        Args:
+            rules (dict[str, dict[str, dict[str, str]]]): Type of reference -> field -> options.
+            entry (Reference, optional): Entries to cite. Defaults to None (`entry`).
+            formated (bool, optional): Apply bold and italic as terminal styles. Defaults to True.
+
+        Returns:
+            str: Citation
+        """
+        from .styles import compile_style
+
+        if entry is None:
+            entry = self.entry
+        return compile_style(rules).format(entry, formated)
 
     def rename_pdf_to_angewandte_citing_style(self):
         if self.filepath:
@@ -1067,13 +1655,135 @@ class RIS:
             return new_filepath
 
 
+_citer = None
+
+
+def _citation_function(style=None, **kwargs):
+    """Function `cite(entry, formated)` of the style: None for `RIS.angewandte_chemie_style` (with `kwargs`), citation rules (see `compile_style`) or a callable `style(entry, formated)`."""
+    global _citer
+    if style is None:
+        if _citer is None:
+            # angewandte_chemie_style only needs the entry, not the state of a RIS object
+            _citer = RIS.__new__(RIS)
+        angewandte_chemie_style = _citer.angewandte_chemie_style
+        return lambda entry, formated: angewandte_chemie_style(
+            entry, formated, **kwargs
+        )
+    if isinstance(style, dict):
+        from .styles import compile_style
+
+        return compile_style(style).format
+    return style
+
+
+def _cite_chunk(entries: list, style, formated: bool, kwargs: dict) -> list:
+    """Citations of a chunk of entries, runs in a worker process of `iter_bibliography`."""
+    cite = _citation_function(style, **kwargs)
+    return [cite(entry, formated) for entry in entries]
+
+
+def _iter_chunks(iterable, size: int):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_bibliography(
+    references,
+    style=None,
+    formated: bool = True,
+    start: int = 1,
+    template: str = "[{number}]\t{citation}",
+    processes: int = None,
+    chunk_size: int = 256,
+    **kwargs,
+):
+    """Yield the numbered citations of the references one at a time.
+    Numbers follow the order of the references, also when the citations are formatted in a process pool.
+
+    Args:
+        references (Iterable[RIS | Reference]): References to cite; RIS objects contribute all their references.
+        style (dict | Callable, optional): Citation rules (see `compile_style`) or a callable `style(entry, formated)`; must be picklable if `processes` is used. Defaults to None (`RIS.angewandte_chemie_style`).
+        formated (bool | str, optional): Apply bold and italic as terminal styles, False for plain text or the name of another output format, e.g. 'html' or 'rtf' (see `render`). Defaults to True.
+        start (int, optional): Number of the first citation. Defaults to 1.
+        template (str, optional): Line of one citation with the placeholders {number} and {citation}. Defaults to "[{number}]\t{citation}".
+        processes (int, optional): Number of worker processes formatting chunks of `chunk_size` references, worth it for very large bibliographies only. Defaults to None (format in this process).
+        chunk_size (int, optional): Number of references per task of a worker process. Defaults to 256.
+        **kwargs: Options of `angewandte_chemie_style` if no style is given.
+
+    Yields:
+        str: Numbered citation
+    """
+    entries = _iter_references(references)
+    if not processes:
+        cite = _citation_function(style, **kwargs)
+        citations = (cite(entry, formated) for entry in entries)
+    else:
+        citations = _iter_citations_in_pool(
+            entries, style, formated, kwargs, processes, chunk_size
+        )
+    for number, citation in enumerate(citations, start):
+        yield template.format(number=number, citation=citation)
+
+
+def _iter_citations_in_pool(entries, style, formated, kwargs, processes, chunk_size):
+    """Citations formatted by a process pool, in order; at most two chunks per process are in flight."""
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        for chunk in _iter_chunks(entries, chunk_size):
+            pending.append(executor.submit(_cite_chunk, chunk, style, formated, kwargs))
+            if len(pending) >= 2 * processes:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_bibliography(
+    references,
+    fp,
+    style=None,
+    formated: bool = False,
+    encoding: str = "utf-8",
+    **kwargs,
+) -> int:
+    """Write the numbered citations of the references line by line, see `iter_bibliography`.
+
+    Args:
+        references (Iterable[RIS | Reference]): References to cite.
+        fp (str | TextIO): Path or text file object to write to.
+        style (dict | Callable, optional): See `iter_bibliography`. Defaults to None (Angewandte Chemie).
+        formated (bool | str, optional): Apply bold and italic as terminal styles or the name of another output format (see `render`); 'rtf' writes a complete RTF document with one paragraph per citation. Defaults to False.
+        encoding (str, optional): Encoding if `fp` is a path. Defaults to "utf-8".
+        **kwargs: Further options of `iter_bibliography`.
+
+    Returns:
+        int: Number of citations written
+    """
+    if isinstance(fp, (str, os.PathLike)):
+        with open(fp, "w", encoding=encoding) as f:
+            return write_bibliography(references, f, style, formated, **kwargs)
+    lines = iter_bibliography(references, style, formated, **kwargs)
+    if formated == "rtf":
+        count = 0
+        for chunk in rtf_document(line.replace("\t", "\\tab ") for line in lines):
+            fp.write(chunk)
+            count += 1
+        return count - 2
+    count = 0
+    for line in lines:
+        fp.write(line)
+        fp.write("\n")
+        count += 1
+    return count
+
+
 def chain_references_to_string_list_qutotes_Angewandte_Chemie(references: list[RIS]):
-    refs = []
-    for r in references:
-        for rr in r.references:
-            re = r.angewandte_chemie_style(rr)
-            refs.append(re)
-    out = ""
-    for i, r in enumerate(refs):
-        out += f"[{i+1}]\t{r}\n"
-    return out.strip()
+    return "\n".join(iter_bibliography(references)).strip()
@@ -0,0 +1,242 @@
+import html
+from typing import NamedTuple
+
+
+class Run(NamedTuple):
+    """Piece of a citation with one formatting."""
+
+    text: str
+    bold: bool = False
+    italic: bool = False
+
+
+class Citation(list):
+    """Citation as a list of `Run`s, independent of the output format.
+    A style builds it once per reference, the emitters (`render`, `emitters`) turn it into ANSI, plain text, HTML, Markdown, LaTeX or RTF.
+    Adjacent runs with the same formatting are merged and empty runs are dropped, so the runs are the plain text split at every change of formatting.
+    """
+
+    __slots__ = ()
+
+    def add(self, text: str, bold: bool = False, italic: bool = False):
+        """Append text with the given formatting."""
+        if not text:
+            return
+        if self:
+            last = self[-1]
+            if last.bold == bold and last.italic == italic:
+                self[-1] = Run(last.text + text, bold, italic)
+                return
+        self.append(Run(text, bold, italic))
+
+    def __str__(self) -> str:
+        return "".join(run.text for run in self)
+
+    def _splice(self, start: int, end: int, text: str = ""):
+        """Replace the characters [start, end) of the plain text by `text`, which takes the formatting of the run containing `start`."""
+        position = 0
+        runs = []
+        inserted = not text
+        for run in self:
+            length = len(run.text)
+            s = min(max(start - position, 0), length)
+            e = min(max(end - position, 0), length)
+            new = run.text[:s]
+            if not inserted and start < position + length:
+                new += text
+                inserted = True
+            new += run.text[e:]
+            runs.append(run._replace(text=new))
+            position += length
+        if not inserted:
+            runs.append(Run(text))
+        self[:] = []
+        for run in runs:
+            self.add(*run)
+
+    def replace_text(self, old: str, new: str):
+        """`str.replace` on the plain text, keeping the formatting of the remaining characters."""
+        text = str(self)
+        i = text.find(old)
+        if i == -1:
+            return
+        occurrences = []
+        while i != -1:
+            occurrences.append(i)
+            i = text.find(old, i + len(old))
+        for i in reversed(occurrences):
+            self._splice(i, i + len(old), new)
+
+    def rstrip_text(self, chars: str = None):
+        """`str.rstrip` on the plain text."""
+        while self:
+            last = self[-1]
+            text = last.text.rstrip(chars)
+            if text:
+                if len(text) < len(last.text):
+                    self[-1] = last._replace(text=text)
+                return
+            self.pop()
+
+    def format_all(self, bold: bool = None, italic: bool = None):
+        """Set bold and/or italic for every run."""
+        runs = [
+            Run(
+                run.text,
+                run.bold if bold is None else bold,
+                run.italic if italic is None else italic,
+            )
+            for run in self
+        ]
+        self[:] = []
+        for run in runs:
+            self.add(*run)
+
+    def render(self, output="plain") -> str:
+        """The citation in the output format, see `render`."""
+        return render(self, output)
+
+
+_ansi = None
+
+
+def _ansi_codes() -> tuple:
+    """Bold on/off and italic on/off of `colorful_terminal.Style`, imported on first use."""
+    global _ansi
+    if _ansi is None:
+        from colorful_terminal import Style
+
+        _ansi = (Style.BOLD, Style.NOT_BOLD, Style.ITALIC, Style.NOT_ITALIC)
+    return _ansi
+
+
+def _wrap(runs, bold: tuple, italic: tuple, escape=None) -> str:
+    out = []
+    for text, is_bold, is_italic in runs:
+        if escape is not None:
+            text = escape(text)
+        if is_italic:
+            text = italic[0] + text + italic[1]
+        if is_bold:
+            text = bold[0] + text + bold[1]
+        out.append(text)
+    return "".join(out)
+
+
+def to_plain(runs) -> str:
+    return "".join(run.text for run in runs)
+
+
+def to_ansi(runs) -> str:
+    """Terminal styles of `colorful_terminal`, as in `RIS.angewandte_chemie_style(formated=True)`."""
+    bold_on, bold_off, italic_on, italic_off = _ansi_codes()
+    return _wrap(runs, (bold_on, bold_off), (italic_on, italic_off))
+
+
+def to_html(runs) -> str:
+    return _wrap(
+        runs, ("<b>", "</b>"), ("<i>", "</i>"), lambda t: html.escape(t, False)
+    )
+
+
+_markdown_specials = str.maketrans({c: "\\" + c for c in "\\`*_{}[]<>#|"})
+
+
+def to_markdown(runs) -> str:
+    """Markdown with `**bold**` and `*italic*`; whitespace at the edges of a run stays outside the markers."""
+    out = []
+    for text, bold, italic in runs:
+        text = text.translate(_markdown_specials)
+        marker = "**" * bold + "*" * italic
+        if marker and text.strip():
+            core = text.strip()
+            start = text.index(core[0])
+            text = text[:start] + marker + core + marker + text[start + len(core) :]
+        out.append(text)
+    return "".join(out)
+
+
+_latex_specials = str.maketrans(
+    {
+        "\\": r"\textbackslash{}",
+        "~": r"\textasciitilde{}",
+        "^": r"\textasciicircum{}",
+        **{c: "\\" + c for c in "&%$#_{}"},
+    }
+)
+
+
+def to_latex(runs) -> str:
+    return _wrap(
+        runs,
+        ("\\textbf{", "}"),
+        ("\\textit{", "}"),
+        lambda t: t.translate(_latex_specials),
+    )
+
+
+def _rtf_escape(text: str) -> str:
+    out = []
+    for c in text:
+        if c in "\\{}":
+            out.append("\\" + c)
+        elif c == "\t":
+            out.append("\\tab ")
+        elif c == "\n":
+            out.append("\\line ")
+        elif ord(c) < 128:
+            out.append(c)
+        else:
+            # \u takes signed 16 bit values, characters outside the BMP as surrogate pairs
+            data = c.encode("utf-16-le")
+            for i in range(0, len(data), 2):
+                unit = int.from_bytes(data[i : i + 2], "little", signed=True)
+                out.append(f"\\u{unit}?")
+    return "".join(out)
+
+
+def to_rtf(runs) -> str:
+    """RTF fragment with `{\\b ...}` and `{\\i ...}` groups, see `rtf_document` for a complete document."""
+    return _wrap(runs, ("{\\b ", "}"), ("{\\i ", "}"), _rtf_escape)
+
+
+def rtf_document(paragraphs):
+    """Yield the chunks of an RTF document with one paragraph per RTF fragment, e.g. of `to_rtf`."""
+    yield "{\\rtf1\\ansi\\deff0{\\fonttbl{\\f0 Times New Roman;}}\\f0\\fs24\n"
+    for paragraph in paragraphs:
+        yield paragraph + "\\par\n"
+    yield "}\n"
+
+
+emitters = {
+    "plain": to_plain,
+    "ansi": to_ansi,
+    "html": to_html,
+    "markdown": to_markdown,
+    "latex": to_latex,
+    "rtf": to_rtf,
+}
+"Emitters by output name, each turning the runs of a `Citation` into a string"
+
+
+def render(runs, output="plain") -> str:
+    """Render the runs of a citation.
+
+    Args:
+        runs (Iterable[Run]): Runs, e.g. a `Citation`.
+        output (str | bool, optional): Name of one of the `emitters`, True for 'ansi' or False for 'plain' (the values of `formated` of the styles). Defaults to "plain".
+
+    Returns:
+        str: Citation in the output format
+    """
+    if output is True:
+        return to_ansi(runs)
+    if output is False:
+        return to_plain(runs)
+    try:
+        emitter = emitters[output]
+    except KeyError:
+        raise ValueError(
+            f"Unknown citation output {output!r}, use one of {', '.join(emitters)}"
+        ) from None
+    return emitter(runs)
@@ -0,0 +1,414 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+
+from .dedup import _author_tags, _year, normalize_reference_doi, normalize_text
+from .journals import _journal_name, normalize_journal_name
+from .ris import Reference, _citation_function, _iter_references, iter_ris, write_ris
+from .styles import _type_codes
+
+_title_tags = ("TI", "T1")
+_abstract_tags = ("AB", "N2")
+_keyword_tag = "KW"
+_person_tags = _author_tags + ("ED",)
+_fts_token_pattern = re.compile(r"\w+\*?")
+
+_schema = """
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    type TEXT,
+    doi TEXT,
+    year INTEGER,
+    journal TEXT,
+    journal_key TEXT,
+    title TEXT,
+    abstract TEXT,
+    source TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_doi ON refs (doi);
+CREATE INDEX IF NOT EXISTS refs_year ON refs (year);
+CREATE INDEX IF NOT EXISTS refs_journal ON refs (journal_key);
+CREATE INDEX IF NOT EXISTS refs_type ON refs (type);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    last_name_key TEXT NOT NULL,
+    name_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS authors_last_name ON authors (last_name_key);
+CREATE TABLE IF NOT EXISTS ref_authors (
+    ref_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (ref_id, role, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ref_authors_author ON ref_authors (author_id);
+CREATE TABLE IF NOT EXISTS keywords (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS ref_keywords (
+    ref_id INTEGER NOT NULL,
+    keyword_id INTEGER NOT NULL,
+    PRIMARY KEY (ref_id, keyword_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ref_keywords_keyword ON ref_keywords (keyword_id);
+"""
+
+
+def _values(entry, tags) -> list:
+    values = []
+    for tag in tags:
+        value = entry.get(tag)
+        if isinstance(value, (list, tuple)):
+            values.extend(v for v in value if v)
+        elif value:
+            values.append(value)
+    return values
+
+
+def _first_value(entry, tags):
+    values = _values(entry, tags)
+    return values[0] if values else None
+
+
+def _reference(data: str) -> Reference:
+    reference = Reference()
+    reference._data = {
+        sys.intern(tag): value for tag, value in json.loads(data).items()
+    }
+    return reference
+
+
+def _fts_query(text: str) -> str:
+    """FTS5 query of free text: every word must occur, a trailing '*' searches a prefix; FTS5 syntax in the text is not interpreted."""
+    terms = []
+    for token in _fts_token_pattern.findall(text):
+        if token.endswith("*"):
+            terms.append(f'"{token[:-1]}"*')
+        else:
+            terms.append(f'"{token}"')
+    return " ".join(terms)
+
+
+class ReferenceStore:
+    """SQLite database of references for fast queries over large libraries.
+    References are kept as they are (all tags) next to indexed columns for DOI, year, journal and type, normalized tables of authors and keywords
+    and an FTS5 full-text index of titles and abstracts. Query results are streamed as `Reference` records, RIS or citations.
+
+    Usage:
+        with ReferenceStore("library.sqlite") as store:
+            store.add_files(ris_paths)
+            for reference in store.search(author="Müller", year=(2015, 2020), text="catalysis"):
+                ...
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """
+        Args:
+            path (str, optional): SQLite database file. Defaults to ":memory:".
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30)
+        with self._connection:
+            self._connection.executescript(_schema)
+        try:
+            with self._connection:
+                self._connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS refs_text USING fts5(title, abstract, content='refs', content_rowid='id')"
+                )
+            self.full_text = True
+            "Whether SQLite supports FTS5; without it free text queries scan titles and abstracts"
+        except sqlite3.OperationalError:
+            self.full_text = False
+        self._author_ids = None
+        self._keyword_ids = None
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+
+    def _ids(self, table: str, column: str) -> dict:
+        return dict(self._connection.execute(f"SELECT {column}, id FROM {table}"))
+
+    def add(self, references, source: str = None, batch_size: int = 10_000) -> int:
+        """Insert references in batches within one transaction.
+
+        Args:
+            references (Iterable[Reference | dict | RIS]): References to store; RIS objects contribute all their references.
+            source (str, optional): Origin stored with each reference, e.g. the path of the RIS file. Defaults to None.
+            batch_size (int, optional): Number of references per batch of inserts. Defaults to 10_000.
+
+        Returns:
+            int: Number of references added
+        """
+        connection = self._connection
+        if self._author_ids is None:
+            self._author_ids = self._ids("authors", "name")
+            self._keyword_ids = self._ids("keywords", "keyword")
+        count = 0
+        try:
+            with connection:
+                # The next ids are read in the write transaction, so no other writer can take them
+                connection.execute("BEGIN IMMEDIATE")
+                next_ids = {
+                    table: (
+                        connection.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+                        or 0
+                    )
+                    + 1
+                    for table in ("refs", "authors", "keywords")
+                }
+                batch = []
+                for entry in _iter_references(references):
+                    batch.append(entry)
+                    if len(batch) >= batch_size:
+                        self._insert(batch, next_ids, source)
+                        count += len(batch)
+                        batch = []
+                self._insert(batch, next_ids, source)
+                count += len(batch)
+        except BaseException:
+            # The ids of authors and keywords of the rolled back batches are invalid
+            self._author_ids = self._keyword_ids = None
+            raise
+        return count
+
+    def _insert(self, entries: list, next_ids: dict, source: str):
+        """Insert the entries, taking the ids of new references, authors and keywords from `next_ids` (table -> next free id)."""
+        connection = self._connection
+        author_ids = self._author_ids
+        keyword_ids = self._keyword_ids
+        refs = []
+        new_authors = []
+        ref_authors = []
+        new_keywords = []
+        ref_keywords = []
+        for entry in entries:
+            ref_id = next_ids["refs"]
+            next_ids["refs"] += 1
+            tags = entry.tags if isinstance(entry, Reference) else Reference(entry).tags
+            doi = _first_value(tags, ("DO",))
+            year = _year(tags)
+            journal = _journal_name(tags)
+            title = _first_value(tags, _title_tags)
+            abstract = _first_value(tags, _abstract_tags)
+            refs.append(
+                (
+                    ref_id,
+                    _first_value(tags, ("TY",)),
+                    normalize_reference_doi(doi) if doi else None,
+                    int(year) if year else None,
+                    journal,
+                    normalize_journal_name(journal) if journal else None,
+                    title,
+                    abstract,
+                    source,
+                    json.dumps(tags, ensure_ascii=False),
+                )
+            )
+            for role in _person_tags:
+                for position, name in enumerate(_values(tags, (role,))):
+                    author_id = author_ids.get(name)
+                    if author_id is None:
+                        author_id = author_ids[name] = next_ids["authors"]
+                        next_ids["authors"] += 1
+                        new_authors.append(
+                            (
+                                author_id,
+                                name,
+                                normalize_text(name.split(",")[0]),
+                                normalize_text(name),
+                            )
+                        )
+                    ref_authors.append((ref_id, author_id, role, position))
+            for keyword in dict.fromkeys(
+                normalize_text(k) for k in _values(tags, (_keyword_tag,))
+            ):
+                if not keyword:
+                    continue
+                keyword_id = keyword_ids.get(keyword)
+                if keyword_id is None:
+                    keyword_id = keyword_ids[keyword] = next_ids["keywords"]
+                    next_ids["keywords"] += 1
+                    new_keywords.append((keyword_id, keyword))
+                ref_keywords.append((ref_id, keyword_id))
+
+        connection.executemany(
+            "INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", refs
+        )
+        connection.executemany("INSERT INTO authors VALUES (?, ?, ?, ?)", new_authors)
+        connection.executemany(
+            "INSERT INTO ref_authors VALUES (?, ?, ?, ?)", ref_authors
+        )
+        connection.executemany("INSERT INTO keywords VALUES (?, ?)", new_keywords)
+        connection.executemany("INSERT INTO ref_keywords VALUES (?, ?)", ref_keywords)
+        if self.full_text:
+            connection.executemany(
+                "INSERT INTO refs_text (rowid, title, abstract) VALUES (?, ?, ?)",
+                [(row[0], row[6], row[7]) for row in refs if row[6] or row[7]],
+            )
+
+    def add_files(self, paths, encoding: str = "utf-8") -> int:
+        """Stream the references of RIS files into the store, see `add`; each reference keeps the path of its file as source.
+
+        Returns:
+            int: Number of references added
+        """
+        count = 0
+        for path in paths:
+            count += self.add(iter_ris(path, encoding), source=os.fspath(path))
+        return count
+
+    def _query(
+        self,
+        columns: str,
+        text: str = None,
+        author: str = None,
+        year=None,
+        journal: str = None,
+        type_of_reference: str = None,
+        doi: str = None,
+        keyword: str = None,
+        limit: int = None,
+        offset: int = 0,
+    ):
+        conditions = []
+        parameters = []
+        order = "refs.id"
+        source = "refs"
+        if text:
+            query = _fts_query(text)
+            if not query:
+                # No words to search for, e.g. only punctuation
+                conditions.append("0")
+            elif self.full_text:
+                source = "refs_text JOIN refs ON refs.id = refs_text.rowid"
+                conditions.append("refs_text MATCH ?")
+                parameters.append(query)
+                order = "refs_text.rank"
+            else:
+                for word in _fts_token_pattern.findall(text):
+                    conditions.append("(refs.title LIKE ? OR refs.abstract LIKE ?)")
+                    parameters += [f"%{word.rstrip('*')}%"] * 2
+        if author:
+            last_name, _, first_names = author.partition(",")
+            condition = "refs.id IN (SELECT ref_authors.ref_id FROM ref_authors JOIN authors ON authors.id = ref_authors.author_id WHERE authors.last_name_key = ?"
+            parameters.append(normalize_text(last_name))
+            if first_names.strip():
+                condition += " AND authors.name_key LIKE ?"
+                parameters.append(normalize_text(author) + "%")
+            conditions.append(condition + ")")
+        if year is not None:
+            if isinstance(year, (tuple, list)):
+                start, end = year
+                if start is not None:
+                    conditions.append("refs.year >= ?")
+                    parameters.append(int(start))
+                if end is not None:
+                    conditions.append("refs.year <= ?")
+                    parameters.append(int(end))
+            else:
+                conditions.append("refs.year = ?")
+                parameters.append(int(year))
+        if journal:
+            conditions.append("refs.journal_key = ?")
+            parameters.append(normalize_journal_name(journal))
+        if type_of_reference:
+            conditions.append("refs.type = ?")
+            parameters.append(_type_codes.get(type_of_reference, type_of_reference))
+        if doi:
+            conditions.append("refs.doi = ?")
+            parameters.append(normalize_reference_doi(doi))
+        if keyword:
+            conditions.append(
+                "refs.id IN (SELECT ref_keywords.ref_id FROM ref_keywords JOIN keywords ON keywords.id = ref_keywords.keyword_id WHERE keywords.keyword = ?)"
+            )
+            parameters.append(normalize_text(keyword))
+        sql = f"SELECT {columns} FROM {source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if columns != "COUNT(*)":
+            sql += f" ORDER BY {order}"
+            if limit is not None or offset:
+                sql += " LIMIT ? OFFSET ?"
+                parameters += [-1 if limit is None else limit, offset]
+        return self._connection.execute(sql, parameters)
+
+    def search(self, **filters):
+        """Yield the references matching all given filters, streamed from the database.
+
+        Args:
+            text (str, optional): Words that must all occur in the title or abstract (full-text search, results ordered by relevance); a trailing '*' matches a prefix.
+            author (str, optional): Last name of an author or editor ('Müller') or last name and first names ('Müller, H'), case and accent insensitive.
+            year (int | tuple, optional): Year or inclusive range (start, end), None for an open end.
+            journal (str, optional): Journal name, compared like `normalize_journal_name`.
+            type_of_reference (str, optional): RIS code ('JOUR') or long name ('Journal').
+            doi (str, optional): DOI, with or without resolver prefix.
+            keyword (str, optional): Keyword (KW), case and accent insensitive.
+            limit (int, optional): Maximum number of references.
+            offset (int, optional): Number of matching references to skip.
+
+        Yields:
+            Reference: Matching references, ordered by relevance for text queries and by insertion otherwise.
+        """
+        for (data,) in self._query("refs.data", **filters):
+            yield _reference(data)
+
+    def ids(self, **filters) -> list:
+        """Ids of the matching references, see `search` for the filters."""
+        return [row[0] for row in self._query("refs.id", **filters)]
+
+    def count(self, **filters) -> int:
+        """Number of matching references, see `search` for the filters."""
+        return self._query("COUNT(*)", **filters).fetchone()[0]
+
+    def get(self, ref_id: int) -> Reference:
+        """The reference with the id, see `ids`.
+
+        Raises:
+            KeyError: No reference has the id.
+        """
+        row = self._connection.execute(
+            "SELECT data FROM refs WHERE id = ?", (ref_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(ref_id)
+        return _reference(row[0])
+
+    def write_ris(self, fp, encoding: str = "utf-8", **filters) -> int:
+        """Write the matching references to a RIS file, see `write_ris` and `search`.
+
+        Returns:
+            int: Number of references written
+        """
+        return write_ris(self.search(**filters), fp, encoding)
+
+    def citations(
+        self, style=None, formated=False, style_options: dict = None, **filters
+    ):
+        """Yield the citations of the matching references, see `iter_bibliography` for style and formated and `search` for the filters.
+
+        Args:
+            style (dict | Callable, optional): Citation rules or a callable `style(entry, formated)`. Defaults to None (Angewandte Chemie).
+            formated (bool | str, optional): Terminal styles, plain text (False) or the name of an output format such as 'html'. Defaults to False.
+            style_options (dict, optional): Options of `angewandte_chemie_style` if no style is given. Defaults to None.
+
+        Yields:
+            str: Citation
+        """
+        cite = _citation_function(style, **(style_options or {}))
+        for reference in self.search(**filters):
+            yield cite(reference, formated)
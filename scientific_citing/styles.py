@@ -0,0 +1,314 @@
+import copy
+import json
+
+from .ris import Reference, _name_to_tag, abbreviation_to_type_of_reference
+from .runs import Citation, render
+
+_author_tags = ("A1", "A2", "A3", "A4", "AU")
+_title_tags = ("TI", "T1", "T2", "T3", "ST")
+_journal_tags = ("JF", "JO", "BT")
+_year_tags = ("PY", "Y1", "DA")
+
+_type_codes = {name: code for code, name in abbreviation_to_type_of_reference.items()}
+"Code of each long name in `abbreviation_to_type_of_reference`"
+
+
+def _flag(value) -> bool:
+    """Option value as bool; the spec may use strings such as 'true' or 'no'."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y", "on")
+    return bool(value)
+
+
+def _first(value):
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value
+
+
+def _all(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _first_of(tags):
+    """Accessor for the first non-empty value of the tags."""
+    if len(tags) == 1:
+        tag = tags[0]
+
+        def get(entry):
+            return _first(entry.get(tag))
+
+        return get
+
+    def get(entry):
+        for tag in tags:
+            value = _first(entry.get(tag))
+            if value:
+                return value
+        return None
+
+    return get
+
+
+def _format_name(name: str, template: str) -> str:
+    """'Last, First Middle' formatted by the template, names without a comma are kept as they are."""
+    if "," not in name:
+        return name
+    last, first = name.split(",", 1)
+    last = last.strip()
+    first = first.strip()
+    initials = " ".join(part[0] + "." for part in first.split() if part)
+    return template.format(last=last, first=first, initials=initials).strip()
+
+
+def _names(tags, options: dict):
+    """Accessor for a list of persons (authors or editors) formatted by the options."""
+    template = options.get("format", "{initials} {last}")
+    separator = options.get("separator", ", ")
+    et_al = int(options.get("et_al", 0))
+    et_al_text = options.get("et_al_text", " et al.")
+
+    def get(entry):
+        names = []
+        seen = set()
+        for tag in tags:
+            for name in _all(entry.get(tag)):
+                name = name.strip()
+                if name and name not in seen:
+                    seen.add(name)
+                    names.append(name)
+        if not names:
+            return None
+        if et_al and len(names) > et_al:
+            return _format_name(names[0], template) + et_al_text
+        return separator.join(_format_name(name, template) for name in names)
+
+    return get
+
+
+def _journal(options: dict):
+    get_name = _first_of(_journal_tags)
+    delete = options.get("delete", "")
+    abbreviate = _flag(options.get("abbreviate", False))
+    fuzzy = _flag(options.get("fuzzy", False))
+    get_abbreviation = _first_of(("JA",))
+
+    def get(entry):
+        name = get_name(entry)
+        if not name:
+            return None
+        if abbreviate:
+            from .journals import abbreviate_journal
+
+            # An abbreviation stored in JA, e.g. by `abbreviate_journals`, takes precedence
+            name = get_abbreviation(entry) or abbreviate_journal(name, fuzzy)
+        for char in delete:
+            name = name.replace(char, "")
+        return name
+
+    return get
+
+
+def _year(entry):
+    value = _first_of(_year_tags)(entry)
+    if not value:
+        return None
+    return value.split("/")[0].strip() or None
+
+
+def _pages(options: dict):
+    include_end_page = _flag(options.get("end_page", True))
+    page_range = options.get("range", "–")
+
+    def get(entry):
+        start = _first(entry.get("SP"))
+        if not start:
+            return None
+        end = _first(entry.get("EP"))
+        if include_end_page and end and end != start:
+            return start + page_range + end
+        return start
+
+    return get
+
+
+def _type(entry):
+    return abbreviation_to_type_of_reference.get(_first(entry.get("TY")))
+
+
+def _accessor(field: str, options: dict):
+    """Prebound function returning the value of the field of an entry or None."""
+    if "text" in options:
+        text = options["text"]
+        return lambda entry: text
+    if field == "authors":
+        return _names(_author_tags, options)
+    if field == "editors":
+        return _names(("ED",), options)
+    if field == "title":
+        return _first_of(_title_tags)
+    if field == "journal":
+        return _journal(options)
+    if field == "year":
+        return _year
+    if field == "pages":
+        return _pages(options)
+    if field == "type":
+        return _type
+    tag = _name_to_tag.get(field, field)
+    if len(tag) != 2:
+        raise ValueError(f"Unknown field in citation rules: {field!r}")
+    return _first_of((tag,))
+
+
+def _compile_fields(fields: dict) -> tuple:
+    """Compile the field options of one type of reference into (accessor, prefix, suffix, bold, italic) tuples and the ending."""
+    parts = []
+    end = "."
+    for field, options in fields.items():
+        options = options or {}
+        if field == "_end":
+            end = options.get("text", end)
+            continue
+        prefix = options.get("prefix", "")
+        suffix = options.get("suffix", ", ")
+        parts.append(
+            (
+                _accessor(field, options),
+                prefix,
+                suffix,
+                _flag(options.get("bold", False)),
+                _flag(options.get("italic", False)),
+            )
+        )
+    return tuple(parts), end
+
+
+class CompiledStyle:
+    """Citation style compiled from declarative rules, see `compile_style`.
+    The rules are compiled once into tuples of prebound field accessors per type of reference, so formatting an entry is a single pass over its fields.
+    """
+
+    def __init__(self, rules: dict) -> None:
+        """
+        Args:
+            rules (dict): Rules as described in `compile_style`.
+        """
+        self.rules = rules = copy.deepcopy(rules)
+        self._key = ("style", json.dumps(rules, default=str))
+        "Key of the memoized citations in `Reference.cached`"
+        by_code = {}
+        default = None
+        for key, fields in rules.items():
+            if key == "default":
+                default = fields
+            else:
+                by_code[_type_codes.get(key, key)] = fields
+        self._fields = by_code
+        self._default = default
+        self._compiled = {}
+
+    def _formatter(self, code: str):
+        try:
+            return self._compiled[code]
+        except KeyError:
+            pass
+        fields = self._fields.get(code, self._default)
+        compiled = None
+        if fields is not None:
+            compiled = _compile_fields(fields)
+        self._compiled[code] = compiled
+        return compiled
+
+    def _compiled_fields(self, entry) -> tuple:
+        compiled = self._formatter(_first(entry.get("TY")))
+        if compiled is None:
+            raise KeyError(
+                f"No citation rules for the type of reference {entry.get('TY')!r} and no 'default' rules"
+            )
+        return compiled
+
+    def runs(self, entry) -> Citation:
+        """Citation of the entry as format-neutral runs, see `Citation`.
+
+        Raises:
+            KeyError: Neither the type of the reference nor 'default' is in the rules.
+        """
+        parts, end = self._compiled_fields(entry)
+        out = Citation()
+        for get, prefix, suffix, bold, italic in parts:
+            value = get(entry)
+            if value:
+                out.add(prefix)
+                out.add(value, bold, italic)
+                out.add(suffix)
+        out.rstrip_text(", ;:")
+        if not str(out).endswith(end):
+            out.add(end)
+        return out
+
+    def format(self, entry, formated: bool = True) -> str:
+        """Citation of the entry rendered from its `runs`, memoized per `Reference` (see `Reference.cached`).
+
+        Args:
+            entry (Reference | dict): Entries of the reference.
+            formated (bool | str, optional): Apply bold and italic as terminal styles, False for plain text or the name of another output format, e.g. 'html' (see `render`). Defaults to True.
+
+        Raises:
+            KeyError: Neither the type of the reference nor 'default' is in the rules.
+
+        Returns:
+            str: Citation
+        """
+        if isinstance(entry, Reference):
+            # The runs are built once and rendered once per output format
+            return entry.cached(
+                (self._key, formated),
+                lambda e: render(e.cached((self._key, "runs"), self.runs), formated),
+            )
+        return render(self.runs(entry), formated)
+
+    def format_many(self, entries, formated: bool = True) -> list:
+        """Citations of many entries, see `format`."""
+        format = self.format
+        return [format(entry, formated) for entry in entries]
+
+
+_compiled_styles = {}
+_max_compiled_styles = 256
+
+
+def compile_style(rules: dict) -> CompiledStyle:
+    """Compile citation rules, the result is cached for equal rules.
+
+    The rules map a type of reference (RIS code such as 'JOUR', its long name such as 'Journal' or 'default' for all other types) to the fields of the citation in order.
+    Each field maps to its options:
+        - Fields: a RIS tag or its name in `secondary_abbreviations` (e.g. 'VL' or 'Volume number') or one of 'authors', 'editors', 'title', 'journal', 'year', 'pages' and 'type'.
+        - 'prefix' / 'suffix': Text before / after the value. The suffix defaults to ', '.
+        - 'bold' / 'italic': Format the value.
+        - 'text': Literal text instead of a value.
+        - authors / editors: 'format' of each name with {last}, {first} and {initials} (default '{initials} {last}'), 'separator' (default ', '), 'et_al' (list only the first if there are more names) and 'et_al_text' (default ' et al.').
+        - journal: 'abbreviate' (the abbreviation in JA if there is one, otherwise by CASSI; 'fuzzy' also accepts close matches of the name) and characters to 'delete'.
+        - pages: 'end_page' (default True) and the 'range' separator (default '–').
+    Fields without a value are skipped including prefix and suffix. Trailing separators are removed and the citation ends with the 'text' of the field '_end' (default '.') unless it already does.
+
+    Example:
+        {"JOUR": {"authors": {"et_al": "10"}, "journal": {"italic": "true", "delete": ","}, "year": {"bold": "true"}, "VL": {"italic": "true"}, "pages": {}}}
+
+    Args:
+        rules (dict[str, dict[str, dict[str, str]]]): Citation rules
+
+    Returns:
+        CompiledStyle: Compiled style
+    """
+    key = json.dumps(rules, default=str)
+    style = _compiled_styles.get(key)
+    if style is None:
+        if len(_compiled_styles) >= _max_compiled_styles:
+            _compiled_styles.clear()
+        style = _compiled_styles[key] = CompiledStyle(rules)
+    return style
@@ -0,0 +1,215 @@
+import os
+import time
+from typing import NamedTuple
+
+from .ingest import ingest_directory, iter_pdfs
+from .pdf_cache import file_digest
+
+
+class ManifestEntry(NamedTuple):
+    """State of one PDF in the sync manifest. `path` is relative to the root of the library."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+    doi: str = None
+    ris_path: str = None
+    source_path: str = None
+    "Path the PDF had when it was processed, before it was renamed or moved"
+    stage: str = None
+    "Stage that failed, see `IngestResult`"
+    error: str = None
+    processed: float = None
+
+
+class SyncReport(NamedTuple):
+    """Outcome of `sync_directory`."""
+
+    processed: list
+    "`IngestResult` of every new or changed PDF"
+    unchanged: int
+    "Number of PDFs skipped as unchanged"
+    moved: list
+    "(old path, new path) of known PDFs found at another path"
+    removed: list
+    "Paths of known PDFs that no longer exist"
+    failed: list
+    "`IngestResult` of every processed PDF that failed, also part of `processed`"
+
+
+class SyncManifest:
+    """SQLite manifest of the PDFs of a library processed by `sync_directory`: identity (path, size, mtime, content hash) and result (DOI, ris path, original path, error)."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): SQLite database file.
+        """
+        import sqlite3
+
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT, doi TEXT, ris_path TEXT, source_path TEXT, stage TEXT, error TEXT, processed REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS files_digest ON files (digest)"
+            )
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def entries(self) -> dict:
+        """All entries by path."""
+        return {
+            row[0]: ManifestEntry(*row)
+            for row in self._connection.execute("SELECT * FROM files")
+        }
+
+    def put(self, entries):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                entries,
+            )
+
+    def remove(self, paths):
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM files WHERE path = ?", [(path,) for path in paths]
+            )
+
+
+def _relative(root: str, path: str):
+    return os.path.relpath(path, root) if path else path
+
+
+def sync_directory(
+    root: str,
+    manifest: str = None,
+    retry_stages=("resolve", "write"),
+    recursive: bool = True,
+    **kwargs,
+) -> SyncReport:
+    """Run `ingest_directory` incrementally: only PDFs that are new or changed since the last sync are extracted, resolved and written.
+    PDFs are recognized by size and mtime first and by their content hash otherwise, so files renamed or moved by the `rename_pdf_*` or `move_pdf_and_ris_in_title_dir` options
+    (or by hand) are not processed again.
+
+    Args:
+        root (str): Directory containing the PDFs.
+        manifest (str, optional): SQLite file of the manifest. Defaults to None ('.scientific_citing_sync.sqlite' in `root`).
+        retry_stages (tuple, optional): PDFs that failed in one of these stages are not recorded in the manifest and are processed again by the next sync;
+            failures in other stages (e.g. no DOI found) are recorded and only retried once the PDF changes. Defaults to ("resolve", "write").
+        recursive (bool, optional): Include subdirectories. Defaults to True.
+        **kwargs: Options of `ingest_directory`, e.g. `ris_dir`, `rename_pdf_to_title` or `resolver`.
+
+    Returns:
+        SyncReport: Processed, unchanged, moved, removed and failed PDFs.
+    """
+    root = os.path.abspath(root)
+    if manifest is None:
+        manifest = os.path.join(root, ".scientific_citing_sync.sqlite")
+    with SyncManifest(manifest) as store:
+        known = store.entries()
+        by_digest = {}
+        for entry in known.values():
+            by_digest.setdefault(entry.digest, entry)
+
+        seen = set()
+        updates = []
+        moved = []
+        to_process = {}
+        "Absolute path to content hash of the PDFs to process"
+        unchanged = 0
+        paths = list(iter_pdfs(root, recursive))
+        listed = {_relative(root, path) for path in paths}
+        # Known PDFs renamed without the '.pdf' extension (by earlier versions of the rename options) are followed by their stored path
+        paths += [
+            os.path.join(root, relative)
+            for relative in known
+            if relative not in listed and os.path.isfile(os.path.join(root, relative))
+        ]
+        for path in paths:
+            relative = _relative(root, path)
+            seen.add(relative)
+            stat = os.stat(path)
+            entry = known.get(relative)
+            if (
+                entry is not None
+                and entry.size == stat.st_size
+                and entry.mtime_ns == stat.st_mtime_ns
+            ):
+                if entry.stage in retry_stages:
+                    to_process[path] = entry.digest
+                else:
+                    unchanged += 1
+                continue
+            digest = file_digest(path)
+            previous = by_digest.get(digest)
+            if previous is None or previous.stage in retry_stages:
+                to_process[path] = digest
+                continue
+            # Known content at a new path (moved or copied) or with a new mtime
+            if previous.path != relative and not os.path.exists(
+                os.path.join(root, previous.path)
+            ):
+                moved.append((previous.path, relative))
+            updates.append(
+                previous._replace(
+                    path=relative, size=stat.st_size, mtime_ns=stat.st_mtime_ns
+                )
+            )
+            unchanged += 1
+
+        relocated = {old for old, new in moved}
+        removed = [path for path in known if path not in seen and path not in relocated]
+        store.remove(relocated | set(removed))
+        store.put(updates)
+
+        processed = []
+        failed = []
+        if to_process:
+            for result in ingest_directory(
+                root, recursive=recursive, pdfs=list(to_process), **kwargs
+            ):
+                processed.append(result)
+                if result.error is not None:
+                    failed.append(result)
+                    if result.stage in retry_stages:
+                        # Not recorded, so the PDF is processed again by the next sync
+                        continue
+                path = result.new_pdf_path or result.pdf_path
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # E.g. a rename or move that failed halfway
+                    if result.error is None:
+                        failed.append(result)
+                    continue
+                store.remove([_relative(root, result.pdf_path)])
+                store.put(
+                    [
+                        ManifestEntry(
+                            _relative(root, path),
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            to_process[result.pdf_path],
+                            result.doi,
+                            result.ris_path,
+                            _relative(root, result.pdf_path),
+                            result.stage,
+                            repr(result.error) if result.error is not None else None,
+                            time.time(),
+                        )
+                    ]
+                )
+
+    return SyncReport(processed, unchanged, moved, removed, failed)
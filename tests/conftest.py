@@ -0,0 +1,142 @@
+"""Synthetic inputs for the tests: minimal PDFs, canned Crossref works and an offline resolver."""
+
+import random
+import zlib
+
+import pytest
+
+_words = (
+    "catalytic asymmetric synthesis of chiral ligands for selective oxidation "
+    "photochemical reduction mechanism kinetic study novel polymer framework"
+).split()
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_words) for i in range(rng.randint(5, 10))).capitalize()
+
+
+def write_pdf(
+    path, pages: list, info: dict = None, compress: bool = False, content=None
+):
+    """Write a minimal PDF with one page per text in `pages` (Helvetica, one text line per line).
+    Texts must not contain parentheses or backslashes; `content` maps page indices to raw content streams used instead.
+    """
+    content = content or {}
+    n = len(pages)
+    font_id = 3 + 2 * n
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode(),
+    ]
+    for i, text in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        data = content.get(i)
+        if data is None:
+            body = " ".join(f"({line}) Tj 0 -14 Td" for line in text.split("\n"))
+            data = f"BT /F1 12 Tf 72 720 Td {body} ET".encode("latin-1", "replace")
+        if compress:
+            data = zlib.compress(data)
+            head = b"<< /Length %d /Filter /FlateDecode >>" % len(data)
+        else:
+            head = b"<< /Length %d >>" % len(data)
+        objects.append(head + b"\nstream\n" + data + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    info_id = None
+    if info:
+        info_id = len(objects) + 1
+        entries = " ".join(f"/{k} ({v})" for k, v in info.items())
+        objects.append(f"<< {entries} >>".encode("latin-1", "replace"))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    trailer = f"<< /Size {len(objects) + 1} /Root 1 0 R"
+    if info_id:
+        trailer += f" /Info {info_id} 0 R"
+    out += f"trailer\n{trailer} >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+    return str(path)
+
+
+def write_paper_pdf(
+    path,
+    doi: str = None,
+    doi_page: int = 0,
+    number_of_pages: int = 4,
+    cited_dois: list = (),
+    seed: int = 0,
+):
+    """Write a synthetic paper with its DOI on page `doi_page` and the cited DOIs on the last page."""
+    rng = random.Random(seed)
+    pages = [[_title(rng) for j in range(5)] for i in range(number_of_pages)]
+    if doi is not None:
+        pages[doi_page].insert(1, f"DOI: {doi}")
+    if cited_dois:
+        pages[-1].append("References")
+        for j, cited in enumerate(cited_dois):
+            pages[-1].append(f"[{j + 1}] Doe, J. doi: {cited}")
+    return write_pdf(path, ["\n".join(lines) for lines in pages], compress=True)
+
+
+def make_work(doi: str) -> dict:
+    """Canned Crossref work ('message' of the response) for the DOI."""
+    rng = random.Random(doi)
+    return {
+        "DOI": doi,
+        "title": [_title(rng)],
+        "author": [
+            {"given": "Jane", "family": "Doe"},
+            {"given": "Li", "family": "Khan"},
+        ],
+        "created": {"date-parts": [[2020, 1, 1]]},
+        "container-title": ["Journal of the American Chemical Society"],
+        "volume": "12",
+        "issue": "3",
+        "page": "100-110",
+    }
+
+
+class StandInResolver:
+    """Offline resolver with `make_work` for every DOI except those containing 'missing'; counts its lookups."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+
+    def fetch_work(self, doi, cache=True):
+        self.requests += 1
+        if "missing" in doi:
+            return None
+        return make_work(doi)
+
+
+@pytest.fixture
+def resolver():
+    return StandInResolver()
+
+
+@pytest.fixture
+def pdf_writer():
+    """`write_pdf`, see there."""
+    return write_pdf
+
+
+@pytest.fixture
+def paper_writer():
+    """`write_paper_pdf`, see there."""
+    return write_paper_pdf
+
+
+@pytest.fixture
+def work():
+    """`make_work`, see there."""
+    return make_work
@@ -0,0 +1,28 @@
+import asyncio
+
+from scientific_citing import pdf_to_ris
+from scientific_citing.aio import apdf_to_ris
+
+
+def test_apdf_to_ris_finds_the_doi_as_pdf_to_ris(tmp_path, paper_writer, resolver):
+    path = paper_writer(
+        tmp_path / "paper.pdf",
+        "10.5555/aio.1",
+        doi_page=2,
+        number_of_pages=5,
+        cited_dois=["10.5555/cited.1"],
+    )
+    options = dict(ris_dir=str(tmp_path / "ris.ris"), cache=None, resolver=resolver)
+
+    ris = asyncio.run(apdf_to_ris(path, **options))
+    assert ris.entry["DO"] == "10.5555/aio.1"
+    assert pdf_to_ris(path, **options).entry["DO"] == ris.entry["DO"]
+
+
+def test_apdf_to_ris_without_doi(tmp_path, paper_writer, resolver, capsys):
+    path = paper_writer(tmp_path / "paper.pdf")
+
+    assert asyncio.run(apdf_to_ris(path, cache=None, resolver=resolver)) is None
+    assert pdf_to_ris(path, cache=None, resolver=resolver) is None
+    assert capsys.readouterr().out == f"Error: No DOI found in {path}\n" * 2
+    assert resolver.requests == 0
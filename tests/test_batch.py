@@ -0,0 +1,64 @@
+import threading
+import time
+
+from scientific_citing import CrossrefCache, CrossrefClient, dois_to_ris
+
+
+class _Response:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        pass
+
+
+class _SlowResolver:
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def fetch_work(self, doi, cache=True):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return self.resolver.fetch_work(doi, cache)
+
+
+def test_results_in_input_order_with_errors(resolver):
+    dois = [f"10.5555/batch.{n}" for n in range(12)] + ["10.5555/missing.1"]
+    slow = _SlowResolver(resolver)
+
+    results = dois_to_ris(dois, max_workers=3, cache=None, resolver=slow)
+    assert [result.doi for result in results] == dois
+    assert [result.ris.entry["DO"] for result in results[:-1]] == dois[:-1]
+    assert isinstance(results[-1].error, LookupError)
+    assert results[-1].ris is None
+    assert 1 < slow.max_in_flight <= 3
+
+
+def test_client_retries_and_caches_404(work):
+    responses = [
+        _Response(429, headers={"Retry-After": "0"}),
+        _Response(200, {"status": "ok", "message": work("10.5555/1")}),
+        _Response(404),
+    ]
+    client = CrossrefClient(cache=CrossrefCache(), backoff=0)
+    urls = []
+    client.session.get = lambda url, timeout: urls.append(url) or responses.pop(0)
+
+    assert client.fetch_work("10.5555/1") == work("10.5555/1")
+    assert client.fetch_work("10.5555/1") == work("10.5555/1")
+    assert client.fetch_work("10.5555/unknown") is None
+    assert client.fetch_work("10.5555/unknown") is None
+    assert len(urls) == 3
+    assert urls[0] == urls[1] != urls[2]
@@ -0,0 +1,60 @@
+import io
+
+from scientific_citing import (
+    RIS,
+    Reference,
+    chain_references_to_string_list_qutotes_Angewandte_Chemie,
+    iter_bibliography,
+    write_bibliography,
+)
+
+
+def _references(n):
+    return [
+        Reference(TY="JOUR", AU="Doe, Jane", JO="Chem", PY=str(2000 + i), VL=str(i))
+        for i in range(n)
+    ]
+
+
+def test_numbering_template_and_style():
+    ris = RIS(
+        "TY  - JOUR\nAU  - Roe, Ann\nJO  - Chem\nPY  - 1999\nER  - \n"
+        "TY  - JOUR\nAU  - Poe, Al\nJO  - Chem\nPY  - 1998\nER  - \n"
+    )
+    lines = list(iter_bibliography([ris] + _references(1), formated=False, start=5))
+    assert lines == [
+        "[5]\tA. Roe, Chem, 1999.",
+        "[6]\tA. Poe, Chem, 1998.",
+        "[7]\tJ. Doe, Chem, 2000, 0.",
+    ]
+    style = {"JOUR": {"year": {}, "journal": {}}}
+    assert list(
+        iter_bibliography(_references(2), style, False, template="{number}. {citation}")
+    ) == ["1. 2000, Chem.", "2. 2001, Chem."]
+    assert chain_references_to_string_list_qutotes_Angewandte_Chemie(
+        [ris]
+    ) == "\n".join(iter_bibliography([ris]))
+
+
+def test_process_pool_keeps_the_order():
+    references = _references(9)
+    assert list(
+        iter_bibliography(references, formated=False, processes=2, chunk_size=2)
+    ) == list(iter_bibliography(references, formated=False))
+
+
+def test_write_bibliography(tmp_path):
+    path = tmp_path / "bibliography.txt"
+    assert write_bibliography(_references(2), str(path)) == 2
+    assert path.read_text(encoding="utf-8") == (
+        "[1]\tJ. Doe, Chem, 2000, 0.\n[2]\tJ. Doe, Chem, 2001, 1.\n"
+    )
+
+    f = io.StringIO()
+    assert write_bibliography(_references(2), f, formated="rtf") == 2
+    assert f.getvalue() == (
+        "{\\rtf1\\ansi\\deff0{\\fonttbl{\\f0 Times New Roman;}}\\f0\\fs24\n"
+        "[1]\\tab J. Doe, {\\i Chem}, {\\b 2000}, {\\i 0}.\\par\n"
+        "[2]\\tab J. Doe, {\\i Chem}, {\\b 2001}, {\\i 1}.\\par\n"
+        "}\n"
+    )
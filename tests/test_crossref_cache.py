@@ -0,0 +1,91 @@
+from scientific_citing.crossref import CrossrefCache
+
+
+def _last_access(cache, doi):
+    return cache._connection.execute(
+        "SELECT last_access FROM works WHERE doi = ?", (doi,)
+    ).fetchone()[0]
+
+
+def test_memory_hits_keep_works_from_eviction(tmp_path, work):
+    cache = CrossrefCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for n in range(10):
+        cache.put(f"10.5555/{n}", work(f"10.5555/{n}"))
+    # Only ever served from memory after the put
+    assert cache.lookup("10.5555/0") == (True, work("10.5555/0"))
+
+    cache.put("10.5555/10", work("10.5555/10"))
+    assert cache._stored == 9
+    assert _last_access(cache, "10.5555/0") is not None
+    assert (
+        cache._connection.execute(
+            "SELECT doi FROM works WHERE doi IN ('10.5555/1', '10.5555/2')"
+        ).fetchall()
+        == []
+    )
+
+
+def test_memory_hits_are_written_in_batches_and_on_close(tmp_path, work):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CrossrefCache(path, touch_batch=2)
+    cache.put("10.5555/a", work("10.5555/a"))
+    cache.put("10.5555/b", work("10.5555/b"))
+    stored = _last_access(cache, "10.5555/a")
+
+    cache.lookup("10.5555/a")
+    assert _last_access(cache, "10.5555/a") == stored
+    cache.lookup("10.5555/b")
+    assert _last_access(cache, "10.5555/a") > stored
+    assert cache._touched == {}
+
+    cache.lookup("10.5555/b")
+    touched = cache._touched["10.5555/b"]
+    cache.close()
+    reopened = CrossrefCache(path)
+    assert _last_access(reopened, "10.5555/b") == touched
+
+
+def test_ttl_and_negative_ttl(tmp_path, work):
+    cache = CrossrefCache(ttl=-1, negative_ttl=60)
+    cache.put("10.5555/work", work("10.5555/work"))
+    cache.put("10.5555/missing", None)
+
+    assert cache.lookup("10.5555/work") == (False, None)
+    assert cache.lookup("https://doi.org/10.5555/MISSING") == (True, None)
+    assert cache.stats == {"hits": 0, "negative_hits": 1, "misses": 1, "expired": 1}
+
+    cache = CrossrefCache(ttl=60, negative_ttl=-1)
+    cache.put("10.5555/work", work("10.5555/work"))
+    cache.put("10.5555/missing", None)
+    assert cache.lookup("10.5555/work") == (True, work("10.5555/work"))
+    assert cache.lookup("10.5555/missing") == (False, None)
+
+
+def test_store_outlives_memory_and_purges_expired(tmp_path, work):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CrossrefCache(path, memory_entries=1)
+    cache.put("10.5555/a", work("10.5555/a"))
+    cache.put("10.5555/b", work("10.5555/b"))
+    assert list(cache._memory) == ["10.5555/b"]
+    assert cache.lookup("10.5555/a") == (True, work("10.5555/a"))
+    cache.close()
+
+    cache = CrossrefCache(path, negative_ttl=-1)
+    cache.put("10.5555/missing", None)
+    assert cache._stored == 3
+    cache.purge_expired()
+    assert cache._stored == 2
+    assert cache.lookup("10.5555/b") == (True, work("10.5555/b"))
+    assert cache.hit_rate == 1.0
+
+
+def test_eviction_down_to_nine_tenths(tmp_path, work):
+    cache = CrossrefCache(str(tmp_path / "cache.sqlite"), max_entries=20)
+    for n in range(21):
+        cache.put(f"10.5555/{n}", work(f"10.5555/{n}"))
+    assert cache._stored == 18
+    assert cache._connection.execute("SELECT COUNT(*) FROM works").fetchone() == (18,)
+    assert cache.lookup("10.5555/20")[0]
+    cache.clear()
+    assert cache._stored == 0
+    assert cache.lookup("10.5555/20") == (False, None)
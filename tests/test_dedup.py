@@ -0,0 +1,51 @@
+from scientific_citing import DedupIndex, find_duplicates
+from scientific_citing.dedup import reference_keys
+
+
+def _reference(title, author="Doe, Jane", year="2020", doi=None):
+    entry = {"TY": "JOUR", "TI": title, "AU": [author], "PY": year}
+    if doi is not None:
+        entry["DO"] = doi
+    return entry
+
+
+def test_union_keeps_dois_of_the_larger_root():
+    index = DedupIndex()
+    index.add(_reference("First title"))
+    index.add(_reference("Second title", doi="10.1/a"))
+    index.add(_reference("Third title", doi="10.1/b"))
+    # Only the root with the larger index carries a DOI
+    assert index._union(1, 0)
+    assert index._dois[0] == {"doi:10.1/a"}
+    assert not index._union(0, 2)
+    assert index._find(2) == 2
+
+
+def test_clusters_never_mix_dois():
+    references = [
+        _reference("Catalytic asymmetric synthesis of chiral ligands"),
+        _reference("Catalytic asymmetric synthesis of chiral ligand", doi="10.1/a"),
+        _reference("Catalytic asymmetric synthesis of chiral ligands.", doi="10.1/b"),
+    ]
+    for cluster in find_duplicates(references, threshold=0.5):
+        dois = {member.get("DO") for member in cluster.members} - {None}
+        assert len(dois) <= 1
+
+
+def test_merge_by_doi_and_by_title_author_year():
+    references = [
+        _reference("A study", doi="https://doi.org/10.1/X"),
+        _reference("Another title", doi="10.1/x"),
+        _reference("Same work", year="2001"),
+        _reference("Same  Work!", year="2001"),
+    ]
+    assert [cluster.indices for cluster in find_duplicates(references)] == [
+        [0, 1],
+        [2, 3],
+    ]
+
+
+def test_generic_titles_without_author_are_not_merged():
+    editorial = {"TY": "JOUR", "TI": "Editorial", "PY": "2020"}
+    assert reference_keys(editorial) == []
+    assert find_duplicates([dict(editorial, JO="A"), dict(editorial, JO="B")]) == []
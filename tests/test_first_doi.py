@@ -0,0 +1,52 @@
+import pytest
+
+from scientific_citing import extract_first_doi_from_pdf
+from scientific_citing.pdf import PdfAnalysis, _page_budget
+
+
+def test_page_budget():
+    assert _page_budget(10, 2, 1) == [0, 1, 9]
+    assert _page_budget(2, 2, 1) == [0, 1]
+    assert _page_budget(3, None, 1) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("raw_scan", [False, True])
+def test_cited_dois_do_not_win(tmp_path, paper_writer, raw_scan):
+    path = paper_writer(
+        tmp_path / "paper.pdf",
+        "10.5555/own.1",
+        doi_page=2,
+        number_of_pages=5,
+        cited_dois=["10.5555/cited.1", "10.5555/cited.2"],
+    )
+    with PdfAnalysis(path, cache=None, raw_scan=raw_scan) as analysis:
+        assert analysis.first_doi == "10.5555/own.1"
+    assert extract_first_doi_from_pdf(path, raw_scan=raw_scan) == "10.5555/own.1"
+
+
+def test_cited_doi_only_if_nothing_else(tmp_path, paper_writer):
+    path = paper_writer(
+        tmp_path / "paper.pdf", number_of_pages=3, cited_dois=["10.5555/cited.1"]
+    )
+    match = extract_first_doi_from_pdf(path, with_source=True)
+    assert (match.doi, match.page) == ("10.5555/cited.1", 2)
+
+
+def test_middle_page_needs_full_scan(tmp_path, paper_writer):
+    path = paper_writer(
+        tmp_path / "paper.pdf", "10.5555/own.2", doi_page=3, number_of_pages=6
+    )
+    with PdfAnalysis(path, cache=None) as analysis:
+        assert analysis.first_doi is None
+        assert analysis.find_first_doi(None).doi == "10.5555/own.2"
+    assert extract_first_doi_from_pdf(path, first_pages=None) == "10.5555/own.2"
+
+
+def test_metadata_before_pages(tmp_path, pdf_writer):
+    path = pdf_writer(
+        tmp_path / "paper.pdf",
+        ["Title: On nothing\ndoi: 10.5555/page.1"],
+        info={"Subject": "doi:10.5555/info.1"},
+    )
+    match = extract_first_doi_from_pdf(path, with_source=True)
+    assert (match.doi, match.source) == ("10.5555/info.1", "info")
@@ -0,0 +1,95 @@
+from scientific_citing import RIS, Reference, compile_style
+from scientific_citing.journals import (
+    JournalIndex,
+    abbreviate_journals,
+    normalize_journal_name,
+)
+
+_abbreviations = {
+    "Journal of Organic Chemistry": "J. Org. Chem.",
+    "Journal of Inorganic Chemistry": "J. Inorg. Chem.",
+    "Journal of Physical Chemistry A": "J. Phys. Chem. A",
+    "Journal of Physical Chemistry B": "J. Phys. Chem. B",
+    "Chemical Science (Cambridge, United Kingdom)": "Chem. Sci.",
+    "Accounts of Chemical Research": "Acc. Chem. Res.",
+}
+
+
+def test_normalize_journal_name():
+    assert (
+        normalize_journal_name("The Journal of Physical Chemistry. A")
+        == "journal of physical chemistry a"
+    )
+    assert normalize_journal_name("Zeitschrift für Chemie & Physik") == (
+        "zeitschrift fur chemie and physik"
+    )
+
+
+def test_exact_lookup():
+    index = JournalIndex(_abbreviations)
+    assert index.abbreviate("The Journal of Organic Chemistry") == "J. Org. Chem."
+    assert index.abbreviate("journal of physical chemistry. b") == "J. Phys. Chem. B"
+    assert index.abbreviate("J. Org. Chem.") == "J. Org. Chem."
+    assert index.abbreviate("Chemical Science") == "Chem. Sci."
+    assert index.abbreviate("Journal of Organic Chemstry") is None
+
+
+def test_fuzzy_lookup_is_opt_in_and_rejects_other_journals():
+    index = JournalIndex(_abbreviations)
+    assert index.abbreviate("Journal of Organic Chemstry", fuzzy=True) == (
+        "J. Org. Chem."
+    )
+    assert index.abbreviate("Acounts of Chemical Research", fuzzy=True) == (
+        "Acc. Chem. Res."
+    )
+    assert index.fuzzy("Journal of Bioorganic Chemistry")[0] is None
+    assert index.fuzzy("Journal of Physical Chemistry C")[0] is None
+
+    names = ["Journal of Organic Chemstry", "Journal of Physical Chemistry C", ""]
+    assert index.fuzzy_many(names) == [index.fuzzy(name) for name in names]
+
+
+def test_abbreviate_journals_resolves_each_name_once():
+    references = [
+        Reference(TY="JOUR", JO="Journal of Organic Chemistry"),
+        Reference(TY="JOUR", JF="The Journal of Organic Chemistry", JA="JOC"),
+        Reference(TY="JOUR", T2="Journal of Organic Chemstry"),
+        Reference(TY="BOOK", T2="Journal of Organic Chemistry"),
+        Reference(TY="JOUR", JO="Unknown Letters"),
+    ]
+    index = JournalIndex(_abbreviations)
+
+    report = abbreviate_journals(references, index, fuzzy=True)
+    assert (report.references, report.distinct) == (4, 4)
+    assert list(report.fuzzy) == ["Journal of Organic Chemstry"]
+    assert report.fuzzy["Journal of Organic Chemstry"][0] == "J. Org. Chem."
+    assert report.unresolved == {"Unknown Letters": 1}
+    assert [reference.get("JA") for reference in references] == [
+        "J. Org. Chem.",
+        "JOC",
+        "J. Org. Chem.",
+        None,
+        None,
+    ]
+    abbreviate_journals(references, index, overwrite=True)
+    assert references[1]["JA"] == "J. Org. Chem."
+
+
+def test_citations_prefer_the_stored_abbreviation():
+    ris = RIS(
+        "TY  - JOUR\nAU  - Doe, Jane\nPY  - 2020\nJO  - Unknown Letters\nVL  - 12\nER  - \n"
+    )
+    style = compile_style({"JOUR": {"journal": {"abbreviate": "true"}, "year": {}}})
+    assert ris.angewandte_chemie_style(formated=False, abbreviate_journal=True) == (
+        "J. Doe, Unknown Letters, 2020, 12."
+    )
+    assert style.format(ris.entry, False) == "Unknown Letters, 2020."
+
+    abbreviate_journals([ris], JournalIndex({"Unknown Letters": "Unkn. Lett."}))
+    assert ris.angewandte_chemie_style(formated=False, abbreviate_journal=True) == (
+        "J. Doe, Unkn. Lett., 2020, 12."
+    )
+    assert style.format(ris.entry, False) == "Unkn. Lett., 2020."
+    assert ris.angewandte_chemie_style(formated=False) == (
+        "J. Doe, Unknown Letters, 2020, 12."
+    )
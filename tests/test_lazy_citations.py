@@ -0,0 +1,42 @@
+from scientific_citing import RIS
+
+_content = "TY  - JOUR\nAU  - Doe, Jane\nJO  - Chem\nPY  - 2020\nVL  - 1\nER  - \n"
+
+
+def test_citations_are_computed_on_first_access_only():
+    ris = RIS(_content)
+    assert ris.entry._cache is None
+
+    cite_as = ris.cite_as
+    assert ris.cite_as is cite_as
+    assert ris.angewandte_chemie_style() is cite_as
+    plain = ris.angewandte_chemie_style(formated=False)
+    assert plain == "J. Doe, Chem, 2020, 1."
+    assert ris.angewandte_chemie_style(formated=False) is plain
+    # The runs are copies of the memoized ones, so callers may edit them
+    runs = ris.citation
+    runs.replace_text("Chem", "Changed")
+    assert str(ris.angewandte_chemie_runs()) == plain
+    assert ris.angewandte_chemie_style(formated=False, abbreviate_journal=True) == (
+        plain
+    )
+
+
+def test_changes_invalidate_the_citations():
+    ris = RIS(_content)
+    assert ris.angewandte_chemie_style(formated=False) == "J. Doe, Chem, 2020, 1."
+
+    ris.entry["Publication year"] = "2021"
+    assert ris.angewandte_chemie_style(formated=False) == "J. Doe, Chem, 2021, 1."
+    del ris.entry["VL"]
+    assert ris.angewandte_chemie_style(formated=False) == "J. Doe, Chem, 2021."
+
+    # Values changed in place need an explicit invalidate
+    ris.entry["AU"] = ["Doe, Jane"]
+    ris.angewandte_chemie_style(formated=False)
+    ris.entry["AU"].append("Khan, Li")
+    assert ris.angewandte_chemie_style(formated=False) == "J. Doe, Chem, 2021."
+    ris.entry.invalidate()
+    assert ris.angewandte_chemie_style(formated=False) == (
+        "J. Doe, L. Khan, Chem, 2021."
+    )
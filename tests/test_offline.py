@@ -0,0 +1,53 @@
+import gzip
+import json
+
+import pytest
+
+from scientific_citing import CrossrefSnapshot, doi_to_ris
+
+
+def _dump_lines(work):
+    return [
+        json.dumps(work("10.5555/Snap.1")),
+        "",
+        "not json",
+        json.dumps({"status": "ok", "message": work("10.5555/snap.2")}),
+        json.dumps(dict(work("10.5555/snap.1"), volume="13")),
+    ]
+
+
+@pytest.mark.parametrize("name", ["dump.jsonl", "dump.jsonl.gz"])
+def test_lookups_on_plain_and_gzipped_dumps(tmp_path, work, name):
+    path = str(tmp_path / name)
+    content = "\n".join(_dump_lines(work)).encode() + b"\n"
+    with (gzip.open if name.endswith(".gz") else open)(path, "wb") as f:
+        f.write(content)
+
+    with CrossrefSnapshot(path) as snapshot:
+        assert len(snapshot) == 2
+        assert "https://doi.org/10.5555/SNAP.2" in snapshot
+        assert snapshot.fetch_work("10.5555/snap.2") == work("10.5555/snap.2")
+        # The later line of a DOI replaces the earlier one
+        assert snapshot.fetch_work("10.5555/snap.1")["volume"] == "13"
+        assert snapshot.fetch_work("10.5555/unknown") is None
+
+    ris = doi_to_ris("10.5555/snap.2", str(tmp_path / "snap.ris"), resolver=path)
+    assert ris.entry["DO"] == "10.5555/snap.2"
+
+
+def test_index_is_reused_until_the_dump_changes(tmp_path, work, monkeypatch):
+    path = tmp_path / "dump.jsonl"
+    path.write_text(json.dumps(work("10.5555/a")) + "\n")
+    CrossrefSnapshot(str(path)).close()
+
+    builds = []
+    build = CrossrefSnapshot.build
+    monkeypatch.setattr(
+        CrossrefSnapshot, "build", lambda self: builds.append(1) or build(self)
+    )
+    with CrossrefSnapshot(str(path)) as snapshot:
+        assert builds == [] and "10.5555/a" in snapshot
+
+    path.write_text(path.read_text() + json.dumps(work("10.5555/b")) + "\n")
+    with CrossrefSnapshot(str(path)) as snapshot:
+        assert builds == [1] and len(snapshot) == 2
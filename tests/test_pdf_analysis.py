@@ -0,0 +1,50 @@
+import PyPDF2
+
+from scientific_citing import (
+    PdfAnalysis,
+    analyze_pdf,
+    extract_dois_from_pdf,
+    extract_paper_title,
+)
+
+
+def _paper(pdf_writer, path):
+    return pdf_writer(
+        path,
+        [
+            "Title: Asymmetric catalysis\nDOI: 10.5555/own.1",
+            "Results\nsee 10.5555/cited.1",
+            "More results\nagain 10.5555/cited.1 and 10.5555/cited.2",
+        ],
+    )
+
+
+def test_every_page_is_extracted_once(tmp_path, pdf_writer, monkeypatch):
+    path = _paper(pdf_writer, tmp_path / "paper.pdf")
+    extracted = []
+    extract_text = PyPDF2.PageObject.extractText
+
+    def counting(page, *args, **kwargs):
+        extracted.append(page)
+        return extract_text(page, *args, **kwargs)
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extractText", counting)
+    analysis = analyze_pdf(path, cache=None)
+    assert len(extracted) == 3
+    assert analysis.first_doi == "10.5555/own.1"
+    assert analysis.dois == ["10.5555/own.1", "10.5555/cited.1", "10.5555/cited.2"]
+    assert analysis.title == "Asymmetric catalysis"
+    assert [o[:2] for o in analysis.doi_offsets] == [
+        ("10.5555/own.1", 0),
+        ("10.5555/cited.1", 1),
+        ("10.5555/cited.1", 2),
+        ("10.5555/cited.2", 2),
+    ]
+
+
+def test_results_match_the_standalone_functions(tmp_path, pdf_writer):
+    path = _paper(pdf_writer, tmp_path / "paper.pdf")
+    with PdfAnalysis(path, cache=None) as analysis:
+        assert analysis.dois == extract_dois_from_pdf(path)
+        assert analysis.title == extract_paper_title(path)
+    assert analysis._file is None
@@ -0,0 +1,77 @@
+import os
+
+from scientific_citing import EXTRACTION_VERSION, PdfAnalysis, analyze_pdf
+from scientific_citing import pdf_cache
+from scientific_citing.pdf_cache import PdfCache
+
+
+def _paths(cache):
+    return sorted(
+        os.path.basename(path)
+        for (path,) in cache._connection.execute("SELECT path FROM files")
+    )
+
+
+def test_eviction_prunes_files(tmp_path, pdf_writer):
+    cache = PdfCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for n in range(10):
+        path = pdf_writer(tmp_path / f"{n}.pdf", [f"Paper {n}"])
+        cache.put(path, {"title": n}, 1)
+    os.remove(tmp_path / "9.pdf")
+
+    cache.put(pdf_writer(tmp_path / "10.pdf", ["Paper 10"]), {"title": 10}, 1)
+    assert len(cache) == 9
+    assert _paths(cache) == [f"{n}.pdf" for n in (10, 2, 3, 4, 5, 6, 7, 8)]
+
+
+def test_prune_after_invalidate(tmp_path, pdf_writer):
+    cache = PdfCache(str(tmp_path / "cache.sqlite"))
+    cache.put(pdf_writer(tmp_path / "old.pdf", ["Old"]), {"title": "Old"}, 1)
+    cache.put(pdf_writer(tmp_path / "new.pdf", ["New"]), {"title": "New"}, 2)
+
+    cache.invalidate(2)
+    cache.prune()
+    assert _paths(cache) == ["new.pdf"]
+    assert cache.get(str(tmp_path / "new.pdf"), 2) == {"title": "New"}
+
+
+def test_results_are_served_from_the_cache(tmp_path, pdf_writer):
+    path = pdf_writer(tmp_path / "paper.pdf", ["Title: Catalysis\nDOI: 10.5555/1"])
+    cache = PdfCache(str(tmp_path / "cache.sqlite"))
+    analyze_pdf(path, cache=cache)
+
+    analysis = PdfAnalysis(path, cache=cache)
+    assert analysis.title == "Catalysis"
+    assert analysis.first_doi == "10.5555/1"
+    assert analysis._reader is None
+
+
+def test_changed_file_is_hashed_again(tmp_path, pdf_writer, monkeypatch):
+    path = pdf_writer(tmp_path / "paper.pdf", ["Paper"])
+    cache = PdfCache(str(tmp_path / "cache.sqlite"))
+    cache.put(path, {"title": "Paper"}, EXTRACTION_VERSION)
+    hashed = []
+    monkeypatch.setattr(
+        pdf_cache, "file_digest", lambda path: hashed.append(path) or "changed"
+    )
+
+    assert cache.get(path, EXTRACTION_VERSION) == {"title": "Paper"}
+    assert hashed == []
+    pdf_writer(tmp_path / "paper.pdf", ["Another paper"])
+    assert cache.get(path, EXTRACTION_VERSION) is None
+    assert len(hashed) == 1
+
+
+def test_other_versions_are_ignored_and_invalidated(tmp_path, pdf_writer):
+    path = pdf_writer(tmp_path / "paper.pdf", ["Paper"])
+    cache = PdfCache(str(tmp_path / "cache.sqlite"))
+    cache.put(path, {"title": "Paper"}, 1)
+    cache.put(path, {"dois": []}, 1)
+    assert cache.get(path, 1) == {"title": "Paper", "dois": []}
+    assert cache.get(path, 2) is None
+
+    cache.put(path, {"title": "Paper"}, 2)
+    assert cache.get(path, 2) == {"title": "Paper"}
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
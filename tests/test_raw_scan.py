@@ -0,0 +1,69 @@
+import PyPDF2
+import pytest
+
+from scientific_citing.pdf import (
+    PdfAnalysis,
+    _content_text,
+    _doi_line_break_pattern,
+    _doi_of,
+    doi_bytes_pattern,
+)
+
+
+def _raw_dois(content: bytes) -> list:
+    text = _doi_line_break_pattern.sub(b"", _content_text(content))
+    return [_doi_of(found) for found in doi_bytes_pattern.finditer(text)]
+
+
+def test_doi_wrapped_after_slash():
+    content = b"BT (doi: 10.1021/) Tj T* (jacs.5b01234 and more) Tj ET"
+    assert _raw_dois(content) == ["10.1021/jacs.5b01234"]
+
+
+def test_doi_wrapped_at_dot_hyphen_and_underscore():
+    assert _raw_dois(b"BT (10.1021/jacs.) Tj T* (5b01234 text) Tj ET") == [
+        "10.1021/jacs.5b01234"
+    ]
+    assert _raw_dois(b"BT (10.1002/anie-) Tj T* (201912345) Tj ET") == [
+        "10.1002/anie-201912345"
+    ]
+    assert _raw_dois(b"BT (10.1002/x_) Tj T* (y12) Tj ET") == ["10.1002/x_y12"]
+    assert _raw_dois(b"BT (10.1021/jacs) Tj T* (.5b01234) Tj ET") == [
+        "10.1021/jacs.5b01234"
+    ]
+
+
+def test_doi_at_the_end_of_a_sentence():
+    for next_line in (b"the next line", b"2. Results", b"The end"):
+        content = b"BT (see 10.1021/jacs.5b01234.) Tj T* (" + next_line + b") Tj ET"
+        assert _raw_dois(content) == ["10.1021/jacs.5b01234"]
+
+
+def test_kerning_and_escapes():
+    content = rb"BT [(10.1021/)-20(jacs)] TJ [(word)-300(next)] TJ (\050a\051) Tj ET"
+    assert _content_text(content) == b"10.1021/jacsword next(a)"
+
+
+def test_hex_strings_and_quote_operators():
+    content = b"BT <31302e313032312f> Tj (jacs.5b01234) ' ET"
+    assert _content_text(content) == b"10.1021/\njacs.5b01234"
+    assert _raw_dois(content) == ["10.1021/jacs.5b01234"]
+
+
+def test_raw_scan_needs_no_text_extraction(tmp_path, pdf_writer, monkeypatch):
+    path = pdf_writer(
+        tmp_path / "paper.pdf",
+        ["Title: Catalysis", "Results"],
+        compress=True,
+        content={1: b"BT [(doi: 10.1021/)] TJ T* (jacs.5b01234 more) Tj ET"},
+    )
+    with PdfAnalysis(path, cache=None) as analysis:
+        text_dois = analysis.dois
+
+    monkeypatch.setattr(
+        PyPDF2.PageObject, "extractText", lambda *args: pytest.fail("extracted")
+    )
+    with PdfAnalysis(path, cache=None, raw_scan=True) as analysis:
+        assert analysis.first_doi == "10.1021/jacs.5b01234"
+        assert analysis.dois == text_dois == ["10.1021/jacs.5b01234"]
+        assert analysis.doi_offsets == [("10.1021/jacs.5b01234", 1, 5)]
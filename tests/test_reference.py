@@ -0,0 +1,41 @@
+import pickle
+
+from scientific_citing import Reference
+
+
+def test_names_alias_tags():
+    reference = Reference({"TY": "JOUR", "Publication year": "2020"})
+    assert reference.tags == {"TY": "JOUR", "PY": "2020"}
+    assert reference["PY"] == reference["Publication year"] == "2020"
+    assert reference["Type of reference (long)"] == "Journal"
+    assert "Type of reference" in reference
+    assert "Abstract" not in reference
+
+    reference["Type of reference"] = "BOOK"
+    assert reference["Type of reference (long)"] == "Whole book"
+    del reference["Publication year"]
+    assert reference.tags == {"TY": "BOOK"}
+    assert reference.to_dict() == {
+        "TY": "BOOK",
+        "Type of reference": "BOOK",
+        "Type of reference (long)": "Whole book",
+    }
+    assert len(reference) == 3
+
+
+def test_behaves_like_the_doubled_dictionary():
+    reference = Reference(TY="JOUR", AU=["Doe, Jane"])
+    assert reference == {
+        "TY": "JOUR",
+        "AU": ["Doe, Jane"],
+        "Type of reference": "JOUR",
+        "Author": ["Doe, Jane"],
+        "Type of reference (long)": "Journal",
+    }
+    assert not Reference()
+    assert not hasattr(reference, "__dict__")
+    assert pickle.loads(pickle.dumps(reference)).tags == reference.tags
+
+    copy = reference.copy()
+    copy["AU"].append("Khan, Li")
+    assert reference["AU"] == ["Doe, Jane"]
@@ -0,0 +1,87 @@
+import io
+import os
+
+from scientific_citing import RIS, iter_ris, write_ris
+
+_content = """TY  - JOUR
+AU  - doe, jane
+AU  - Khan, Li
+TI  - Catalysis
+PY  - 2020
+JO  - Journal of the American Chemical Society
+DO  - 10.5555/1
+ER  - TY  - BOOK
+AU  - Roe, Ann
+TI  - A book
+PY  - 2019
+ER-
+"""
+
+
+def _tags(references):
+    return [reference.tags for reference in references]
+
+
+def test_iter_ris_matches_ris(tmp_path):
+    path = tmp_path / "library.ris"
+    path.write_text("\ufeff" + _content, encoding="utf-8")
+    expected = _tags(RIS(_content).references)
+    assert len(expected) == 2
+    assert expected[0]["AU"] == ["Doe, Jane", "Khan, Li"]
+
+    assert _tags(iter_ris(str(path))) == expected
+    assert _tags(iter_ris(path)) == expected
+    assert _tags(iter_ris(_content)) == expected
+    assert _tags(iter_ris(io.StringIO(_content))) == expected
+    with open(path, "rb") as f:
+        assert _tags(iter_ris(f)) == expected
+
+
+class _Lines(io.StringIO):
+    """Text file counting the lines read."""
+
+    read_lines = 0
+
+    def __next__(self):
+        self.read_lines += 1
+        return super().__next__()
+
+
+def test_iter_ris_is_lazy():
+    f = _Lines(_content)
+    references = iter_ris(f)
+    assert next(references)["TI"] == "Catalysis"
+    assert f.read_lines == 8
+
+
+def test_dumps_round_trip():
+    ris = RIS(_content)
+    dumped = ris.dumps()
+    assert dumped == (
+        "TY  - JOUR\nAU  - Doe, Jane\nAU  - Khan, Li\nTI  - Catalysis\nPY  - 2020\n"
+        "JO  - Journal of the American Chemical Society\nDO  - 10.5555/1\nER  - \n"
+        "TY  - BOOK\nAU  - Roe, Ann\nTI  - A book\nPY  - 2019\nER  - \n"
+    )
+    assert _tags(RIS(dumped).references) == _tags(ris.references)
+    assert RIS(dumped).dumps() == dumped
+
+
+def test_write_ris_mixed_inputs(tmp_path):
+    path = tmp_path / "library.ris"
+    path.write_text("old", encoding="utf-8")
+    references = [
+        RIS(_content),
+        {"Type of reference": "JOUR", "TY": "JOUR", "TI": "Multi\nline", "AU": "X, Y"},
+        {"Article title": "No type", "Not a tag": "dropped"},
+    ]
+
+    assert write_ris(references, str(path), buffer_size=16) == 4
+    assert [reference.tags for reference in iter_ris(path)][2:] == [
+        {"TY": "JOUR", "TI": "Multi line", "AU": "X, Y"},
+        {"TY": "GEN", "TI": "No type"},
+    ]
+    assert os.listdir(tmp_path) == ["library.ris"]
+
+    f = io.StringIO()
+    assert RIS(_content).dump(f) == 2
+    assert f.getvalue() == RIS(_content).dumps()
@@ -0,0 +1,83 @@
+import pytest
+
+from scientific_citing import RIS, Citation, Run, emitters, render
+
+
+def _citation():
+    citation = Citation()
+    citation.add("A & B_{x} ")
+    citation.add("Chem. *Rev*", italic=True)
+    citation.add(", ")
+    citation.add("2020", bold=True)
+    citation.add(", ")
+    citation.add("ü\\ \U0001d6fc", bold=True, italic=True)
+    citation.add(".")
+    return citation
+
+
+@pytest.mark.parametrize(
+    "output, expected",
+    [
+        ("plain", "A & B_{x} Chem. *Rev*, 2020, ü\\ \U0001d6fc."),
+        (
+            "ansi",
+            "A & B_{x} \x1b[3mChem. *Rev*\x1b[23m, \x1b[1m2020\x1b[22m, "
+            "\x1b[1m\x1b[3mü\\ \U0001d6fc\x1b[23m\x1b[22m.",
+        ),
+        (
+            "html",
+            "A &amp; B_{x} <i>Chem. *Rev*</i>, <b>2020</b>, <b><i>ü\\ \U0001d6fc</i></b>.",
+        ),
+        (
+            "markdown",
+            "A & B\\_\\{x\\} *Chem. \\*Rev\\**, **2020**, ***ü\\\\ \U0001d6fc***.",
+        ),
+        (
+            "latex",
+            "A \\& B\\_\\{x\\} \\textit{Chem. *Rev*}, \\textbf{2020}, "
+            "\\textbf{\\textit{ü\\textbackslash{} \U0001d6fc}}.",
+        ),
+        (
+            "rtf",
+            "A & B_\\{x\\} {\\i Chem. *Rev*}, {\\b 2020}, "
+            "{\\b {\\i \\u252?\\\\ \\u-10187?\\u-8452?}}.",
+        ),
+    ],
+)
+def test_emitters(output, expected):
+    assert emitters[output](_citation()) == expected
+    assert render(_citation(), output) == expected
+
+
+def test_render_flags_and_unknown_outputs():
+    assert render(_citation(), True) == emitters["ansi"](_citation())
+    assert render(_citation(), False) == str(_citation())
+    with pytest.raises(ValueError):
+        render(_citation(), "docx")
+
+
+def test_runs_are_merged_and_edited_in_place():
+    citation = Citation()
+    citation.add("J. Doe, ")
+    citation.add("")
+    citation.add("Chem.,", italic=True)
+    citation.add(" Eur.", italic=True)
+    citation.add(", 2020, ;")
+    assert citation == [
+        Run("J. Doe, "),
+        Run("Chem., Eur.", italic=True),
+        Run(", 2020, ;"),
+    ]
+    citation.replace_text(",", "")
+    citation.rstrip_text(" ;")
+    assert citation == [Run("J. Doe "), Run("Chem. Eur.", italic=True), Run(" 2020")]
+    citation.format_all(bold=True, italic=False)
+    assert citation == [Run("J. Doe Chem. Eur. 2020", bold=True)]
+
+
+def test_styles_emit_from_the_runs():
+    ris = RIS("TY  - JOUR\nAU  - Doe, Jane\nJO  - Chem\nPY  - 2020\nER  - \n")
+    runs = ris.angewandte_chemie_runs()
+    assert ris.angewandte_chemie_style() == render(runs, True) == ris.cite_as
+    for output in emitters:
+        assert ris.angewandte_chemie_style(formated=output) == render(runs, output)
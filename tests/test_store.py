@@ -0,0 +1,33 @@
+from scientific_citing import ReferenceStore
+
+
+def test_text_without_words_matches_nothing():
+    with ReferenceStore() as store:
+        store.add(
+            [{"TY": "JOUR", "AU": ["Doe, Jane"], "TI": "Catalysis", "PY": "2020"}]
+        )
+        assert list(store.search(text="!!!")) == []
+        assert store.count(text="!!!") == 0
+        assert store.count(text="catalysis") == 1
+
+
+def test_ids_after_removal(tmp_path):
+    path = str(tmp_path / "library.sqlite")
+    with ReferenceStore(path) as store:
+        store.add(
+            [
+                {"TY": "JOUR", "AU": ["Doe, Jane"], "KW": ["a"], "PY": "2019"},
+                {"TY": "JOUR", "AU": ["Khan, Li"], "KW": ["b"], "PY": "2020"},
+            ]
+        )
+        with store._connection:
+            store._connection.execute("DELETE FROM ref_authors WHERE author_id = 1")
+            store._connection.execute("DELETE FROM authors WHERE id = 1")
+            store._connection.execute("DELETE FROM ref_keywords WHERE keyword_id = 1")
+            store._connection.execute("DELETE FROM keywords WHERE id = 1")
+
+    with ReferenceStore(path) as store:
+        store.add([{"TY": "JOUR", "AU": ["Roe, Ann"], "KW": ["c"], "PY": "2021"}])
+        assert store.count(author="Khan") == 1
+        assert store.count(author="Roe") == 1
+        assert store.count(keyword="c") == 1
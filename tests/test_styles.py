@@ -0,0 +1,80 @@
+import pytest
+
+from scientific_citing import RIS, Reference, compile_style
+
+_rules = {
+    "Journal": {
+        "authors": {"et_al": "2", "format": "{last}, {initials}"},
+        "title": {"prefix": '"', "suffix": '", '},
+        "journal": {"italic": "true", "delete": ","},
+        "year": {"bold": "true"},
+        "Volume number": {"italic": "yes"},
+        "pages": {"range": "-"},
+    },
+    "default": {
+        "title": {},
+        "type": {"prefix": "(", "suffix": ")"},
+        "_end": {"text": ""},
+    },
+}
+
+_entry = Reference(
+    TY="JOUR",
+    AU=["Doe, Jane", "Khan, Li Wei"],
+    TI="Catalysis",
+    JO="Chemistry, A European Journal",
+    PY="2020/01/02",
+    VL="12",
+    SP="100",
+    EP="110",
+)
+
+
+def test_fields_options_and_default_rules():
+    style = compile_style(_rules)
+    assert style.format(_entry, False) == (
+        'Doe, J., Khan, L. W., "Catalysis", Chemistry A European Journal, 2020, 12, 100-110.'
+    )
+    assert style.format(_entry, "html") == (
+        'Doe, J., Khan, L. W., "Catalysis", <i>Chemistry A European Journal</i>, '
+        "<b>2020</b>, <i>12</i>, 100-110."
+    )
+    book = Reference(TY="BOOK", TI="A book", AU="Roe, Ann")
+    assert style.format(book, False) == "A book, (Whole book)"
+
+    entry = _entry.copy()
+    entry["AU"].append("Roe, Ann")
+    del entry["SP"]
+    assert style.format(entry, False) == (
+        'Doe, J. et al., "Catalysis", Chemistry A European Journal, 2020, 12.'
+    )
+
+
+def test_compilation_is_shared_and_memoized():
+    assert compile_style(_rules) is compile_style(dict(_rules))
+    style = compile_style(_rules)
+    entry = _entry.copy()
+    first = style.format(entry, False)
+    assert style.format(entry, False) is first
+
+    entry["TI"] = "Oxidation"
+    assert "Oxidation" in style.format(entry, False)
+    assert style.format_many([entry, {"TY": "JOUR", "TI": "Plain"}], False)[1] == (
+        '"Plain".'
+    )
+
+
+def test_unknown_types_and_fields():
+    with pytest.raises(KeyError):
+        compile_style({"JOUR": {"title": {}}}).format({"TY": "BOOK"}, False)
+    with pytest.raises(ValueError):
+        compile_style({"JOUR": {"nonsense": {}}}).format({"TY": "JOUR"}, False)
+
+
+def test_cite_by_rules():
+    ris = RIS(
+        "TY  - JOUR\nAU  - Doe, Jane\nTI  - Catalysis\nJO  - Chemistry, A European Journal\nPY  - 2020\nVL  - 12\nER  - \n"
+    )
+    assert ris.cite_by_rules(_rules, formated=False) == (
+        'Doe, J., "Catalysis", Chemistry A European Journal, 2020, 12.'
+    )
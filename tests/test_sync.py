@@ -0,0 +1,65 @@
+import os
+
+from scientific_citing import sync_directory
+
+
+def _library(tmp_path, paper_writer, dois):
+    library = tmp_path / "library"
+    library.mkdir()
+    (tmp_path / "ris").mkdir()
+    for n, doi in enumerate(dois):
+        paper_writer(library / f"paper{n}.pdf", doi, seed=n)
+    return library
+
+
+def test_sync_twice_with_renamed_pdfs(tmp_path, paper_writer, resolver):
+    library = _library(tmp_path, paper_writer, ["10.5555/sync.1", "10.5555/sync.2"])
+    options = dict(
+        ris_dir=str(tmp_path / "ris"),
+        rename_pdf_to_title=True,
+        resolver=resolver,
+        processes=1,
+    )
+
+    first = sync_directory(str(library), **options)
+    assert [result.error for result in first.processed] == [None, None]
+    assert all(result.new_pdf_path.endswith(".pdf") for result in first.processed)
+
+    second = sync_directory(str(library), **options)
+    assert second.processed == []
+    assert second.removed == []
+    assert second.unchanged == 2
+    assert resolver.requests == 2
+
+
+def test_sync_moves_into_title_directories(tmp_path, paper_writer, resolver):
+    library = _library(tmp_path, paper_writer, ["10.5555/sync.3"])
+    options = dict(
+        ris_dir=str(tmp_path / "ris"),
+        rename_pdf_to_title=True,
+        move_pdf_and_ris_in_title_dir=True,
+        resolver=resolver,
+        processes=1,
+    )
+
+    first = sync_directory(str(library), **options)
+    assert first.failed == []
+    (result,) = first.processed
+    assert os.path.isfile(result.new_pdf_path)
+    assert os.path.dirname(result.new_pdf_path) != str(library)
+
+    second = sync_directory(str(library), **options)
+    assert (second.processed, second.removed, second.unchanged) == ([], [], 1)
+
+
+def test_failures_are_reported_and_retried(tmp_path, paper_writer, resolver):
+    library = _library(tmp_path, paper_writer, ["10.5555/missing.1", None])
+    options = dict(ris_dir=str(tmp_path / "ris"), resolver=resolver, processes=1)
+
+    first = sync_directory(str(library), **options)
+    assert sorted(result.stage for result in first.failed) == ["extract", "resolve"]
+
+    # The resolve failure is retried, the PDF without DOI is not until it changes
+    second = sync_directory(str(library), **options)
+    assert [result.stage for result in second.processed] == ["resolve"]
+    assert second.unchanged == 1